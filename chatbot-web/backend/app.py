@@ -1,17 +1,54 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
-import pickle
-import re
 import json
+import struct
 import uuid
 import os
+import secrets
+import numpy as np
 from datetime import datetime
+from types import MappingProxyType
+from conversation_log import ConversationLogger
+from dialog_flow import DEFAULT_FLOW_PATH, load_flow
+from model_bundle import SOURCES, load_bundle
+from memo_cache import LRUCache
+from inference_executor import ExecutorOverloaded, InferenceExecutor
+from metrics import MetricsRegistry
+from message_analysis import KEYWORD_CLASSES, MessageAnalysis, MessageAnalyzer, normalize_text
+from preprocessing import TextNormalizer
+from session_store import MemorySessionStore, RedisClient, RedisSessionStore
+from text_patterns import (
+    DURATION_CONTEXT_RANK, DURATION_CONTEXT_RE, DURATION_RELATIVE_RE, DURATION_SIMPLE_RE,
+    CONTEXT_DURATION_RE, FILLER_RE, HONORIFIC_RE, LOCATION_HONORIFIC_RE, NAMA_RE, NAME_PREFIX_RE,
+    NEGATION_PREFIXES, NICKNAME_PREFIX_RE, PRONOUN_HONORIFIC_RE, PRONOUN_PREFIX_RE,
+    PRONOUNS_RE, SAKIT_RE, TRAILING_DURATION_RE, UMUR_RE, WHITESPACE_RE, space_if_group,
+)
 
 load_dotenv()
 
-app = FastAPI()
+# Start the inference pool with the server (process workers load the models here, not on first use)
+@asynccontextmanager
+async def lifespan(app):
+    inference.start()
+    if conversation_log is not None:
+        conversation_log.start()
+    watcher = asyncio.create_task(watch_artifacts()) if MODEL_WATCH_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    inference.shutdown()
+    if conversation_log is not None:
+        conversation_log.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS - restrict to Vercel frontend in production
 cors_origins = os.environ.get("CORS_ORIGINS", "https://pustu-anamnesis-chatbot.vercel.app")
@@ -28,364 +65,468 @@ class ChatRequest(BaseModel):
     message: str = ""
     session_id: str | None = None
 
+class BatchChatRequest(BaseModel):
+    messages: list[ChatRequest]
+
 class ResetRequest(BaseModel):
     session_id: str
 
+# Upper bound for /chat/batch payloads
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "256"))
+
 # Load models using path relative to this file (works regardless of CWD)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-print("Loading models...")
-with open(os.path.join(BASE_DIR, 'outputs/models/tfidf_vectorizer.pkl'), 'rb') as f:
-    vectorizer = pickle.load(f)
-
-with open(os.path.join(BASE_DIR, 'outputs/models/naive_bayes_model.pkl'), 'rb') as f:
-    model = pickle.load(f)
-
-with open(os.path.join(BASE_DIR, 'outputs/models/slang_dict.pkl'), 'rb') as f:
-    slang_dict = pickle.load(f)
-
-with open(os.path.join(BASE_DIR, 'outputs/models/stopwords.pkl'), 'rb') as f:
-    stopwords = pickle.load(f)
-
-# Load dictionaries
-with open(os.path.join(BASE_DIR, 'data/dictionaries/symptoms_dict.json'), 'r', encoding='utf-8') as f:
-    symptoms_dict = json.load(f)
-
-with open(os.path.join(BASE_DIR, 'data/dictionaries/severity_keywords.json'), 'r', encoding='utf-8') as f:
-    severity_dict = json.load(f)
-
-with open(os.path.join(BASE_DIR, 'data/dictionaries/location_keywords.json'), 'r', encoding='utf-8') as f:
-    location_dict = json.load(f)
-
-print("Models loaded successfully!")
-
-# Store active sessions
-sessions = {}
-
-# Preprocessing function
-def preprocess(text, slang_dict, stopwords):
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    words = text.split()
-    words = [slang_dict.get(w, w) for w in words]
-    words = [w for w in words if w not in stopwords]
-    return ' '.join(words)
+# Per-stage timings and dialog counters for /metrics (METRICS_ENABLED=0 turns recording off)
+metrics = MetricsRegistry(enabled=os.environ.get("METRICS_ENABLED", "1") == "1")
+
+# Versioned artifact bundle (model arrays are memory-mapped, rebuilt if its sources changed)
+MODEL_BUNDLE_PATH = os.environ.get("MODEL_BUNDLE", os.path.join(BASE_DIR, 'outputs/models/pustu_bundle.bin'))
+
+
+# Store active sessions (memory by default; redis lets several workers share them)
+def create_session_store():
+    backend = os.environ.get("SESSION_STORE", "memory")
+    ttl = int(os.environ.get("SESSION_TTL", "3600"))
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=int(os.environ.get("SESSION_MAX", "10000")), ttl=ttl)
+    if backend == "redis":
+        client = RedisClient.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+        return RedisSessionStore(
+            client,
+            dumps=lambda dsm: dsm.to_bytes(),
+            loads=lambda data: DialogStateManager.from_bytes(data),
+            ttl=ttl,
+        )
+    raise ValueError(f"Unknown SESSION_STORE: {backend}")
+
+sessions = create_session_store()
+
+# Session store calls from async handlers: network round trips (Redis) run on a worker thread so a slow
+# or unreachable server doesn't freeze every connection; the in-memory store is called directly
+async def store_io(fn, *args):
+    if sessions.blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+# Write-behind log of every turn for audit and retraining (CONVERSATION_LOG_DIR empty = off)
+def create_conversation_log():
+    directory = os.environ.get("CONVERSATION_LOG_DIR", "")
+    if not directory:
+        return None
+    return ConversationLogger(
+        directory,
+        fmt=os.environ.get("CONVERSATION_LOG_FORMAT", "jsonl"),
+        queue_size=int(os.environ.get("CONVERSATION_LOG_QUEUE", "10000")),
+        policy=os.environ.get("CONVERSATION_LOG_POLICY", "drop"),
+        segment_records=int(os.environ.get("CONVERSATION_LOG_SEGMENT_RECORDS", "100000")),
+        segment_seconds=float(os.environ.get("CONVERSATION_LOG_SEGMENT_SECONDS", "3600")),
+        # npz only: rows are saved as a part file at least this often
+        part_records=int(os.environ.get("CONVERSATION_LOG_PART_RECORDS", "5000")),
+        part_seconds=float(os.environ.get("CONVERSATION_LOG_PART_SECONDS", "5")),
+    )
+
+conversation_log = create_conversation_log()
+
+# Memoized preprocess() with the loaded slang dictionary and stopwords; `text` may be a MessageAnalysis
+# (its tokens are reused) or a raw message. Callers passing `res` must also pass the preprocess_cache
+# generation they read before taking that snapshot, so output of replaced resources is never cached
+def cached_preprocess(text, res=None, generation=None):
+    analysis = text if isinstance(text, MessageAnalysis) else None
+    key = analysis.text if analysis else normalize_text(text)
+    processed = preprocess_cache.get(key)
+    if processed is None:
+        if res is None:
+            # Read the generation before the resources (load_resources swaps them before clearing)
+            generation = preprocess_cache.generation
+            res = resources
+        with metrics.time('preprocess'):
+            if analysis:
+                processed = res.normalizer.normalize_tokens(analysis.tokens)
+            else:
+                processed = res.normalizer(key)
+        preprocess_cache.put(key, processed, generation)
+    return processed
 
 # Comprehensive Entity Extractor
 class EntityExtractor:
     """Comprehensive entity extraction for medical anamnesis"""
 
-    def __init__(self, symptoms_dict, severity_dict, location_dict):
+    def __init__(self, symptoms_dict, severity_dict, location_dict, keyword_classes=KEYWORD_CLASSES):
         self.symptoms_dict = symptoms_dict
         self.severity_dict = severity_dict
         self.location_dict = location_dict
+        self.keyword_classes = keyword_classes
+        # Single automaton over all three dictionaries and the keyword classes (built once per load)
+        self.analyzer = MessageAnalyzer(symptoms_dict, severity_dict, location_dict, keyword_classes)
+        self.matcher = self.analyzer.matcher
+
+    def analyze(self, text):
+        """MessageAnalysis of a message (normalized text, tokens, keyword hits and class flags)"""
+        return self.analyzer.analyze(text)
+
+    def find_keywords(self, text):
+        """Find every symptom/location/severity keyword hit with its position"""
+        return self.matcher.find_all(text.lower())
 
     def extract_nama(self, text):
         """Extract patient name from text"""
-        pattern = r'nama\s+(?:saya\s+)?(\w+(?:\s+\w+)?)'
-        match = re.search(pattern, text.lower())
+        return self._nama(text.lower())
+
+    def extract_umur(self, text):
+        """Extract age from text"""
+        return self._umur(text.lower())
+
+    def extract_jenis_kelamin(self, text):
+        """Extract gender from text"""
+        text_lower = text.lower()
+        flags = {kind for kind in ('gender_male', 'gender_female')
+                 if any(word in text_lower for word in self.keyword_classes[kind])}
+        return self._jenis_kelamin(flags)
+
+    def extract_durasi(self, text):
+        """Extract duration from text (excluding age mentions)"""
+        return self._durasi(text.lower())
+
+    @staticmethod
+    def _nama(text_lower):
+        match = NAMA_RE.search(text_lower)
         if match:
             return match.group(1).title()
         return None
 
-    def extract_umur(self, text):
-        """Extract age from text"""
-        pattern = r'(\d+)\s*(?:tahun|th|thn)'
-        match = re.search(pattern, text.lower())
+    @staticmethod
+    def _umur(text_lower):
+        match = UMUR_RE.search(text_lower)
         if match:
             return int(match.group(1))
         return None
 
-    def extract_jenis_kelamin(self, text):
-        """Extract gender from text"""
-        text_lower = text.lower()
-        if any(word in text_lower for word in ['laki-laki', 'laki', 'pria', 'cowok', 'cowo']):
+    @staticmethod
+    def _jenis_kelamin(flags):
+        if 'gender_male' in flags:
             return 'Laki-laki'
-        elif any(word in text_lower for word in ['perempuan', 'wanita', 'cewek', 'cewe']):
+        elif 'gender_female' in flags:
             return 'Perempuan'
         return None
 
-    def extract_durasi(self, text):
-        """Extract duration from text (excluding age mentions)"""
-        text_lower = text.lower()
-
+    @staticmethod
+    def _durasi(text_lower):
         # Pattern 1: Duration with context keywords (prevents "28 tahun" from matching)
-        duration_contexts = ['sudah', 'sejak', 'selama', 'sekitar', 'kurang lebih', 'kira-kira',
-                           'hampir', 'lebih dari']
-        for context in duration_contexts:
-            pattern = rf'{context}\s+(\d+)\s*(?:hari|minggu|bulan|tahun|jam|menit)'
-            match = re.search(pattern, text_lower)
-            if match:
-                return match.group(0)
+        # One combined pattern; the earliest context in DURATION_CONTEXTS wins, as before
+        best = None
+        for match in DURATION_CONTEXT_RE.finditer(text_lower):
+            if best is None or DURATION_CONTEXT_RANK[match.group(1)] < DURATION_CONTEXT_RANK[best.group(1)]:
+                best = match
+        if best:
+            return best.group(0)
 
         # Pattern 2: Simple patterns for hari/minggu/bulan (safe without context)
-        simple_pattern = r'(\d+)\s*(?:hari|minggu|bulan)'
-        match = re.search(simple_pattern, text_lower)
+        match = DURATION_SIMPLE_RE.search(text_lower)
         if match:
             return match.group(0)
 
         # Pattern 3: Relative time expressions
-        relative_pattern = r'sejak\s+(?:kemarin|lusa|seminggu|sebulan|tadi|pagi|siang|sore|malam)'
-        match = re.search(relative_pattern, text_lower)
+        match = DURATION_RELATIVE_RE.search(text_lower)
         if match:
             return match.group(0)
 
         return None
 
-    def extract_lokasi(self, text):
+    def extract_lokasi(self, text, matches=None):
         """Extract body location from text"""
-        text_lower = text.lower()
-        for location, keywords in self.location_dict.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return location
-        return None
+        if matches is None:
+            matches = self.find_keywords(text)
+        return self.matcher.first_label(matches, 'lokasi')
 
-    def extract_severity(self, text):
+    def extract_severity(self, text, matches=None):
         """Extract severity level from text"""
-        text_lower = text.lower()
-        for severity, info in self.severity_dict.items():
-            for keyword in info['keywords']:
-                if keyword in text_lower:
-                    return severity
-        return None
+        if matches is None:
+            matches = self.find_keywords(text)
+        return self.matcher.first_label(matches, 'severity')
 
-    def extract_symptoms(self, text):
+    def extract_symptoms(self, text, matches=None):
         """Extract symptoms from text"""
-        text_lower = text.lower()
-        found_symptoms = []
-        for symptom, info in self.symptoms_dict.items():
-            if symptom in text_lower:
-                found_symptoms.append(symptom)
-            for synonym in info.get('synonyms', []):
-                if synonym in text_lower and symptom not in found_symptoms:
-                    found_symptoms.append(symptom)
-        return found_symptoms
-
-    def extract_all(self, text):
-        """Extract all entities from text"""
+        if matches is None:
+            matches = self.find_keywords(text)
+        return self.matcher.labels(matches, 'symptoms')
+
+    def extract_all(self, text, analysis=None):
+        """Extract all entities from text, or from its MessageAnalysis (no further lowercasing or scans)"""
+        if analysis is None:
+            text_lower = text.lower()
+            matches = self.matcher.find_all(text_lower)
+            flags = frozenset(match.kind for match in matches)
+        else:
+            text_lower, matches, flags = analysis.text, analysis.matches, analysis.flags
         return {
-            'nama': self.extract_nama(text),
-            'umur': self.extract_umur(text),
-            'jenis_kelamin': self.extract_jenis_kelamin(text),
-            'durasi': self.extract_durasi(text),
-            'lokasi': self.extract_lokasi(text),
-            'severity': self.extract_severity(text),
-            'symptoms': self.extract_symptoms(text)
+            'nama': self._nama(text_lower),
+            'umur': self._umur(text_lower),
+            'jenis_kelamin': self._jenis_kelamin(flags),
+            'durasi': self._durasi(text_lower),
+            'lokasi': self.matcher.first_label(matches, 'lokasi'),
+            'severity': self.matcher.first_label(matches, 'severity'),
+            'symptoms': self.matcher.labels(matches, 'symptoms')
         }
 
-# Initialize entity extractor
-extractor = EntityExtractor(symptoms_dict, severity_dict, location_dict)
+# Memo caches keyed by normalized text (cleared whenever models/dictionaries are reloaded)
+preprocess_cache = LRUCache(int(os.environ.get("PREPROCESS_CACHE_SIZE", "4096")))
+intent_cache = LRUCache(int(os.environ.get("INTENT_CACHE_SIZE", "4096")))
+
+# Everything a prediction reads, swapped as one reference on reload
+Resources = namedtuple('Resources',
+                       'bundle scorer slang_dict stopwords normalizer symptoms_dict severity_dict location_dict extractor '
+                       'state_scorers')
+
+# Messages every loaded model must score (catches truncated or mismatched artifacts before the swap)
+VALIDATION_MESSAGES = ('halo', 'nama saya budi', 'saya demam sudah 3 hari', 'sakit di kepala, parah', 'tidak ada')
+
+def build_resources():
+    """Load models and dictionaries from the bundle (rebuilt first if its sources changed)"""
+    bundle = load_bundle(MODEL_BUNDLE_PATH)
+    # TF-IDF + Naive Bayes served through the NumPy scorer (no sklearn import)
+    scorer = bundle.scorer()
+    slang_dict = bundle.slang_dict()
+    stopwords = bundle.stopwords()
+
+    # Load dictionaries
+    symptoms_dict, severity_dict, location_dict = bundle.dictionaries()
+
+    # Initialize entity extractor
+    extractor = EntityExtractor(symptoms_dict, severity_dict, location_dict, MESSAGE_KEYWORD_CLASSES)
+    return Resources(bundle, scorer, slang_dict, stopwords, TextNormalizer(slang_dict, stopwords),
+                     symptoms_dict, severity_dict, location_dict, extractor,
+                     build_state_scorers(scorer) if INTENT_STATE_SCORING else None)
+
+# INTENT_STATE_SCORING=1: the classifier scores only the intents the current state expects (plus the
+# flow-control ones), renormalized over them with the state's prior from the flow. The answer then always
+# looks valid unless a flow-control intent wins, so off-topic answers are retried less often
+INTENT_STATE_SCORING = os.environ.get("INTENT_STATE_SCORING", "0") == "1"
+# Intents the dialog handles in every state (greeting, thanks, "tidak tahu"), never left out of a subset
+FLOW_CONTROL_INTENTS = frozenset(('sapaan', 'ucapan_terima_kasih', 'tidak_jelas'))
+
+def build_state_scorers(scorer):
+    """Per state index, the scorer subset for its expected intents (None: the state accepts anything)"""
+    subsets = []
+    for state, expected, prior in zip(FLOW.states, FLOW.expected, FLOW.priors):
+        if expected is None:
+            subsets.append(scorer.subset(scorer.classes.tolist(), prior) if prior else None)
+            continue
+        try:
+            subsets.append(scorer.subset(expected | FLOW_CONTROL_INTENTS, prior))
+        except ValueError as exc:
+            raise ValueError(f"State {state}: {exc}") from None
+    return tuple(subsets)
+
+def validate_resources(res):
+    """Raise ValueError unless the new resources can serve predictions"""
+    n_classes = len(res.scorer.classes)
+    if n_classes == 0 or res.scorer.feature_log_prob.shape != (n_classes, len(res.scorer.idf)):
+        raise ValueError(f"Inconsistent model shapes {res.scorer.feature_log_prob.shape}")
+    processed = [res.normalizer(message) for message in VALIDATION_MESSAGES]
+    proba = res.scorer.predict_proba(processed)
+    if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0):
+        raise ValueError("Model produced invalid probabilities")
+    for message in VALIDATION_MESSAGES:
+        res.extractor.extract_all(message)
+
+def clear_caches():
+    """Invalidate the memo caches; results computed before this call are no longer stored"""
+    preprocess_cache.clear()
+    intent_cache.clear()
+
+def load_resources(invalidate=True):
+    """(Re)load models and dictionaries, swap them in and invalidate the memo caches (unless the caller
+    does it later)"""
+    global resources, bundle, scorer, slang_dict, stopwords, normalizer, symptoms_dict, severity_dict, location_dict
+    global extractor, state_scorers
+
+    print("Loading models...")
+    res = build_resources()
+    validate_resources(res)
+
+    # One assignment is the swap; requests already running keep the Resources they started with
+    resources = res
+    # Module-level names kept for scripts and benchmarks
+    (bundle, scorer, slang_dict, stopwords, normalizer, symptoms_dict, severity_dict, location_dict, extractor,
+     state_scorers) = res
+
+    if invalidate:
+        clear_caches()
+    print("Models loaded successfully!")
+    return res
+
+# Dialog definition shared by every session (immutable; per-session state lives in DialogStateManager).
+# Loaded from JSON and compiled into integer-indexed tables, see dialog_flow.py
+FLOW = load_flow(os.environ.get("DIALOG_FLOW_PATH", DEFAULT_FLOW_PATH))
+DIALOG_FLOW = FLOW.states
+STATE_INDEX = FLOW.index
+QUESTIONS = FLOW.questions_by_state
+RETRY_MESSAGES = FLOW.retry_by_state
+EXPECTED_INTENTS = FLOW.expect_by_state
+# States whose answers make up the {nama} display name
+NAME_STATES = frozenset(STATE_INDEX[state] for state in ('nama', 'nama_panggilan') if state in STATE_INDEX)
+# Keyword classes flagged by the message analysis: the fixed ones plus the flow's accept_if keyword sets
+MESSAGE_KEYWORD_CLASSES = MappingProxyType({**KEYWORD_CLASSES, **FLOW.keyword_classes})
+
+load_resources()
+
+# Entity keys produced by EntityExtractor.extract_all (fixed order for compact serialization)
+ENTITY_KEYS = ('nama', 'umur', 'jenis_kelamin', 'durasi', 'lokasi', 'severity', 'symptoms')
+
+# Serialized session layout: version, flow fingerprint, state index, one retry counter per state, then
+# JSON records. State indices only mean something for the flow that wrote them
+SESSION_FORMAT_VERSION = 2
+_SESSION_HEADER = struct.Struct(f'<B8sB{len(DIALOG_FLOW)}s')
+
+# Shared cleanup for riwayat/alergi/faktor risiko answers in the summary
+def clean_history_answer(text):
+    message = text.strip()
+    # Leading pronoun + honorifics in one pass
+    message = PRONOUN_HONORIFIC_RE.sub(space_if_group, message)
+    message = WHITESPACE_RE.sub(' ', message).strip()
+    if message.lower().startswith(NEGATION_PREFIXES):
+        return 'Tidak ada'
+    return message.capitalize() if message else message
 
 # Dialog State Manager
+def display_name(nama_panggilan_text, nama_text):
+    """Name for {nama}: the nickname without "panggil", else the first word of the full name, title-cased"""
+    if nama_panggilan_text:
+        # Use nickname
+        nama = nama_panggilan_text.strip()
+        nama = NICKNAME_PREFIX_RE.sub('', nama).strip()
+        if nama:
+            nama = nama.title()
+    elif nama_text:
+        # Use first name only from full name
+        nama = nama_text.strip()
+        nama = NAME_PREFIX_RE.sub('', nama).strip()
+        # Take only first name
+        nama = nama.split()[0] if nama else ''
+        if nama:
+            nama = nama.title()
+    else:
+        nama = ''
+    return nama
+
+
 class DialogStateManager:
+    # Per-session state only: current state index, retry counters, collected fields and their bitmask,
+    # plus the display name and rendered {nama} questions (reset by _fill() when a name state is stored)
+    __slots__ = ('_state_idx', '_retries', '_filled', 'data', '_display_name', '_rendered')
+
+    flow = DIALOG_FLOW
+    questions = QUESTIONS
+    retry_messages = RETRY_MESSAGES
+    expected_intents = EXPECTED_INTENTS
+
     def __init__(self):
-        self.state = 'greeting'
+        self._state_idx = 0  # greeting
+        self._retries = bytearray(len(DIALOG_FLOW))
+        self._filled = 0
         self.data = {}
-        self.retry_count = {}
-        self.flow = [
-            'greeting', 'nama', 'nama_panggilan', 'umur', 'jenis_kelamin',
-            'keluhan_utama', 'gejala', 'durasi',
-            'lokasi', 'severity', 'riwayat_penyakit',
-            'riwayat_obat', 'alergi', 'faktor_risiko', 'summary'
-        ]
-        self.questions = {
-            'greeting': 'Selamat datang di Chatbot PUSTU. Saya akan membantu mencatat keluhan Anda. Boleh saya tahu nama lengkap Anda?',
-            'nama': 'Boleh saya tahu nama lengkap Anda?',
-            'nama_panggilan': 'Baik, boleh dipanggil apa?',
-            'umur': '{nama}, berapa usia Anda?',
-            'jenis_kelamin': 'Jenis kelamin Anda? (laki-laki/perempuan)',
-            'keluhan_utama': 'Baik {nama}, sekarang ceritakan keluhan utama yang Anda rasakan.',
-            'gejala': 'Apakah ada gejala lain yang menyertai?',
-            'durasi': 'Sudah berapa lama {nama} merasakan keluhan ini?',
-            'lokasi': 'Di bagian tubuh mana {nama} merasakan keluhan tersebut?',
-            'severity': 'Seberapa parah yang Anda rasakan? Ringan, sedang, atau berat?',
-            'riwayat_penyakit': '{nama}, apakah Anda memiliki riwayat penyakit sebelumnya?',
-            'riwayat_obat': 'Apakah saat ini sedang mengonsumsi obat-obatan?',
-            'alergi': 'Apakah {nama} memiliki alergi terhadap makanan atau obat tertentu?',
-            'faktor_risiko': 'Apakah ada kebiasaan yang ingin Anda sampaikan? Seperti merokok, kurang olahraga, dll.',
-            'summary': 'Berikut ringkasan hasil anamnesis Anda:'
-        }
-        self.retry_messages = {
-            'nama': ['Boleh tahu nama lengkap Anda?'],
-            'nama_panggilan': ['Boleh dipanggil siapa?'],
-            'umur': ['Berapa usia Anda saat ini?'],
-            'jenis_kelamin': ['Jenis kelamin Anda laki-laki atau perempuan?'],
-            'keluhan_utama': [
-                'Bisa ceritakan lagi keluhan utama yang Anda rasakan?',
-                'Bisa dijelaskan keluhan yang Anda alami saat ini?'
-            ],
-            'gejala': [
-                'Apakah ada gejala lain yang menyertai?',
-                'Selain itu, ada gejala penyerta lainnya?'
-            ],
-            'durasi': [
-                'Sudah berapa lama Anda merasakan keluhan ini? Contoh: 3 hari, 1 minggu',
-                'Bisa sebutkan sudah berapa lama mengalami keluhan tersebut?'
-            ],
-            'lokasi': [
-                'Di bagian tubuh mana Anda merasakan keluhan tersebut?',
-                'Bisa sebutkan lokasi keluhan yang Anda rasakan?'
-            ],
-            'severity': [
-                'Tingkat keparahannya ringan, sedang, atau berat?',
-                'Seberapa parah yang Anda rasakan?'
-            ],
-            'riwayat_penyakit': [
-                'Apakah ada riwayat penyakit sebelumnya? Jika tidak, sebutkan "tidak ada"'
-            ],
-            'riwayat_obat': [
-                'Apakah sedang mengonsumsi obat? Jika tidak, sebutkan "tidak"'
-            ],
-            'alergi': [
-                'Apakah ada alergi terhadap makanan atau obat? Jika tidak, sebutkan "tidak ada"'
-            ],
-            'faktor_risiko': [
-                'Apakah ada kebiasaan tertentu? Seperti merokok, kurang olahraga, dll. Jika tidak, sebutkan "tidak ada"'
-            ]
-        }
+        self._display_name = None
+        self._rendered = {}
 
-        # Expected intents for each state (jawab_gejala REMOVED - overlaps with other intents)
-        self.expected_intents = {
-            'nama': [],  # Accept anything
-            'nama_panggilan': [],  # Accept anything
-            'umur': [],  # Accept anything
-            'jenis_kelamin': [],  # Accept anything
-            'keluhan_utama': ['keluhan_utama', 'jawab_gejala_penyerta'],
-            'gejala': ['jawab_gejala_penyerta', 'keluhan_utama', 'penyangkalan', 'tidak_jelas'],
-            'durasi': ['jawab_durasi'],
-            'lokasi': ['jawab_lokasi'],
-            'severity': ['jawab_severity'],
-            'riwayat_penyakit': ['jawab_riwayat_penyakit', 'penyangkalan', 'tidak_jelas'],
-            'riwayat_obat': ['jawab_riwayat_obat', 'penyangkalan', 'tidak_jelas'],
-            'alergi': ['jawab_alergi', 'penyangkalan', 'tidak_jelas'],
-            'faktor_risiko': ['jawab_faktor_risiko', 'penyangkalan', 'tidak_jelas']
-        }
+    @property
+    def state(self):
+        return DIALOG_FLOW[self._state_idx]
+
+    @state.setter
+    def state(self, state):
+        self._state_idx = STATE_INDEX[state]
+
+    def get_retry_count(self, state=None):
+        """Number of retries asked for a state (default: current state)"""
+        return self._retries[self._state_idx if state is None else STATE_INDEX[state]]
 
     def get_current_question(self, retry=False):
-        if retry and self.state in self.retry_messages:
-            retry_idx = self.retry_count.get(self.state, 0) % len(self.retry_messages[self.state])
-            question = self.retry_messages[self.state][retry_idx]
+        retry_messages = FLOW.retry_messages[self._state_idx]
+        if retry and retry_messages:
+            question = retry_messages[self.get_retry_count() % len(retry_messages)]
         else:
-            question = self.questions.get(self.state, '')
+            question = FLOW.questions[self._state_idx]
 
-        # Replace {nama} placeholder with actual name (prefer nickname if available)
+        # Replace {nama} placeholder with the display name; rendered once per template until a name changes
         if '{nama}' in question:
-            nama_panggilan_text = self.get_text('nama_panggilan')
-            nama_text = self.get_text('nama')
-
-            if nama_panggilan_text:
-                # Use nickname
-                nama = nama_panggilan_text.strip()
-                nama = re.sub(r'^(panggil\s+)?', '', nama, flags=re.IGNORECASE).strip()
-                if nama:
-                    nama = nama.title()
-            elif nama_text:
-                # Use first name only from full name
-                nama = nama_text.strip()
-                nama = re.sub(r'^(saya|nama\s+saya|nama)\s+', '', nama, flags=re.IGNORECASE).strip()
-                # Take only first name
-                nama = nama.split()[0] if nama else ''
-                if nama:
-                    nama = nama.title()
-            else:
-                nama = ''
-
-            question = question.replace('{nama}', nama)
-
+            rendered = self._rendered.get(question)
+            if rendered is None:
+                rendered = self._rendered[question] = question.replace('{nama}', self.display_name)
+            return rendered
         return question
 
+    @property
+    def display_name(self):
+        """Name used in questions (prefer nickname if available), computed once per stored name"""
+        if self._display_name is None:
+            self._display_name = display_name(self.get_text('nama_panggilan'), self.get_text('nama'))
+        return self._display_name
+
     def get_next_state(self):
-        current_idx = self.flow.index(self.state)
-        if current_idx < len(self.flow) - 1:
-            return self.flow[current_idx + 1]
-        return 'summary'
+        return DIALOG_FLOW[FLOW.next_state[self._state_idx]]
 
     def is_intent_valid(self, intent):
         """Check if intent matches expected intent for current state"""
-        if self.state not in self.expected_intents:
-            return True
-        # Empty list means accept anything
-        if not self.expected_intents[self.state]:
-            return True
-        return intent in self.expected_intents[self.state]
+        expected = FLOW.expected[self._state_idx]
+        # None means accept anything
+        return expected is None or intent in expected
+
+    def validate(self, intent, analysis, result):
+        """(is_valid, intent) for the current state: its accept_if rule may accept and relabel the answer"""
+        validator = FLOW.validators[self._state_idx]
+        if validator is not None and validator[0](analysis, result):
+            return True, validator[1]
+        return self.is_intent_valid(intent), intent
+
+    def _fill(self, state_idx, record):
+        self.data[DIALOG_FLOW[state_idx]] = record
+        self._filled |= 1 << state_idx
+        if state_idx in NAME_STATES:
+            self._display_name = None
+            self._rendered.clear()
 
     def update(self, intent, user_message, processed_message, entities, is_valid):
+        state_idx = self._state_idx
         if is_valid:
-            # Store data
-            self.data[self.state] = {
+            # Store data (processed = normalized text for summary)
+            self._fill(state_idx, {
                 'message': user_message,
-                'processed': processed_message,  # Store normalized text for summary
+                'processed': processed_message,
                 'intent': intent,
                 'entities': entities
-            }
+            })
             # Reset retry count for this state
-            self.retry_count[self.state] = 0
+            self._retries[state_idx] = 0
             # Move to next state
-            self.state = self.get_next_state()
+            self._state_idx = FLOW.next_state[state_idx]
             return True
         else:
-            # Increment retry count
-            self.retry_count[self.state] = self.retry_count.get(self.state, 0) + 1
+            # Increment retry count (saturates at one byte)
+            if self._retries[state_idx] < 255:
+                self._retries[state_idx] += 1
             return False
 
     def smart_prefill(self, user_message, entities):
-        """Auto-fill future states if user already provided the information"""
-        # This is called AFTER state update, so check if we haven't passed these states yet
-        current_idx = self.flow.index(self.state)
-
-        # Check if user provided duration info and we haven't reached durasi state yet
-        if entities.get('durasi') and 'durasi' not in self.data:
-            durasi_idx = self.flow.index('durasi')
-            if current_idx <= durasi_idx:
-                self.data['durasi'] = {
-                    'message': entities['durasi'],
-                    'intent': 'jawab_durasi',
-                    'entities': entities
-                }
-
-        # Check if user provided location info and we haven't reached lokasi state yet
-        if entities.get('lokasi') and 'lokasi' not in self.data:
-            lokasi_idx = self.flow.index('lokasi')
-            if current_idx <= lokasi_idx:
-                self.data['lokasi'] = {
-                    'message': f"di {entities['lokasi']}",
-                    'intent': 'jawab_lokasi',
-                    'entities': entities
-                }
-
-        # Check if user provided severity info and we haven't reached severity state yet
-        if entities.get('severity') and 'severity' not in self.data:
-            severity_idx = self.flow.index('severity')
-            if current_idx <= severity_idx:
-                self.data['severity'] = {
-                    'message': entities['severity'],
-                    'intent': 'jawab_severity',
-                    'entities': entities
-                }
-
-        # Check if user provided symptoms info (but DON'T auto-fill gejala from keluhan_utama)
-        # Only backfill gejala if we're past it but still in early states (before riwayat)
-        if entities.get('symptoms') and 'gejala' not in self.data:
-            gejala_idx = self.flow.index('gejala')
-            riwayat_idx = self.flow.index('riwayat_penyakit')
-
-            # Only prefill if we're in durasi/lokasi/severity states (after gejala but before riwayat)
-            # Don't prefill from keluhan_utama state (user will be asked properly)
-            if gejala_idx < current_idx <= riwayat_idx and len(entities['symptoms']) > 0:
-                self.data['gejala'] = {
-                    'message': ', '.join(entities['symptoms']),
-                    'intent': 'jawab_gejala_penyerta',
-                    'entities': entities
-                }
+        """Auto-fill future states if user already provided the information (FLOW.prefill rules)"""
+        # Called AFTER the state update; each rule only applies while the current state is in its window
+        # (e.g. gejala is only backfilled after it was asked, never straight from keluhan_utama)
+        current_idx = self._state_idx
+        for rule in FLOW.prefill:
+            if rule.lo <= current_idx <= rule.hi and not self._filled & rule.bit:
+                value = entities.get(rule.entity)
+                if value:
+                    if isinstance(value, list):
+                        value = ', '.join(value)
+                    self._fill(rule.state, {
+                        'message': rule.prefix + value + rule.suffix,
+                        'intent': rule.intent,
+                        'entities': entities
+                    })
 
     def skip_filled_states(self):
-        """Skip states that have already been filled by smart prefill"""
-        max_skips = 5  # Prevent infinite loops
-        skipped = 0
-        while self.state in self.data and self.state != 'summary' and skipped < max_skips:
-            self.state = self.get_next_state()
-            skipped += 1
+        """Skip states that have already been filled by smart prefill (summary is never filled)"""
+        self._state_idx = FLOW.next_unfilled(self._state_idx, self._filled)
 
     def get_text(self, state_key):
         """Get processed text if available, fallback to original message"""
@@ -393,6 +534,47 @@ class DialogStateManager:
             return self.data[state_key].get('processed', self.data[state_key]['message'])
         return None
 
+    def to_bytes(self):
+        """Serialize per-session state compactly (for shared session stores)"""
+        records = []
+        for state, record in self.data.items():
+            entities = record.get('entities')
+            if isinstance(entities, dict) and tuple(entities) == ENTITY_KEYS:
+                entities = [entities[key] for key in ENTITY_KEYS]
+            item = [STATE_INDEX[state], record['message'], record.get('intent'), entities]
+            if 'processed' in record:
+                item.append(record['processed'])
+            records.append(item)
+        header = _SESSION_HEADER.pack(SESSION_FORMAT_VERSION, FLOW.fingerprint, self._state_idx, bytes(self._retries))
+        return header + json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """Rebuild a session serialized with to_bytes(); None, like an expired session, if another format or
+        flow wrote it or the payload is truncated or corrupt"""
+        if len(payload) < _SESSION_HEADER.size or payload[0] != SESSION_FORMAT_VERSION:
+            return None
+        version, fingerprint, state_idx, retries = _SESSION_HEADER.unpack_from(payload)
+        if fingerprint != FLOW.fingerprint or state_idx >= len(DIALOG_FLOW):
+            return None
+        dsm = cls()
+        dsm._state_idx = state_idx
+        dsm._retries = bytearray(retries)
+        try:
+            for item in json.loads(payload[_SESSION_HEADER.size:]):
+                entities = item[3]
+                if isinstance(entities, list):
+                    entities = dict(zip(ENTITY_KEYS, entities))
+                record = {'message': item[1]}
+                if len(item) > 4:
+                    record['processed'] = item[4]
+                record['intent'] = item[2]
+                record['entities'] = entities
+                dsm._fill(item[0], record)
+        except (ValueError, IndexError, TypeError, KeyError):
+            return None
+        return dsm
+
     def get_summary(self):
         summary = []
 
@@ -403,7 +585,7 @@ class DialogStateManager:
         nama_text = self.get_text('nama')
         if nama_text:
             nama = nama_text.strip()
-            nama = re.sub(r'^(saya|nama\s+saya|nama)\s+', '', nama, flags=re.IGNORECASE).strip()
+            nama = NAME_PREFIX_RE.sub('', nama).strip()
             nama = nama.title() if nama else ""
             identity_section.append(f"Nama          : {nama}")
             patient_name = nama
@@ -414,9 +596,9 @@ class DialogStateManager:
         umur_text = self.get_text('umur')
         if umur_text:
             umur = umur_text.strip()
-            umur = re.sub(r'^(saya|aku)\s+', '', umur, flags=re.IGNORECASE)
+            umur = PRONOUN_PREFIX_RE.sub('', umur)
             # Ensure "tahun" is present
-            if not re.search(r'tahun', umur, flags=re.IGNORECASE):
+            if 'tahun' not in umur.lower():
                 umur = f"{umur} tahun"
             identity_section.append(f"Usia          : {umur}")
 
@@ -450,14 +632,14 @@ class DialogStateManager:
         keluhan_text = self.get_text('keluhan_utama')
         if keluhan_text:
             message = keluhan_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
+            # Leading pronoun + honorifics in one pass
+            message = PRONOUN_HONORIFIC_RE.sub(space_if_group, message)
             # Remove duration patterns - both with and without context words
             # Pattern 1: "sudah/sejak/selama X hari"
-            message = re.sub(r'\s*(sudah|sejak|selama|sekitar|kurang lebih)\s+\d+\s*(hari|minggu|bulan|tahun|jam|menit)', '', message, flags=re.IGNORECASE)
+            message = CONTEXT_DURATION_RE.sub('', message)
             # Pattern 2: "X hari" (standalone duration at end)
-            message = re.sub(r'\s+\d+\s*(hari|minggu|bulan|tahun|jam|menit)\s*$', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
+            message = TRAILING_DURATION_RE.sub('', message)
+            message = WHITESPACE_RE.sub(' ', message).strip()
             message = message.capitalize() if message else message
             medical_data.append(f"Keluhan Utama       : {message}")
 
@@ -465,15 +647,14 @@ class DialogStateManager:
         gejala_text = self.get_text('gejala')
         if gejala_text:
             message = gejala_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(saya|aku)\s+', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
+            # Leading and inner pronouns in one pass
+            message = PRONOUNS_RE.sub(space_if_group, message)
+            message = HONORIFIC_RE.sub(' ', message)
             # Convert informal to formal: "juga", "sekali", etc. (use word boundaries)
-            message = re.sub(r'\b(juga|sekali|banget)\b', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
-            # Professional terminology
-            message = re.sub(r'\bsakit kepala\b', 'nyeri kepala', message, flags=re.IGNORECASE)
-            message = re.sub(r'\bsakit\b', 'nyeri', message, flags=re.IGNORECASE)
+            message = FILLER_RE.sub('', message)
+            message = WHITESPACE_RE.sub(' ', message).strip()
+            # Professional terminology ("sakit kepala" -> "nyeri kepala" included)
+            message = SAKIT_RE.sub('nyeri', message)
             message = message.capitalize() if message else message
             medical_data.append(f"Gejala Penyerta     : {message}")
 
@@ -488,9 +669,8 @@ class DialogStateManager:
         lokasi_text = self.get_text('lokasi')
         if lokasi_text:
             message = lokasi_text.strip()
-            message = re.sub(r'^di\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
+            message = LOCATION_HONORIFIC_RE.sub(space_if_group, message)
+            message = WHITESPACE_RE.sub(' ', message).strip()
             message = message.capitalize() if message else message
             medical_data.append(f"Lokasi              : {message}")
 
@@ -523,142 +703,269 @@ class DialogStateManager:
         # Riwayat Penyakit
         riwayat_penyakit_text = self.get_text('riwayat_penyakit')
         if riwayat_penyakit_text:
-            message = riwayat_penyakit_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
-            negation = ['tidak', 'tidak ada', 'tidak tahu', 'ga', 'gak', 'enggak', 'nggak']
-            if any(message.lower().startswith(neg) for neg in negation):
-                message = 'Tidak ada'
-            else:
-                message = message.capitalize() if message else message
-            history_data.append(f"Riwayat Penyakit    : {message}")
+            history_data.append(f"Riwayat Penyakit    : {clean_history_answer(riwayat_penyakit_text)}")
 
         # Riwayat Obat
         riwayat_obat_text = self.get_text('riwayat_obat')
         if riwayat_obat_text:
-            message = riwayat_obat_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
-            negation = ['tidak', 'tidak ada', 'tidak tahu', 'ga', 'gak', 'enggak', 'nggak']
-            if any(message.lower().startswith(neg) for neg in negation):
-                message = 'Tidak ada'
-            else:
-                message = message.capitalize() if message else message
-            history_data.append(f"Obat yang Dikonsumsi : {message}")
+            history_data.append(f"Obat yang Dikonsumsi : {clean_history_answer(riwayat_obat_text)}")
 
         # Alergi
         alergi_text = self.get_text('alergi')
         if alergi_text:
-            message = alergi_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
-            negation = ['tidak', 'tidak ada', 'tidak tahu', 'ga', 'gak', 'enggak', 'nggak']
-            if any(message.lower().startswith(neg) for neg in negation):
-                message = 'Tidak ada'
-            else:
-                message = message.capitalize() if message else message
-            history_data.append(f"Riwayat Alergi      : {message}")
+            history_data.append(f"Riwayat Alergi      : {clean_history_answer(alergi_text)}")
 
         # Faktor Risiko
         faktor_risiko_text = self.get_text('faktor_risiko')
         if faktor_risiko_text:
-            message = faktor_risiko_text.strip()
-            message = re.sub(r'^(saya|aku)\s+', '', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+(dokter|dok|bu|pak|mas|mbak|kak)\s*', ' ', message, flags=re.IGNORECASE)
-            message = re.sub(r'\s+', ' ', message).strip()
-            negation = ['tidak', 'tidak ada', 'tidak tahu', 'ga', 'gak', 'enggak', 'nggak']
-            if any(message.lower().startswith(neg) for neg in negation):
-                message = 'Tidak ada'
-            else:
-                message = message.capitalize() if message else message
-            history_data.append(f"Faktor Risiko       : {message}")
+            history_data.append(f"Faktor Risiko       : {clean_history_answer(faktor_risiko_text)}")
 
         summary.extend(history_data)
 
         return "\n".join(summary)
 
-# Predict intent with keyword boost
-def predict_intent(text):
-    processed = preprocess(text, slang_dict, stopwords)
-    tfidf = vectorizer.transform([processed])
-    pred = model.predict(tfidf)[0]
-    proba = model.predict_proba(tfidf)[0]
-    confidence = float(max(proba))
-
-    # Use comprehensive entity extractor
-    all_entities = extractor.extract_all(text)
-    location = all_entities['lokasi']
-    durasi = all_entities['durasi']
-    severity = all_entities['severity']
-
-    # Keyword-based intent boosting (override model if keywords strongly match)
-    text_lower = text.lower()
-
-    # Duration keywords - use extractor result
-    if durasi:  # If extractor found duration with proper context
-        pred = 'jawab_durasi'
-        confidence = 0.95
-
-    # Severity keywords
-    elif severity:  # If extractor found severity
-        if confidence < 0.7:  # Only override if model is uncertain
-            pred = 'jawab_severity'
-            confidence = 0.90
-
+# Keyword-based intent boosting (override model if keywords strongly match)
+def rule_intent(analysis, all_entities):
+    """(intent, confidence) when the keyword rules decide whatever the classifier says, else None"""
+    # Duration keywords - use extractor result (duration with proper context)
+    if all_entities['durasi']:
+        return 'jawab_durasi', 0.95
+    # Severity keywords only override an uncertain model (apply_keyword_boost), which needs the classifier
+    if all_entities['severity']:
+        return None
     # Location - if entity detected and mentions body parts
-    elif location and any(kw in text_lower for kw in ['di', 'bagian', 'sebelah', 'area']):
-        pred = 'jawab_lokasi'
-        confidence = 0.90
-
-    # Allergy keywords
-    elif any(kw in text_lower for kw in ['alergi', 'bentol', 'gatal', 'ruam']) and 'alergi' in text_lower:
-        pred = 'jawab_alergi'
-        confidence = 0.90
-
-    return {
-        'intent': pred,
-        'confidence': confidence,
-        'entities': all_entities,
-        'location': location,
-        'processed': processed
-    }
-
-@app.post('/chat')
-async def chat(request: ChatRequest):
-    user_message = request.message
-    session_id = request.session_id
+    if all_entities['lokasi'] and 'location_context' in analysis.flags:
+        return 'jawab_lokasi', 0.90
+    # Allergy keywords (alergi/bentol/gatal/ruam and 'alergi' itself reduces to 'alergi')
+    if 'allergy' in analysis.flags:
+        return 'jawab_alergi', 0.90
+    return None
+
+def apply_keyword_boost(analysis, pred, confidence, all_entities):
+    decided = rule_intent(analysis, all_entities)
+    if decided is not None:
+        return decided
+    # Severity keywords: only override if model is uncertain
+    if all_entities['severity'] and confidence < 0.7:
+        return 'jawab_severity', 0.90
+    return pred, confidence
+
+# INTENT_STATE_RULES=1: a state's accept_if rule may also decide the intent before the classifier runs.
+# Not exact: such turns report STATE_RULE_CONFIDENCE, and a classifier answer of sapaan/ucapan_terima_kasih/
+# tidak_jelas that would have interrupted the flow is never seen
+INTENT_STATE_RULES = os.environ.get("INTENT_STATE_RULES", "0") == "1"
+STATE_RULE_CONFIDENCE = 0.90
+# from_intent label of keyword overrides decided before the classifier ran
+UNSCORED_INTENT = 'unscored'
+
+def state_rule_intent(state, analysis, result):
+    """(intent, confidence) when the state's accept_if rule accepts the message, else None"""
+    validator = FLOW.validators[STATE_INDEX[state]] if state in STATE_INDEX else None
+    # Greetings and "tidak tahu" answers keep going through the classifier, as their handling uses its intent
+    if validator is None or not analysis.flags.isdisjoint(('greeting', 'uncertainty')):
+        return None
+    if validator[0](analysis, result):
+        return validator[1], STATE_RULE_CONFIDENCE
+    return None
+
+# Classify normalized messages (no caching). Staged: messages the rules decide (keyword rules in any
+# state, plus the current state's accept_if rule when `states` is given) skip TF-IDF + Naive Bayes
+def _predict_uncached(keys, states=None):
+    # One snapshot for the whole batch, so a concurrent reload can't mix old and new artifacts.
+    # The cache generation is read first: a reload in between makes the preprocess results uncacheable
+    generation = preprocess_cache.generation
+    res = resources
+    scorer = res.scorer
+    # One analysis per message: normalized text, tokens and every keyword hit, reused below
+    analyses = []
+    for key in keys:
+        with metrics.time('analyze'):
+            analyses.append(res.extractor.analyze(key))
+    processed = [cached_preprocess(analysis, res, generation) for analysis in analyses]
+
+    results = []
+    pending = []  # indices the rules left to the classifier
+    for i, key in enumerate(keys):
+        # Use comprehensive entity extractor
+        with metrics.time('extractor.extract_all'):
+            all_entities = res.extractor.extract_all(key, analyses[i])
+        result = {
+            'intent': None,
+            'confidence': None,
+            'entities': all_entities,
+            'location': all_entities['lokasi'],
+            'processed': processed[i],
+            'analysis': analyses[i],
+            'stage': 'rules',
+            # (from_intent, to_intent) when the keyword boost decided, counted per turn by _merge_intents()
+            'override': None
+        }
+        decided = rule_intent(analyses[i], all_entities)
+        if decided is not None:
+            # Still a keyword override, but the classifier's answer is never computed
+            result['override'] = (UNSCORED_INTENT, decided[0])
+        elif INTENT_STATE_RULES and states is not None:
+            decided = state_rule_intent(states[i], analyses[i], result)
+            result['stage'] = 'state'
+        if decided is None:
+            result['stage'] = 'model'
+            pending.append(i)
+        else:
+            result['intent'], result['confidence'] = decided
+        results.append(result)
+
+    # One predict_proba call per class subset (all classes unless state scoring is on)
+    groups = {}
+    for i in pending:
+        subset = None
+        if res.state_scorers is not None and states is not None and states[i] in STATE_INDEX:
+            subset = res.state_scorers[STATE_INDEX[states[i]]]
+        groups.setdefault(subset, []).append(i)
+    for subset, indices in groups.items():
+        classes = (scorer if subset is None else subset).classes
+        jll = np.empty((len(indices), len(classes)))
+        for row, i in enumerate(indices):
+            with metrics.time('vectorizer.transform'):
+                columns, values = scorer.transform(processed[i], copy=False)
+            # The values are this thread's transform() buffer: score the row before the next one
+            with metrics.time('model.joint_log_likelihood'):
+                scorer.joint_log_likelihood(columns, values, subset, out=jll[row])
+        with metrics.time('model.predict_proba'):
+            proba = scorer.predict_proba_jll(jll)
+        # argmax of predict_proba is the same class model.predict would return
+        best = proba.argmax(axis=1)
+        for row, i in enumerate(indices):
+            model_pred = str(classes[best[row]])
+            with metrics.time('keyword_boost'):
+                pred, confidence = apply_keyword_boost(analyses[i], model_pred, float(proba[row, best[row]]),
+                                                       results[i]['entities'])
+            if pred != model_pred:
+                results[i]['override'] = (model_pred, pred)
+            results[i]['intent'], results[i]['confidence'] = pred, confidence
+    return results
+
+# Cached results are shared; callers get their own entity dicts
+def _copy_result(result):
+    entities = dict(result['entities'], symptoms=list(result['entities']['symptoms']))
+    return dict(result, entities=entities)
+
+# Cache lookups for a batch: cache keys, cached results (None on a miss) and the unique missing keys.
+# With states, results can depend on the state (state rules or scoring), so it is part of the key
+def _lookup_intents(texts, states=None):
+    keys = [normalize_text(text) for text in texts]
+    if states is not None:
+        keys = list(zip(states, keys))
+    results = [intent_cache.get(key) for key in keys]
+    missing = list(dict.fromkeys(key for key, result in zip(keys, results) if result is None))
+    return keys, results, missing
+
+def _merge_intents(keys, results, missing, computed, generation):
+    computed = dict(zip(missing, computed))
+    for key, result in computed.items():
+        intent_cache.put(key, result, generation)
+    results = [result if result is not None else computed[key] for key, result in zip(keys, results)]
+    # Counted here, in this process, once per message: cache hits and process-worker results included
+    for result in results:
+        metrics.inc(metrics.intent_stages, result['stage'])
+        if result['override'] is not None:
+            metrics.inc(metrics.keyword_overrides, *result['override'])
+    return [_copy_result(result) for result in results]
+
+def _split_missing(missing, states):
+    """_predict_uncached() arguments for the missing cache keys"""
+    if states is None:
+        return missing, None
+    states, keys = zip(*missing)
+    return list(keys), list(states)
+
+# Predict intents for many messages at once (memoized, one predict_proba call for the misses).
+# `states` (the dialog state each message answers) enables the state rules / state scoring
+def predict_intents(texts, states=None):
+    if not texts:
+        return []
+
+    keys, results, missing = _lookup_intents(texts, states)
+    generation = intent_cache.generation
+    computed = _predict_uncached(*_split_missing(missing, states)) if missing else []
+    return _merge_intents(keys, results, missing, computed, generation)
+
+# Same as predict_intents(), but cache misses are classified on the inference executor
+async def predict_intents_async(texts, states=None):
+    if not texts:
+        return []
+
+    keys, results, missing = _lookup_intents(texts, states)
+    generation = intent_cache.generation
+    computed = await inference.run(_predict_uncached, *_split_missing(missing, states)) if missing else []
+    return _merge_intents(keys, results, missing, computed, generation)
 
-    # Create or get session
-    if not session_id or session_id not in sessions:
+# Predict intent with keyword boost
+def predict_intent(text, state=None):
+    return predict_intents([text], [state] if state is not None else None)[0]
+
+def intent_states(dsm):
+    """states argument for predicting the next answer of a session (None unless state rules/scoring are on)"""
+    return [dsm.state] if INTENT_STATE_RULES or INTENT_STATE_SCORING else None
+
+def handle_chat(user_message, session_id, result=None, dsm=None):
+    """Run one dialog turn on `dsm`, the session the caller loaded for `session_id`
+    (None starts a new one); `result` may be a precomputed predict_intent() output.
+    Returns (response, dsm): the caller saves dsm under response['session_id']"""
+    if dsm is None:
         session_id = str(uuid.uuid4())
-        sessions[session_id] = DialogStateManager()
-
-    dsm = sessions[session_id]
-
+        dsm = DialogStateManager()
+
+    response = {'session_id': session_id}
+    response.update(run_turn(dsm, user_message, result, session_id))
+    return response, dsm
+
+
+def run_turn(dsm, user_message, result=None, session_id=None):
+    """One dialog turn; also queued on the conversation log when it is enabled"""
+    state = dsm.state
+    # Predict intent (the greeting turn doesn't need it)
+    if result is None and state != 'greeting':
+        result = predict_intent(user_message, state if INTENT_STATE_RULES or INTENT_STATE_SCORING else None)
+    response = _dialog_turn(dsm, user_message, result)
+    if conversation_log is not None:
+        # Serialized later on the log thread; the response and its entities are not mutated after the turn
+        conversation_log.log({
+            'ts': time.time(),
+            'session_id': session_id,
+            'state': state,
+            'message': user_message,
+            'processed': result['processed'] if result is not None else None,
+            'intent': response.get('intent'),
+            'confidence': response.get('confidence'),
+            'entities': response.get('entities'),
+            'is_valid': response.get('is_valid'),
+            'next_state': dsm.state,
+        })
+    return response
+
+
+def _dialog_turn(dsm, user_message, result):
     # Handle initial greeting state
     if dsm.state == 'greeting':
         response = {
-            'session_id': session_id,
             'bot_message': dsm.get_current_question(),
             'state': dsm.state
         }
         dsm.state = 'nama'  # Move to nama collection, not keluhan_utama
         return response
 
-    # Predict intent
-    result = predict_intent(user_message)
     predicted_intent = result['intent']
+    metrics.inc(metrics.intents, predicted_intent)
+
+    # Keyword classes of the message, found once during prediction
+    analysis = result['analysis']
 
     # Handle greetings and politeness naturally (don't break flow)
-    greeting_keywords = ['halo', 'hai', 'assalamualaikum', 'selamat', 'permisi']
-    is_greeting = any(kw in user_message.lower() for kw in greeting_keywords)
+    is_greeting = 'greeting' in analysis.flags
 
     if is_greeting or predicted_intent in ['sapaan', 'ucapan_terima_kasih']:
         if is_greeting or predicted_intent == 'sapaan':
-            if 'assalamualaikum' in user_message.lower():
+            if 'salam' in analysis.flags:
                 greeting = 'Waalaikumsalam. '
             else:
                 greeting = 'Halo! '
@@ -667,7 +974,6 @@ async def chat(request: ChatRequest):
             bot_message = 'Sama-sama! Mari kita lanjutkan. ' + dsm.get_current_question()
 
         return {
-            'session_id': session_id,
             'intent': predicted_intent,
             'confidence': result['confidence'],
             'entities': result['entities'],
@@ -677,103 +983,53 @@ async def chat(request: ChatRequest):
         }
 
     # Handle "tidak tahu" / "tidak jelas" responses - accept and move on
-    uncertainty_keywords = ['tidak tahu', 'tidak tau', 'kurang tahu', 'tidak jelas', 'tidak yakin', 'kurang jelas']
-    is_uncertain = any(kw in user_message.lower() for kw in uncertainty_keywords)
+    is_uncertain = 'uncertainty' in analysis.flags
 
     if is_uncertain or predicted_intent == 'tidak_jelas':
         # User doesn't know - accept it and move on
         is_valid = True
-        state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
+        with metrics.time('dsm.update'):
+            state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
     else:
-        # Special handling for keluhan_utama (user might mention symptoms + duration/location together)
-        if dsm.state == 'keluhan_utama':
-            # Check if message contains symptom keywords
-            symptom_keywords = ['demam', 'sakit', 'pusing', 'mual', 'batuk', 'flu', 'muntah', 'diare', 'gatal']
-            has_symptom = any(kw in user_message.lower() for kw in symptom_keywords)
-            if has_symptom:
-                # Accept it regardless of predicted intent
-                is_valid = True
-                predicted_intent = 'keluhan_utama'
-            else:
-                is_valid = dsm.is_intent_valid(predicted_intent)
-
-        # Special handling for gejala state (check for symptom keywords)
-        elif dsm.state == 'gejala':
-            # Check if message contains symptom keywords
-            symptom_keywords = ['sakit', 'nyeri', 'pusing', 'mual', 'muntah', 'diare', 'batuk',
-                               'pilek', 'demam', 'lemas', 'panas', 'dingin', 'menggigil',
-                               'sesak', 'gatal', 'bengkak', 'kram', 'kaku', 'berdarah']
-            has_symptom = any(kw in user_message.lower() for kw in symptom_keywords)
-            if has_symptom:
-                # Accept it regardless of predicted intent
-                is_valid = True
-                predicted_intent = 'jawab_gejala_penyerta'
-            else:
-                is_valid = dsm.is_intent_valid(predicted_intent)
-
-        # Special handling for severity state (often misclassified)
-        elif dsm.state == 'severity':
-            severity_keywords = ['ringan', 'sedang', 'berat', 'parah', 'sangat']
-            has_severity = any(kw in user_message.lower() for kw in severity_keywords)
-            if has_severity:
-                # Force validation to pass if severity keyword detected
-                is_valid = True
-                predicted_intent = 'jawab_severity'
-            else:
-                is_valid = dsm.is_intent_valid(predicted_intent)
-
-        # Special handling for duration (improve detection)
-        elif dsm.state == 'durasi':
-            # Check for duration patterns
-            duration_pattern = r'\d+\s*(hari|minggu|bulan|tahun|jam|menit)'
-            has_duration = re.search(duration_pattern, user_message.lower())
-            if has_duration:
-                is_valid = True
-                predicted_intent = 'jawab_durasi'
-            else:
-                is_valid = dsm.is_intent_valid(predicted_intent)
-
-        # Special handling for location
-        elif dsm.state == 'lokasi':
-            # Check if any body part mentioned
-            if result['location']:
-                is_valid = True
-                predicted_intent = 'jawab_lokasi'
-            else:
-                is_valid = dsm.is_intent_valid(predicted_intent)
-
-        else:
-            # Check if intent matches expected intent for current state
-            is_valid = dsm.is_intent_valid(predicted_intent)
+        # Per-state accept_if rules from the flow (keyword/pattern/location hits the classifier often
+        # misses, e.g. symptoms + duration mentioned together in keluhan_utama); otherwise the intent must
+        # be one the state expects
+        is_valid, predicted_intent = dsm.validate(predicted_intent, analysis, result)
 
         # Update dialog state
-        state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
+        with metrics.time('dsm.update'):
+            state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
 
         # Smart prefill: auto-fill future states if user already provided info
         if state_changed:
-            dsm.smart_prefill(user_message, result['entities'])
-            dsm.skip_filled_states()
+            with metrics.time('smart_prefill'):
+                dsm.smart_prefill(user_message, result['entities'])
+                dsm.skip_filled_states()
 
         # Limit retries to 1 time only (don't be too pushy)
-        if not state_changed and dsm.retry_count.get(dsm.state, 0) >= 2:
-            # After 2 retries, force accept and move on
+        if not state_changed and dsm.get_retry_count() >= FLOW.max_retries:
+            # After max_retries retries, force accept and move on
             is_valid = True
-            state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
+            with metrics.time('dsm.update'):
+                state_changed = dsm.update(predicted_intent, user_message, result['processed'], result['entities'], is_valid)
             if state_changed:
-                dsm.smart_prefill(user_message, result['entities'])
-                dsm.skip_filled_states()
+                with metrics.time('smart_prefill'):
+                    dsm.smart_prefill(user_message, result['entities'])
+                    dsm.skip_filled_states()
 
     # Generate response
     if not state_changed:
         # Intent tidak sesuai, tanya ulang dengan variasi
+        metrics.inc(metrics.retries, dsm.state)
         bot_message = dsm.get_current_question(retry=True)
     elif dsm.state == 'summary':
-        bot_message = dsm.get_current_question() + "\n\n" + dsm.get_summary()
+        with metrics.time('get_summary'):
+            summary = dsm.get_summary()
+        bot_message = dsm.get_current_question() + "\n\n" + summary
     else:
         bot_message = dsm.get_current_question()
 
     return {
-        'session_id': session_id,
         'intent': predicted_intent,
         'confidence': result['confidence'],
         'entities': result['entities'],
@@ -784,16 +1040,260 @@ async def chat(request: ChatRequest):
     }
 
 
+# Executor for the classifier: inline (on the event loop), thread or process pool
+inference = InferenceExecutor(
+    mode=os.environ.get("INFERENCE_EXECUTOR", "inline"),
+    workers=int(os.environ.get("INFERENCE_WORKERS", "0")) or None,
+    queue_size=int(os.environ.get("INFERENCE_QUEUE_SIZE", "64")),
+    module=__name__,
+)
+
+# Hot reload: POST /admin/reload (enabled by ADMIN_TOKEN) or polling the artifact files
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "0"))
+_reload_lock = threading.Lock()
+reload_stats = {'reloads': 0, 'failures': 0, 'last_seconds': None, 'last_error': None}
+
+def reload_resources():
+    """Load, validate and swap in new artifacts (blocking, so run it off the event loop)"""
+    with _reload_lock:
+        start = time.perf_counter()
+        previous = resources.bundle.version
+        try:
+            res = load_resources(invalidate=False)
+        except Exception as exc:
+            reload_stats['failures'] += 1
+            reload_stats['last_error'] = str(exc)
+            raise
+        # Process workers hold their own copy of the models: the new pool is started and swapped in
+        # before the caches are cleared, so a result from an old worker (running or still queued on
+        # the old pool) was computed under the previous generation and is never stored
+        inference.restart()
+        clear_caches()
+        seconds = time.perf_counter() - start
+        reload_stats['reloads'] += 1
+        reload_stats['last_seconds'] = seconds
+        return {'previous_version': previous, 'model_version': res.bundle.version, 'seconds': seconds}
+
+def artifact_signature():
+    signature = []
+    for path in [MODEL_BUNDLE_PATH] + [os.path.join(BASE_DIR, source) for source in SOURCES.values()]:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return signature
+
+async def watch_artifacts():
+    signature = artifact_signature()
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        current = artifact_signature()
+        if current == signature:
+            continue
+        # Taken before the reload so a file replaced while it runs is picked up on the next poll
+        # (a bundle rebuilt by the reload itself costs one extra, no-op reload)
+        signature = current
+        try:
+            result = await asyncio.to_thread(reload_resources)
+            print(f"Models reloaded: {result['previous_version']} -> {result['model_version']}")
+        except Exception as exc:
+            print(f"Model reload failed, keeping the current models: {exc}")
+
+OVERLOADED_RESPONSE = {'status_code': 503, 'detail': 'Inference queue is full, retry shortly',
+                       'headers': {'Retry-After': '1'}}
+
+
+@app.post('/chat')
+async def chat(request: ChatRequest):
+    result = None
+    # New sessions only get the greeting, so only existing ones need the classifier
+    dsm = await store_io(sessions.get, request.session_id) if request.session_id else None
+    if dsm is not None:
+        try:
+            result = (await predict_intents_async([request.message], intent_states(dsm)))[0]
+        except ExecutorOverloaded:
+            raise HTTPException(**OVERLOADED_RESPONSE)
+    response, dsm = handle_chat(request.message, request.session_id, result, dsm=dsm)
+    # Persist after every turn (serialized stores don't see in-place changes)
+    await store_io(sessions.save, response['session_id'], dsm)
+    return response
+
+
+@app.post('/chat/batch')
+async def chat_batch(request: BatchChatRequest):
+    if len(request.messages) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f'Maximum {MAX_BATCH_SIZE} messages per batch')
+
+    # Only turns on existing sessions need the classifier (new sessions get the greeting). No state rules/scoring:
+    # a batch may hold several turns of one session, so its state at prediction time isn't the answered one
+    # Each session is loaded once (one store round trip for the batch); later turns of the same session
+    # reuse (and advance) that object
+    loaded = await store_io(sessions.get_many,
+                            list(dict.fromkeys(item.session_id for item in request.messages if item.session_id)))
+    pending = [i for i, item in enumerate(request.messages) if loaded.get(item.session_id) is not None]
+    try:
+        predictions = await predict_intents_async([request.messages[i].message for i in pending])
+    except ExecutorOverloaded:
+        raise HTTPException(**OVERLOADED_RESPONSE)
+    results = dict(zip(pending, predictions))
+
+    responses = []
+    touched = {}
+    for i, item in enumerate(request.messages):
+        response, dsm = handle_chat(item.message, item.session_id, results.get(i), dsm=loaded.get(item.session_id))
+        responses.append(response)
+        touched[response['session_id']] = dsm
+    # Every session the batch advanced, saved in one round trip
+    await store_io(sessions.save_many, touched)
+    return {'responses': responses}
+
+
+# Open /ws/chat connections (reported by /metrics)
+ws_connections = 0
+_MISSING = object()
+
+
+def response_delta(previous, response):
+    """Fields of `response` that differ from `previous` (entities per key); dropped fields become None"""
+    delta = {key: value for key, value in response.items()
+             if key == 'bot_message' or previous.get(key, _MISSING) != value}
+    if 'entities' in delta and previous.get('entities') and response['entities']:
+        delta['entities'] = {key: value for key, value in response['entities'].items()
+                             if previous['entities'].get(key, _MISSING) != value}
+    for key in previous.keys() - response.keys():
+        delta[key] = None
+    return delta
+
+
+@app.websocket('/ws/chat')
+async def chat_socket(websocket: WebSocket, session_id: str | None = None):
+    """Chat over one connection bound to one session.
+
+    The first frame is the greeting (or, when resuming `session_id`, the
+    current question) with the session id. Each client frame is
+    {"message": ...}; the reply only carries what changed since the
+    previous reply, so the client merges it into its last state.
+    """
+    global ws_connections
+    await websocket.accept()
+    ws_connections += 1
+    try:
+        dsm = await store_io(sessions.get, session_id) if session_id else None
+        if dsm is None:
+            session_id = str(uuid.uuid4())
+            dsm = DialogStateManager()
+            last = {'session_id': session_id, **run_turn(dsm, '', session_id=session_id)}
+            await store_io(sessions.save, session_id, dsm)
+        else:
+            last = {'session_id': session_id, 'bot_message': dsm.get_current_question(), 'state': dsm.state}
+        await websocket.send_json(last)
+
+        while True:
+            frame = await websocket.receive()
+            if frame['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(frame.get('code', 1000))
+            # Same validation as POST /chat; a bad frame gets an error frame, the connection stays open
+            try:
+                text = frame['text'] if frame.get('text') is not None else frame.get('bytes') or b''
+                message = ChatRequest.model_validate(json.loads(text)).message
+            except ValidationError as exc:
+                await websocket.send_json({'error': exc.errors(include_url=False, include_context=False),
+                                           'status': 422})
+                continue
+            except ValueError as exc:
+                await websocket.send_json({'error': f'Invalid JSON frame: {exc}', 'status': 422})
+                continue
+            try:
+                result = (await predict_intents_async([message], intent_states(dsm)))[0]
+            except ExecutorOverloaded:
+                await websocket.send_json({'error': OVERLOADED_RESPONSE['detail'], 'status': 503})
+                continue
+            response = {'session_id': session_id, **run_turn(dsm, message, result, session_id)}
+            # Still saved every turn: serialized stores don't see in-place changes, and POST /chat can resume
+            await store_io(sessions.save, session_id, dsm)
+            await websocket.send_json(response_delta(last, response))
+            last = response
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ws_connections -= 1
+
+
 @app.post('/reset')
 async def reset(request: ResetRequest):
     session_id = request.session_id
 
-    if session_id and session_id in sessions:
-        del sessions[session_id]
+    if session_id:
+        await store_io(sessions.delete, session_id)
 
     return {'message': 'Session reset successful'}
 
 
+@app.get('/metrics', response_class=PlainTextResponse)
+async def prometheus_metrics():
+    extra = []
+    for name, cache in (('preprocess', preprocess_cache), ('intent', intent_cache)):
+        stats = cache.stats()
+        extra += [
+            (f'pustu_{name}_cache_hits_total', 'counter', f'{name} memo cache hits', stats['hits']),
+            (f'pustu_{name}_cache_misses_total', 'counter', f'{name} memo cache misses', stats['misses']),
+            (f'pustu_{name}_cache_evictions_total', 'counter', f'{name} memo cache evictions', stats['evictions']),
+            (f'pustu_{name}_cache_size', 'gauge', f'{name} memo cache entries', stats['size']),
+        ]
+    executor = inference.stats()
+    extra += [
+        ('pustu_inference_pending', 'gauge', 'Inference calls running or queued', executor['pending']),
+        ('pustu_inference_rejected_total', 'counter', 'Inference calls rejected with 503', executor['rejected']),
+        ('pustu_ws_connections', 'gauge', 'Open /ws/chat connections', ws_connections),
+    ]
+    if conversation_log is not None:
+        log_stats = conversation_log.stats()
+        extra += [
+            ('pustu_conversation_log_queued', 'gauge', 'Turn records waiting to be written', log_stats['queued']),
+            ('pustu_conversation_log_written_total', 'counter', 'Turn records written', log_stats['written']),
+            ('pustu_conversation_log_dropped_total', 'counter', 'Turn records dropped (queue full)',
+             log_stats['dropped']),
+        ]
+    return PlainTextResponse(metrics.expose(extra), media_type='text/plain; version=0.0.4')
+
+
+@app.get('/metrics/cache')
+async def cache_metrics():
+    return {
+        'preprocess': preprocess_cache.stats(),
+        'intent': intent_cache.stats()
+    }
+
+
+@app.get('/metrics/executor')
+async def executor_metrics():
+    return inference.stats()
+
+
+@app.get('/metrics/conversation-log')
+async def conversation_log_metrics():
+    return conversation_log.stats() if conversation_log is not None else {'enabled': False}
+
+
+@app.post('/admin/reload')
+async def admin_reload(x_admin_token: str | None = Header(default=None)):
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or '', ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail='Forbidden')
+    try:
+        return await asyncio.to_thread(reload_resources)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f'Reload failed, current models kept: {exc}')
+
+
+@app.get('/admin/reload')
+async def reload_status(x_admin_token: str | None = Header(default=None)):
+    if not ADMIN_TOKEN or not secrets.compare_digest(x_admin_token or '', ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail='Forbidden')
+    return dict(reload_stats, model_version=resources.bundle.version)
+
+
 @app.get('/health')
 async def health():
-    return {'status': 'ok', 'model': 'loaded'}
+    return {'status': 'ok', 'model': 'loaded', 'model_version': resources.bundle.version}
@@ -0,0 +1,88 @@
+"""Benchmark: bulk entity extraction on the processed dataset.
+
+Runs BulkEntityExtractor (bulk_extraction.py) over the Raw_Text column of
+the processed dataset, single process and on a worker pool, and compares
+it with calling EntityExtractor.extract_all() row by row. Every row of the
+bulk table must equal the row-wise result; mismatches are counted and
+shown. A few edge-case rows (e.g. an age too large for int64) are appended
+to the dataset.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_bulk_extraction.py [--repeat 3] [--workers 2 4] [--rows N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+from bulk_extraction import ENTITY_COLUMNS, BulkEntityExtractor  # noqa: E402
+from load_test_conversations import PROCESSED_CSV  # noqa: E402
+
+
+# Rows the dataset does not cover, compared like the others
+EDGE_TEXTS = [
+    'umur saya 123456789012345678901234567890 tahun',
+    'sudah 99999999999999999999 thn, demam',
+]
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def mismatches(table, expected):
+    bad = []
+    for position, (row, wanted) in enumerate(zip(table.itertuples(index=False), expected)):
+        got = {name: getattr(row, name) for name in ENTITY_COLUMNS}
+        got['umur'] = None if pd.isna(got['umur']) else int(got['umur'])
+        if got != wanted:
+            bad.append((position, got, wanted))
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, nargs='*', default=[2, 4])
+    parser.add_argument('--rows', type=int, default=None)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(PROCESSED_CSV, usecols=['Raw_Text'])['Raw_Text'].fillna('').astype(str)
+    if args.rows:
+        texts = texts.iloc[:args.rows]
+    texts = pd.concat([texts, pd.Series(EDGE_TEXTS)], ignore_index=True)
+    extractor = app.resources.extractor
+    bulk = BulkEntityExtractor(app.resources.symptoms_dict, app.resources.severity_dict, app.resources.location_dict)
+
+    rowwise_time, expected = best_of(args.repeat, lambda: [extractor.extract_all(text) for text in texts])
+    runs = [('bulk', 1)] + [(f'bulk x{workers}', workers) for workers in args.workers]
+
+    print(f"{len(texts)} rows from {os.path.basename(PROCESSED_CSV)}, best of {args.repeat}, CPUs: {os.cpu_count()}")
+    print(f"{'row-wise extract_all':22s} {rowwise_time * 1000:8.1f} ms  {len(texts) / rowwise_time:9.0f} rows/s")
+    failed = False
+    for name, workers in runs:
+        # Small chunks so the pool actually splits the dataset
+        chunksize = -(-len(texts) // workers) if workers > 1 else len(texts)
+        elapsed, table = best_of(args.repeat, lambda: bulk.extract(texts, workers, chunksize))
+        bad = mismatches(table, expected)
+        failed |= bool(bad)
+        print(f"{name:22s} {elapsed * 1000:8.1f} ms  {len(texts) / elapsed:9.0f} rows/s  "
+              f"x{rowwise_time / elapsed:5.2f}  mismatches {len(bad)}")
+        for position, got, wanted in bad[:3]:
+            print(f"  row {position}: {texts.iloc[position]!r}\n    bulk     {got}\n    row-wise {wanted}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Benchmark: /chat latency with the write-behind conversation log on and off.
+
+Spawns uvicorn with CONVERSATION_LOG_DIR unset (off), JSONL segments and
+compressed columnar (npz) segments, and replays the same synthetic
+conversations (load_test_conversations.py) over keep-alive POST /chat at
+full speed (the highest message rate the server sustains) or paced at
+--rate messages/s. Modes run
+interleaved for --rounds rounds; the median p50/p99 per mode is reported.
+After each server stops (its shutdown flushes the log), the segments are
+read back and must hold one record per turn, greetings included.
+
+Also times ConversationLogger.log() itself, the only part that runs on the
+request path, and checks that with policy='block' and a full queue it
+returns without waiting when called from the event loop.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_conversation_log.py [--conversations 200] [--sessions 16] [--rounds 3] [--rate 500]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from bench_ws_chat import post_transport  # noqa: E402
+from conversation_log import ConversationLogger, read_segment  # noqa: E402
+from load_test_conversations import ConversationSource, PROCESSED_CSV, latency_summary, run_sessions, start_server  # noqa: E402
+
+MODES = ('off', 'jsonl', 'npz')
+RECORD = {'ts': 0.0, 'session_id': '0b7e0a52-8a0c-4f4e-9d55-3f1d1c1e2a77', 'state': 'keluhan_utama',
+          'message': 'saya demam sejak 3 hari', 'processed': 'demam sejak 3 hari', 'intent': 'keluhan_utama',
+          'confidence': 0.91, 'entities': {'durasi': '3 hari', 'symptoms': ['demam']}, 'is_valid': True,
+          'next_state': 'gejala'}
+
+
+def timed(connect, latencies, interval=0):
+    """connect() whose send() records its own latency and, with an interval, sends at most one
+    message per `interval` seconds per client (the wait is not part of the latency)"""
+    def timed_connect():
+        send, close = connect()
+        next_at = time.perf_counter()
+
+        def timed_send(message, session_id):
+            nonlocal next_at
+            if interval:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_at = max(next_at, time.perf_counter() - interval) + interval
+            start = time.perf_counter()
+            response = send(message, session_id)
+            latencies.append(time.perf_counter() - start)
+            return response
+
+        return timed_send, close
+
+    return timed_connect
+
+
+def run_mode(args, source, mode, directory):
+    os.environ.pop('CONVERSATION_LOG_DIR', None)
+    if mode != 'off':
+        os.environ.update(CONVERSATION_LOG_DIR=directory, CONVERSATION_LOG_FORMAT=mode)
+    proc, port = start_server(args)
+    try:
+        latencies = []
+        connect = timed(post_transport('127.0.0.1', port, True, []), latencies,
+                        args.sessions / args.rate if args.rate else 0)
+        results, elapsed = run_sessions(args, source, connect)
+    finally:
+        proc.terminate()
+        proc.wait()
+    written = None
+    if mode != 'off':
+        written = sum(len(read_segment(os.path.join(directory, name))) for name in os.listdir(directory)
+                      if name.endswith(('.jsonl', '.npz')))
+    return results, elapsed, latencies, written
+
+
+def time_log_call(n=100000):
+    with tempfile.TemporaryDirectory() as directory:
+        # Not started: measures only the enqueue (queue large enough to take every call)
+        logger = ConversationLogger(directory, queue_size=n)
+        start = time.perf_counter()
+        for _ in range(n):
+            logger.log(dict(RECORD, ts=time.time()))
+        return (time.perf_counter() - start) / n
+
+
+def time_full_queue_in_loop(n=200):
+    """Mean log() time on the event loop with policy='block' and a full queue, and the records dropped"""
+    with tempfile.TemporaryDirectory() as directory:
+        # Not started: the queue stays full, so every handed-off record times out and is dropped
+        logger = ConversationLogger(directory, queue_size=1, policy='block', block_handoffs=n)
+        logger.log(dict(RECORD))
+
+        async def log_many():
+            start = time.perf_counter()
+            for _ in range(n):
+                logger.log(dict(RECORD, ts=time.time()))
+            elapsed = time.perf_counter() - start
+            while logger.stats()['waiting']:
+                await asyncio.sleep(logger.block_timeout)
+            return elapsed / n
+
+        per_call = asyncio.run(log_many())
+        return per_call, logger.block_timeout, logger.dropped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--rate', type=float, default=0, help='total messages/s (default: as fast as possible)')
+    args = parser.parse_args()
+    # Fields run_sessions()/start_server() expect
+    args.seed, args.max_turns, args.keep_cache, args.session_store = 0, 60, False, 'memory'
+
+    source = ConversationSource(PROCESSED_CSV)
+    runs = {mode: [] for mode in MODES}
+    failed = False
+    for _ in range(args.rounds):
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as directory:
+                results, elapsed, latencies, written = run_mode(args, source, mode, directory)
+            # Every message, greetings included
+            turns = len(latencies)
+            latency = latency_summary(latencies)
+            runs[mode].append((turns / elapsed, latency['p50'], latency['p99']))
+            if written is not None and written != turns:
+                failed = True
+                print(f"{mode}: {written} records written for {turns} turns")
+
+    print(f"{args.conversations} conversations, {args.sessions} concurrent, {args.rounds} rounds, "
+          f"rate: {args.rate or 'max'}, CPUs: {os.cpu_count()}")
+    for mode in MODES:
+        rates, p50s, p99s = zip(*runs[mode])
+        print(f"{mode:6s} {statistics.median(rates):7.0f} msg/s  p50 {statistics.median(p50s):6.2f} ms  "
+              f"p99 {statistics.median(p99s):6.2f} ms  (p99 per round: {', '.join(f'{p:.2f}' for p in p99s)})")
+    print(f"ConversationLogger.log(): {time_log_call() * 1e6:.2f} us/call")
+    per_call, block_timeout, dropped = time_full_queue_in_loop()
+    print(f"log() on the event loop, full queue, policy=block: {per_call * 1e6:.2f} us/call "
+          f"(block_timeout {block_timeout * 1000:.0f} ms), {dropped} dropped")
+    failed |= per_call >= block_timeout
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Benchmark: dialog control cost per turn, without the classifier.
+
+Predicts every message once up front, then replays the conversations
+through run_turn() with those predictions, so the timing covers only the
+flow logic: validation, state update, smart prefill, skipping filled states
+and building the reply. Also times the flow primitives on their own.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_dialog_flow.py [n_conversations]
+"""
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+from load_test_conversations import PROCESSED_CSV, ConversationSource, Patient  # noqa: E402
+
+
+def record_conversations(source, n):
+    """(message, prediction) turns per conversation, answering the states a live run reaches"""
+    conversations = []
+    for seed in range(n):
+        patient = Patient(source, random.Random(seed), 0.05)
+        dsm = app.DialogStateManager()
+        app.run_turn(dsm, '')
+        turns = []
+        while dsm.state != 'summary' and len(turns) < 60:
+            message = patient.answer(dsm.state)
+            result = app.predict_intent(message)
+            turns.append((message, result))
+            app.run_turn(dsm, message, result)
+        conversations.append(turns)
+    return conversations
+
+
+def replay(conversations):
+    turns = 0
+    start = time.perf_counter()
+    for messages in conversations:
+        dsm = app.DialogStateManager()
+        app.run_turn(dsm, '')
+        for message, result in messages:
+            app.run_turn(dsm, message, app._copy_result(result))
+        turns += len(messages)
+    return (time.perf_counter() - start) / turns
+
+
+def time_call(fn, n=200000):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app.metrics.enabled = False
+    conversations = record_conversations(ConversationSource(PROCESSED_CSV), n)
+    per_turn = min(replay(conversations) for _ in range(5))
+
+    dsm = app.DialogStateManager()
+    dsm.state = 'keluhan_utama'
+    entities = {'durasi': '3 hari', 'lokasi': 'kepala', 'severity': 'sedang', 'symptoms': ['demam']}
+
+    def prefill_and_skip():
+        dsm.data.clear()
+        dsm._filled = 0
+        dsm.state = 'durasi'
+        dsm.smart_prefill('', entities)
+        dsm.skip_filled_states()
+
+    print(f"Turns replayed        : {sum(len(c) for c in conversations)} ({n} conversations)")
+    print(f"run_turn (no model)   : {per_turn * 1e6:.2f} us/turn")
+    print(f"get_next_state        : {time_call(dsm.get_next_state) * 1e9:.0f} ns")
+    print(f"is_intent_valid       : {time_call(lambda: dsm.is_intent_valid('jawab_durasi')) * 1e9:.0f} ns")
+    print(f"prefill + skip (3 set): {time_call(prefill_and_skip, 100000) * 1e9:.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
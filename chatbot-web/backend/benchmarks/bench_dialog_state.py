@@ -0,0 +1,102 @@
+"""Benchmark: memory and serialization cost of DialogStateManager sessions.
+
+Compares the slotted DialogStateManager (shared dialog definition) with the
+previous layout, where every instance rebuilt its own flow list and
+questions/retry_messages/expected_intents dicts, for 10k concurrent sessions.
+Also reports the size and speed of to_bytes()/from_bytes(), and checks that
+truncated payloads read as expired sessions.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_dialog_state.py [n_sessions]
+"""
+import copy
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app import (  # noqa: E402
+    DIALOG_FLOW, EXPECTED_INTENTS, QUESTIONS, RETRY_MESSAGES, DialogStateManager, extractor
+)
+
+SAMPLE_TURNS = [
+    ('nama', 'Nama saya Budi Santoso'),
+    ('nama_panggilan', 'panggil budi'),
+    ('umur', '28 tahun'),
+    ('jenis_kelamin', 'laki-laki'),
+    ('keluhan_utama', 'saya demam sudah 3 hari dan kepala pusing'),
+    ('gejala', 'mual dan lemas'),
+]
+
+
+class LegacySession:
+    """Per-instance layout of the previous DialogStateManager (memory reference only)"""
+
+    def __init__(self):
+        self.state = 'greeting'
+        self.data = {}
+        self.retry_count = {}
+        self.flow = list(DIALOG_FLOW)
+        self.questions = dict(QUESTIONS)
+        self.retry_messages = {k: list(v) for k, v in RETRY_MESSAGES.items()}
+        self.expected_intents = {k: list(v) for k, v in EXPECTED_INTENTS.items()}
+
+
+def fill(session, turns):
+    for state, message in turns:
+        session.data[state] = {
+            'message': message,
+            'processed': message.lower(),
+            'intent': 'keluhan_utama',
+            'entities': extractor.extract_all(message),
+        }
+        session.state = state
+    return session
+
+
+def measure(factory, n, turns):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sessions = [fill(factory(), copy.deepcopy(turns)) for _ in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return used, sessions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"Sessions: {n}")
+    for label, turns in (('fresh', []), ('mid-conversation', SAMPLE_TURNS)):
+        legacy_used, _ = measure(LegacySession, n, turns)
+        slotted_used, sessions = measure(DialogStateManager, n, turns)
+        print(f"{label:<17} before: {legacy_used / 1024 / 1024:6.1f} MiB ({legacy_used / n:5.0f} B/session)"
+              f"   after: {slotted_used / 1024 / 1024:6.1f} MiB ({slotted_used / n:5.0f} B/session)")
+
+    dsm = sessions[0]
+    legacy_payload = json.dumps({'state': dsm.state, 'data': dsm.data, 'retry_count': {}},
+                                separators=(',', ':')).encode('utf-8')
+    payload = dsm.to_bytes()
+    assert DialogStateManager.from_bytes(payload).data == dsm.data
+    # Truncated or corrupt payloads read as an expired session, not an error
+    for cut in (1, len(payload) // 2, len(payload) - 1):
+        assert DialogStateManager.from_bytes(payload[:cut]) is None
+    assert DialogStateManager.from_bytes(payload[:-2] + b'\xff]') is None
+
+    rounds = 20000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        DialogStateManager.from_bytes(dsm.to_bytes())
+    roundtrip = (time.perf_counter() - start) / rounds
+
+    print(f"Serialized size   before: {len(legacy_payload)} B   after: {len(payload)} B")
+    print(f"to_bytes+from_bytes: {roundtrip * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
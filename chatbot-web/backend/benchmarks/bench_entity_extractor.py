@@ -0,0 +1,117 @@
+"""Benchmark: single-pass keyword automaton vs the original dictionary loops.
+
+Runs lokasi/severity/symptoms extraction over the Raw_Text column of the raw
+dataset with both implementations, checks that results are identical and
+reports the time per message.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_entity_extractor.py
+"""
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+
+
+def load_dictionaries():
+    dictionaries = []
+    for name in ('symptoms_dict.json', 'severity_keywords.json', 'location_keywords.json'):
+        with open(os.path.join(BASE_DIR, 'data/dictionaries', name), 'r', encoding='utf-8') as f:
+            dictionaries.append(json.load(f))
+    return dictionaries
+
+
+# Original nested-loop implementation (reference for correctness and speed)
+def legacy_lokasi(text, location_dict):
+    text_lower = text.lower()
+    for location, keywords in location_dict.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return location
+    return None
+
+
+def legacy_severity(text, severity_dict):
+    text_lower = text.lower()
+    for severity, info in severity_dict.items():
+        for keyword in info['keywords']:
+            if keyword in text_lower:
+                return severity
+    return None
+
+
+def legacy_symptoms(text, symptoms_dict):
+    text_lower = text.lower()
+    found_symptoms = []
+    for symptom, info in symptoms_dict.items():
+        if symptom in text_lower:
+            found_symptoms.append(symptom)
+        for synonym in info.get('synonyms', []):
+            if synonym in text_lower and symptom not in found_symptoms:
+                found_symptoms.append(symptom)
+    return found_symptoms
+
+
+def run_legacy(texts, symptoms_dict, severity_dict, location_dict):
+    return [
+        (legacy_lokasi(t, location_dict), legacy_severity(t, severity_dict), legacy_symptoms(t, symptoms_dict))
+        for t in texts
+    ]
+
+
+def run_matcher(texts, matcher):
+    results = []
+    for t in texts:
+        matches = matcher.find_all(t.lower())
+        results.append((
+            matcher.first_label(matches, 'lokasi'),
+            matcher.first_label(matches, 'severity'),
+            matcher.labels(matches, 'symptoms'),
+        ))
+    return results
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    symptoms_dict, severity_dict, location_dict = load_dictionaries()
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher.from_dictionaries(symptoms_dict, severity_dict, location_dict)
+    build_time = time.perf_counter() - start
+
+    legacy_time, legacy_results = timed(run_legacy, texts, symptoms_dict, severity_dict, location_dict)
+    matcher_time, matcher_results = timed(run_matcher, texts, matcher)
+
+    mismatches = sum(1 for a, b in zip(legacy_results, matcher_results) if a != b)
+
+    print(f"Messages        : {len(texts)}")
+    print(f"Keywords        : {len(matcher.patterns)}")
+    print(f"Automaton build : {build_time * 1000:.2f} ms")
+    print(f"Legacy loops    : {legacy_time:.3f} s ({legacy_time / len(texts) * 1e6:.1f} us/msg)")
+    print(f"Automaton       : {matcher_time:.3f} s ({matcher_time / len(texts) * 1e6:.1f} us/msg)")
+    print(f"Speedup         : {legacy_time / matcher_time:.2f}x")
+    print(f"Mismatches      : {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Benchmark: serving-side feature extraction and scoring allocations.
+
+Compares CompactNBScorer with the previous implementations, kept here:
+
+  previous   ReferenceScorer: analyze() built every unigram and bigram
+             string and looked it up in the term dict, the joint
+             log-likelihood added one v * row temporary per feature, and
+             logsumexp allocated each intermediate
+  list rows  ListRowScorer: n-gram tables and scratch buffers for scoring,
+             but transform() still built a values list and a normalized
+             copy of it
+  current    bigrams go through a two-level token dict, the tf-idf weights
+             are written into a per-thread buffer and normalized in place,
+             the feature rows are gathered into another per-thread buffer
+             and scaled/reduced in place
+
+Checks that all give identical rows and probabilities on the processed
+dataset, then reports per message time and, with tracemalloc, the peak
+memory allocated by transform() and while scoring one message.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_feature_extractor.py [n_messages]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle  # noqa: E402
+from nb_scorer import CompactNBScorer  # noqa: E402
+
+PROCESSED_CSV = os.path.join(BASE_DIR, 'data/processed/dataset_processed_20251202_195300.csv')
+
+
+class ReferenceScorer(CompactNBScorer):
+    """The scorer before the n-gram tables and scratch buffers"""
+
+    def transform(self, text, copy=True):
+        counts = {}
+        vocabulary = self.vocabulary
+        for feature in self.analyze(text):
+            idx = vocabulary.get(feature)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        columns = sorted(counts)
+        idf = self.idf
+        values = [float(counts[j]) * idf[j] for j in columns]
+        norm = 0.0
+        for v in values:
+            norm += v * v
+        if norm != 0.0:
+            norm = np.sqrt(norm)
+            values = [v / norm for v in values]
+        return columns, values
+
+    def predict_proba_rows(self, rows, subset=None):
+        table = self if subset is None else subset
+        jll = np.empty((len(rows), table.class_log_prior.shape[0]))
+        for i, (columns, values) in enumerate(rows):
+            row = np.zeros(table.class_log_prior.shape[0])
+            for j, v in zip(columns, values):
+                row += v * table._feature_log_prob_t[j]
+            jll[i] = row + table.class_log_prior
+        a_max = np.max(jll, axis=1, keepdims=True)
+        is_max = jll == a_max
+        m = np.sum(is_max, axis=1, keepdims=True, dtype=jll.dtype)
+        shifted = np.where(is_max, -np.inf, jll)
+        s = np.sum(np.exp(shifted - a_max), axis=1, keepdims=True, dtype=jll.dtype)
+        s = np.where(s == 0, s, s / m)
+        return np.exp(jll - (np.log1p(s) + np.log(m) + a_max))
+
+
+class ListRowScorer(CompactNBScorer):
+    """The scorer before transform() wrote into its scratch buffer"""
+
+    def transform(self, text, copy=True):
+        counts = self._counts(text)
+        columns = sorted(counts)
+        idf = self._tables[2] if self._tables else self.idf.tolist()
+        values = [counts[j] * idf[j] for j in columns]
+        norm = 0.0
+        for v in values:
+            norm += v * v
+        if norm != 0.0:
+            norm = np.sqrt(norm)
+            values = [v / norm for v in values]
+        return columns, values
+
+
+def hot_transform(scorer):
+    """transform() as the serving hot path calls it, without copying the values"""
+    return lambda text: scorer.transform(text, copy=False)
+
+
+def score(scorer, text):
+    return scorer.predict_proba_rows([scorer.transform(text, copy=False)])
+
+
+def per_message(fn, texts, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts)
+
+
+def peak_allocation(fn, texts):
+    """Average tracemalloc peak per message above the memory in use before calling fn on it (bytes)"""
+    peak = 0
+    tracemalloc.start()
+    for text in texts:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn(text)
+        peak += tracemalloc.get_traced_memory()[1] - before
+        del result
+    tracemalloc.stop()
+    return peak / len(texts)
+
+
+def kept_rows(scorer, texts):
+    """transform() rows as plain lists so the candidates' rows compare equal"""
+    return [(columns, list(values)) for columns, values in map(scorer.transform, texts)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    texts = pd.read_csv(PROCESSED_CSV)['Processed_Text'].fillna('').astype(str).tolist()
+    scorer = ModelBundle(DEFAULT_BUNDLE_PATH).scorer()
+    model = (scorer.terms, scorer.idf, scorer.feature_log_prob, scorer.class_log_prior, scorer.classes)
+    candidates = (('previous', ReferenceScorer(*model)), ('list rows', ListRowScorer(*model)), ('current', scorer))
+
+    rows = kept_rows(scorer, texts)
+    proba = scorer.predict_proba(texts)
+    identical = True
+    for _, candidate in candidates[:-1]:
+        identical &= rows == kept_rows(candidate, texts)
+        identical &= np.array_equal(proba, candidate.predict_proba_rows(rows))
+    print(f"Rows checked       : {len(texts)} (identical: {identical})")
+
+    sample = texts[:n]
+    for name, candidate in candidates:
+        # Warm up the tables and this thread's buffers before measuring
+        score(candidate, sample[0])
+        print(f"{name:9}: {per_message(lambda text: score(candidate, text), sample) * 1e6:6.1f} us/message, "
+              f"transform {per_message(hot_transform(candidate), sample) * 1e6:5.1f} us; KiB allocated at peak "
+              f"per message: transform {peak_allocation(hot_transform(candidate), sample) / 1024:5.2f}, "
+              f"scoring {peak_allocation(lambda text: score(candidate, text), sample) / 1024:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
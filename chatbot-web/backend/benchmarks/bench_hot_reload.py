@@ -0,0 +1,260 @@
+"""Benchmark + check: model hot reload latency and traffic during swaps.
+
+Works on a temporary copy of the model bundle and alternates it between two
+versions (same artifacts, different version stamp; the second one also
+rewrites a few common words in its slang dictionary) so every reload is a
+real swap:
+
+1. in-process: app.reload_resources() latency (load + validate + swap);
+2. admin reload: uvicorn under concurrent /chat traffic while
+   POST /admin/reload swaps the bundle repeatedly;
+3. file watch: same traffic, the bundle file is replaced and the server
+   picks it up via MODEL_WATCH_INTERVAL polling.
+
+Every /chat response during phases 2 and 3 must be a 200 with a bot
+message; the script exits non-zero otherwise. Cache consistency under
+concurrent reloads is checked by tests/test_hot_reload.py.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_hot_reload.py [--swaps 20] [--sessions 16] [--mode inline]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle, write_bundle  # noqa: E402
+
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+ADMIN_TOKEN = 'bench-reload'
+
+
+# Slang entries added to the second variant, so its preprocess() output differs from the first one's
+SLANG_OVERRIDES = {'sakit': 'nyeri', 'demam': 'panas', 'kepala': 'pusing', 'sudah': 'telah', 'hari': 'harian'}
+
+
+def write_variant(source_path, path, version, slang_overrides=None):
+    """Copy of the bundle at `source_path` with a different version stamp (and optionally slang entries)"""
+    bundle = ModelBundle(source_path)
+    sections = bundle.manifest['sections']
+    meta = {key: value for key, value in bundle.manifest.items() if key != 'sections'}
+    meta['version'] = version
+    texts = {name: bundle.text(name) for name, section in sections.items() if section['kind'] == 'text'}
+    if slang_overrides:
+        texts['slang_dict'] = json.dumps(dict(bundle.slang_dict(), **slang_overrides), ensure_ascii=False)
+    write_bundle(
+        path,
+        arrays={name: bundle.array(name) for name, section in sections.items() if section['kind'] == 'array'},
+        texts=texts,
+        meta=meta,
+    )
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request(method, path, json.dumps(body) if body is not None else None,
+                 dict({'Content-Type': 'application/json'}, **(headers or {})))
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, json.loads(data) if data else None
+
+
+def start_server(bundle_path, mode, watch_interval):
+    port = free_port()
+    env = dict(os.environ, MODEL_BUNDLE=bundle_path, ADMIN_TOKEN=ADMIN_TOKEN, INFERENCE_EXECUTOR=mode,
+               INFERENCE_WORKERS='2', MODEL_WATCH_INTERVAL=str(watch_interval),
+               PREPROCESS_CACHE_SIZE='0', INTENT_CACHE_SIZE='0')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if request(port, 'GET', '/health')[0] == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('uvicorn did not start')
+
+
+class Traffic:
+    """Patients chatting continuously until stop() is called"""
+
+    def __init__(self, port, sessions, texts):
+        self.port = port
+        self.texts = texts
+        self.latencies = []
+        self.errors = []
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._patient, args=(i,)) for i in range(sessions)]
+
+    def _patient(self, seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        headers = {'Content-Type': 'application/json'}
+        session_id = None
+        while not self._stop.is_set():
+            body = json.dumps({'message': rng.choice(self.texts) if session_id else '', 'session_id': session_id})
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/chat', body, headers)
+                response = conn.getresponse()
+                data = json.loads(response.read())
+            except (OSError, ValueError, http.client.HTTPException) as exc:
+                self.errors.append(repr(exc))
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+                time.sleep(0.1)
+                continue
+            self.latencies.append(time.perf_counter() - start)
+            if response.status != 200 or not data.get('bot_message'):
+                self.errors.append(f'{response.status}: {data}')
+            session_id = None if data.get('state') == 'summary' else data.get('session_id')
+        conn.close()
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def in_process_reloads(bundle_path, variants, swaps):
+    os.environ['MODEL_BUNDLE'] = bundle_path
+    import app
+
+    timings = []
+    for i in range(swaps):
+        shutil.copyfile(variants[i % 2], bundle_path + '.next')
+        os.replace(bundle_path + '.next', bundle_path)
+        result = app.reload_resources()
+        timings.append(result['seconds'])
+    return timings
+
+
+def admin_reloads(bundle_path, variants, args, texts):
+    proc, port = start_server(bundle_path, args.mode, 0)
+    try:
+        traffic = Traffic(port, args.sessions, texts).start()
+        try:
+            time.sleep(1)
+            timings, versions = [], []
+            for i in range(args.swaps):
+                shutil.copyfile(variants[i % 2], bundle_path + '.next')
+                os.replace(bundle_path + '.next', bundle_path)
+                start = time.perf_counter()
+                status, body = request(port, 'POST', '/admin/reload', {}, {'X-Admin-Token': ADMIN_TOKEN})
+                timings.append(time.perf_counter() - start)
+                versions.append(body.get('model_version') if status == 200 else f'HTTP {status}')
+                time.sleep(0.2)
+        finally:
+            traffic.stop()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return traffic, timings, versions
+
+
+def watched_reloads(bundle_path, variants, args, texts):
+    interval = 0.2
+    proc, port = start_server(bundle_path, args.mode, interval)
+    try:
+        traffic = Traffic(port, args.sessions, texts).start()
+        try:
+            detections = []
+            for i in range(min(args.swaps, 5)):
+                expected = ModelBundle(variants[i % 2]).version
+                shutil.copyfile(variants[i % 2], bundle_path + '.next')
+                os.replace(bundle_path + '.next', bundle_path)
+                start = time.perf_counter()
+                while request(port, 'GET', '/health')[1]['model_version'] != expected:
+                    if time.perf_counter() - start > 30:
+                        raise RuntimeError('file watch did not pick up the new bundle')
+                    time.sleep(0.01)
+                detections.append(time.perf_counter() - start)
+        finally:
+            traffic.stop()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return traffic, detections, interval
+
+
+def report_traffic(name, traffic):
+    ms = [latency * 1000 for latency in traffic.latencies]
+    print(f"{name}: {len(ms)} requests, p50 {percentile(ms, 50):.2f} ms, p99 {percentile(ms, 99):.2f} ms, "
+          f"errors {len(traffic.errors)}")
+    for error in traffic.errors[:5]:
+        print(f"  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--swaps', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--mode', default='inline')
+    args = parser.parse_args()
+
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+    tmp_dir = tempfile.mkdtemp(prefix='pustu-reload-')
+    try:
+        bundle_path = os.path.join(tmp_dir, 'bundle.bin')
+        base_version = ModelBundle(DEFAULT_BUNDLE_PATH).version
+        variants = [os.path.join(tmp_dir, 'a.bin'), os.path.join(tmp_dir, 'b.bin')]
+        write_variant(DEFAULT_BUNDLE_PATH, variants[0], f'{base_version}-a')
+        write_variant(DEFAULT_BUNDLE_PATH, variants[1], f'{base_version}-b', SLANG_OVERRIDES)
+        shutil.copyfile(variants[1], bundle_path)
+
+        admin_traffic, admin_timings, versions = admin_reloads(bundle_path, variants, args, texts)
+        watch_traffic, detections, interval = watched_reloads(bundle_path, variants, args, texts)
+        timings = in_process_reloads(bundle_path, variants, args.swaps)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    alternating = all(version.endswith('-a' if i % 2 == 0 else '-b') for i, version in enumerate(versions))
+    print(f"In-process reload      : median {statistics.median(timings) * 1000:.1f} ms, "
+          f"max {max(timings) * 1000:.1f} ms ({len(timings)} swaps)")
+    print(f"POST /admin/reload     : median {statistics.median(admin_timings) * 1000:.1f} ms, "
+          f"max {max(admin_timings) * 1000:.1f} ms, versions alternate: {alternating}")
+    print(f"File watch ({interval}s poll) : detection median {statistics.median(detections) * 1000:.0f} ms")
+    report_traffic('Traffic during admin reloads', admin_traffic)
+    report_traffic('Traffic during watched reloads', watch_traffic)
+    ok = alternating and not admin_traffic.errors and not watch_traffic.errors
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Benchmark: staged intent prediction (rules before the classifier).
+
+_predict_uncached() first applies the keyword rules that decide the intent
+whatever the classifier says (duration, body location, allergy), and with
+INTENT_STATE_RULES the current state's accept_if rule; TF-IDF + Naive
+Bayes only run for the remaining messages.
+
+Replays simulated patient conversations and reports, per stage, the share
+of turns decided there, then the uncached prediction time per turn for the
+unstaged pipeline (classifier on every message), the exact stages and the
+exact stages + state rules. Also checks that the exact stages give the
+unstaged results and counts the conversations where the state rules change
+the reply (other than the reported confidence).
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_intent_stages.py [n_conversations]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+from load_test_conversations import PROCESSED_CSV, ConversationSource, Patient  # noqa: E402
+
+
+def predict_unstaged(keys):
+    """The pipeline before staging: the classifier runs for every message, then the keyword boost"""
+    generation = app.preprocess_cache.generation
+    res = app.resources
+    analyses = [res.extractor.analyze(key) for key in keys]
+    proba = res.scorer.predict_proba([app.cached_preprocess(analysis, res, generation) for analysis in analyses])
+    best = proba.argmax(axis=1)
+    results = []
+    for i, key in enumerate(keys):
+        entities = res.extractor.extract_all(key, analyses[i])
+        pred, confidence = app.apply_keyword_boost(analyses[i], str(res.scorer.classes[best[i]]),
+                                                   float(proba[i, best[i]]), entities)
+        results.append((pred, confidence, entities))
+    return results
+
+
+def record_turns(source, n):
+    """(state, normalized message) for every answer of n simulated conversations"""
+    conversations = []
+    for seed in range(n):
+        patient = Patient(source, random.Random(seed), 0.05)
+        dsm = app.DialogStateManager()
+        app.run_turn(dsm, '')
+        turns = []
+        while dsm.state != 'summary' and len(turns) < 60:
+            message = patient.answer(dsm.state)
+            turns.append((dsm.state, message))
+            app.run_turn(dsm, message)
+        conversations.append(turns)
+    return conversations
+
+
+def per_turn(fn, turns, rounds=5):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for state, key in turns:
+            fn(key, state)
+        best = min(best, time.perf_counter() - start)
+    return best / len(turns)
+
+
+def replies(messages, state_rules):
+    """Dialog replies (without the confidence) of one conversation"""
+    app.INTENT_STATE_RULES = state_rules
+    app.intent_cache.clear()
+    dsm = app.DialogStateManager()
+    app.run_turn(dsm, '')
+    out = []
+    for message in messages:
+        response = app.run_turn(dsm, message)
+        response.pop('confidence', None)
+        out.append(response)
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    app.metrics.enabled = False
+
+    conversations = record_turns(ConversationSource(PROCESSED_CSV), n)
+    turns = [(state, app.normalize_text(message)) for turns in conversations for state, message in turns]
+
+    stages = Counter()
+    mismatches = 0
+    for state, key in turns:
+        app.INTENT_STATE_RULES = False
+        exact = app._predict_uncached([key])[0]
+        app.INTENT_STATE_RULES = True
+        stages[app._predict_uncached([key], [state])[0]['stage']] += 1
+        if (exact['intent'], exact['confidence'], exact['entities']) != predict_unstaged([key])[0]:
+            mismatches += 1
+
+    print(f"{len(turns)} turns, {n} conversations")
+    for stage in ('rules', 'state', 'model'):
+        print(f"  decided by {stage:5}: {stages[stage] / len(turns):6.1%}")
+    print(f"  without ML (exact stages only)  : {stages['rules'] / len(turns):6.1%}")
+    print(f"  without ML (with state rules)   : {(stages['rules'] + stages['state']) / len(turns):6.1%}")
+
+    unstaged = per_turn(lambda key, state: predict_unstaged([key]), turns)
+    staged = per_turn(lambda key, state: app._predict_uncached([key]), turns)
+    app.INTENT_STATE_RULES = True
+    with_state = per_turn(lambda key, state: app._predict_uncached([key], [state]), turns)
+    print(f"uncached prediction, unstaged       : {unstaged * 1e6:6.1f} us/turn")
+    print(f"uncached prediction, staged         : {staged * 1e6:6.1f} us/turn ({1 - staged / unstaged:.0%} saved)")
+    print(f"uncached prediction, + state rules  : {with_state * 1e6:6.1f} us/turn "
+          f"({1 - with_state / unstaged:.0%} saved)")
+    print(f"exact stages vs unstaged results    : {mismatches} mismatches")
+
+    changed = sum(replies([m for _, m in c], False) != replies([m for _, m in c], True) for c in conversations)
+    app.INTENT_STATE_RULES = False
+    print(f"conversations whose replies change with state rules: {changed} / {n}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark: cost of the /metrics instrumentation per dialog turn.
+
+Replays the same conversations through run_turn() with metrics enabled and
+disabled (memo caches off, so every turn runs all stages), and prints the
+per-stage breakdown collected by the enabled run.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_metrics_overhead.py [n_conversations]
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+
+
+def replay(conversations):
+    start = time.perf_counter()
+    turns = 0
+    for messages in conversations:
+        dsm = app.DialogStateManager()
+        app.run_turn(dsm, '')
+        for message in messages:
+            app.run_turn(dsm, message)
+            turns += 1
+    return (time.perf_counter() - start) / turns
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+    rng = random.Random(0)
+    conversations = [rng.sample(texts, 20) for _ in range(n)]
+
+    app.preprocess_cache.maxsize = 0
+    app.intent_cache.maxsize = 0
+    app.load_resources()
+
+    timings = {True: [], False: []}
+    for _ in range(3):
+        for enabled in (False, True):
+            app.metrics.enabled = enabled
+            timings[enabled].append(replay(conversations))
+    disabled, enabled = min(timings[False]), min(timings[True])
+
+    print(f"Turns per run      : {n * 20}")
+    print(f"Metrics disabled   : {disabled * 1e6:.1f} us/turn")
+    print(f"Metrics enabled    : {enabled * 1e6:.1f} us/turn ({(enabled / disabled - 1) * 100:+.1f}%)")
+    print("Stage breakdown (enabled runs):")
+    for (stage,), series in sorted(app.metrics.stage_seconds._series.items()):
+        count = sum(series.counts)
+        print(f"  {stage:22s} {series.total / count * 1e6:8.1f} us x {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: NumPy compact scorer vs sklearn TfidfVectorizer + MultinomialNB.
+
+Checks that predict_proba is bit-for-bit identical on every row of the
+processed dataset and reports per-message latency for both paths, plus the
+import cost each path pays at startup.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_nb_scorer.py
+"""
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from model_bundle import ModelBundle  # noqa: E402
+
+MODELS_DIR = os.path.join(BASE_DIR, 'outputs/models')
+PROCESSED_CSV = os.path.join(BASE_DIR, 'data/processed/dataset_processed_20251202_195300.csv')
+
+
+def import_time(statement):
+    """Wall time of a fresh interpreter running `statement`"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', statement], check=True, cwd=BASE_DIR)
+    return time.perf_counter() - start
+
+
+def main():
+    texts = pd.read_csv(PROCESSED_CSV)['Processed_Text'].fillna('').astype(str).tolist()
+
+    with open(os.path.join(MODELS_DIR, 'tfidf_vectorizer.pkl'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open(os.path.join(MODELS_DIR, 'naive_bayes_model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    scorer = ModelBundle(os.path.join(MODELS_DIR, 'pustu_bundle.bin')).scorer()
+
+    # Correctness: whole dataset in one matrix
+    expected = model.predict_proba(vectorizer.transform(texts))
+    actual = scorer.predict_proba(texts)
+    identical = np.array_equal(expected, actual)
+    max_diff = float(np.max(np.abs(expected - actual)))
+
+    # Latency: one message per call, as /chat does
+    sample = texts[:2000]
+    start = time.perf_counter()
+    for text in sample:
+        model.predict_proba(vectorizer.transform([text]))
+    sklearn_time = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for text in sample:
+        scorer.predict_proba([text])
+    numpy_time = (time.perf_counter() - start) / len(sample)
+
+    sklearn_import = import_time(
+        "import pickle; pickle.load(open('outputs/models/tfidf_vectorizer.pkl','rb')); "
+        "pickle.load(open('outputs/models/naive_bayes_model.pkl','rb'))"
+    )
+    numpy_import = import_time(
+        "from model_bundle import ModelBundle; ModelBundle('outputs/models/pustu_bundle.bin').scorer()"
+    )
+
+    print(f"Rows checked       : {len(texts)}")
+    print(f"Bit-for-bit equal  : {identical} (max abs diff {max_diff:.3g})")
+    print(f"sklearn per call   : {sklearn_time * 1e6:.1f} us")
+    print(f"NumPy per call     : {numpy_time * 1e6:.1f} us")
+    print(f"Speedup            : {sklearn_time / numpy_time:.2f}x")
+    print(f"Load (sklearn pkl) : {sklearn_import:.3f} s")
+    print(f"Load (bundle)      : {numpy_import:.3f} s")
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
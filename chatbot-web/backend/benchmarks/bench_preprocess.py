@@ -0,0 +1,90 @@
+"""Benchmark: TextNormalizer against the previous preprocess() on the full dataset.
+
+The previous implementation (lowercase, punctuation regex, split, one
+pass through slang_dict.get and one through the stopword set) is kept
+here as the reference. Every message of the raw and processed datasets
+must give identical output; then both are timed per message, together
+with normalize_tokens() on pre-split words (what the API runs after the
+message analysis), the streaming variant over the whole corpus, and the
+normalizer with a few multi-word slang entries added.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_preprocess.py [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from load_test_conversations import PROCESSED_CSV  # noqa: E402
+from preprocessing import TextNormalizer, load_source_dictionaries, tokenize  # noqa: E402
+from text_patterns import NON_WORD_RE  # noqa: E402
+
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+DICTIONARIES_DIR = os.path.join(BASE_DIR, 'data/dictionaries')
+MULTI_WORD_SLANG = {'gak apa apa': 'tidak apa-apa', 'ga enak badan': 'tidak enak badan', 'kepala pusing': 'pusing'}
+
+
+def legacy_preprocess(text, slang_dict, stopwords):
+    text = text.lower()
+    text = NON_WORD_RE.sub(' ', text)
+    words = text.split()
+    words = [slang_dict.get(w, w) for w in words]
+    return ' '.join(w for w in words if w not in stopwords)
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    texts = []
+    for path in (RAW_CSV, PROCESSED_CSV):
+        texts += pd.read_csv(path, usecols=['Raw_Text'])['Raw_Text'].fillna('').astype(str).tolist()
+    slang_dict, stopwords = load_source_dictionaries(DICTIONARIES_DIR)
+    normalizer = TextNormalizer(slang_dict, stopwords)
+
+    expected = [legacy_preprocess(text, slang_dict, stopwords) for text in texts]
+    mismatches = sum(got != want for got, want in zip(map(normalizer, texts), expected))
+    mismatches += sum(got != want for got, want in zip(normalizer.stream(texts), expected))
+    words = [tokenize(text.lower()) for text in texts]
+
+    def legacy_tokens(words_list):
+        for ws in words_list:
+            ws = [slang_dict.get(w, w) for w in ws]
+            ' '.join(w for w in ws if w not in stopwords)
+
+    multi = TextNormalizer(dict(slang_dict, **MULTI_WORD_SLANG), stopwords)
+    n = len(texts)
+    rows = [
+        ('legacy preprocess()', best_of(args.repeat, lambda: [legacy_preprocess(t, slang_dict, stopwords)
+                                                               for t in texts])),
+        ('TextNormalizer()', best_of(args.repeat, lambda: [normalizer(t) for t in texts])),
+        ('TextNormalizer.stream()', best_of(args.repeat, lambda: list(normalizer.stream(texts)))),
+        ('legacy, pre-split words', best_of(args.repeat, lambda: legacy_tokens(words))),
+        ('normalize_tokens()', best_of(args.repeat, lambda: [normalizer.normalize_tokens(w) for w in words])),
+        ('with multi-word slang', best_of(args.repeat, lambda: [multi(t) for t in texts])),
+    ]
+    print(f"{n} messages, identical output: {'yes' if not mismatches else f'NO ({mismatches} differ)'}")
+    for name, seconds in rows:
+        print(f"{name:24s} {seconds / n * 1e6:6.2f} us/message  {seconds * 1000:7.1f} ms total")
+    print(f"multi-word example: {multi('Gak apa apa dok, cuma kepala pusing')!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
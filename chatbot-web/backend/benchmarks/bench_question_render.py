@@ -0,0 +1,58 @@
+"""Benchmark: rendering {nama} questions with the cached display name.
+
+get_current_question() used to rebuild the name for every {nama} question:
+two get_text() lookups, the "panggil"/"nama saya" prefix regexes and
+title-casing. The display name is now computed once per stored name and
+each rendered question is cached per session until a name state changes.
+
+Times one get_current_question() call for a {nama} question and a plain
+one, the uncached render for comparison, and run_turn() per turn (without
+the classifier) over replayed conversations.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_question_render.py [n_conversations]
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+from bench_dialog_flow import record_conversations, replay, time_call  # noqa: E402
+from load_test_conversations import PROCESSED_CSV, ConversationSource  # noqa: E402
+
+
+def render_uncached(dsm):
+    """get_current_question() without the display name / render caches"""
+    question = app.FLOW.questions[dsm._state_idx]
+    if '{nama}' in question:
+        question = question.replace('{nama}', app.display_name(dsm.get_text('nama_panggilan'), dsm.get_text('nama')))
+    return question
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app.metrics.enabled = False
+
+    dsm = app.DialogStateManager()
+    dsm.state = 'nama'
+    dsm.update('jawab_nama', 'Nama saya Budi Santoso', 'nama saya budi santoso', {}, True)
+    dsm.update('jawab_nama', 'panggil budi', 'panggil budi', {}, True)
+    dsm.state = 'durasi'
+    assert dsm.get_current_question() == render_uncached(dsm)
+    plain = app.DialogStateManager()
+    plain.state = 'jenis_kelamin'
+
+    conversations = record_conversations(ConversationSource(PROCESSED_CSV), n)
+    per_turn = min(replay(conversations) for _ in range(5))
+
+    print(f"{{nama}} question, cached   : {time_call(dsm.get_current_question) * 1e9:6.0f} ns")
+    print(f"{{nama}} question, uncached : {time_call(lambda: render_uncached(dsm)) * 1e9:6.0f} ns")
+    print(f"plain question             : {time_call(plain.get_current_question) * 1e9:6.0f} ns")
+    print(f"run_turn (no model)        : {per_turn * 1e6:6.2f} us/turn "
+          f"({sum(len(c) for c in conversations)} turns, {n} conversations)")
+
+
+if __name__ == '__main__':
+    main()
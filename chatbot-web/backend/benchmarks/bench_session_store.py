@@ -0,0 +1,107 @@
+"""Benchmark: session store memory and throughput.
+
+Fills each store with mid-conversation DialogStateManager sessions and
+reports memory per session and get+save turn throughput for the in-memory
+LRU/TTL store and the Redis-protocol store. The Redis store runs against
+REDIS_URL when set, otherwise against the bundled fake server.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_session_store.py [n_sessions]
+"""
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import DialogStateManager, extractor  # noqa: E402
+from fake_redis import FakeRedisServer  # noqa: E402
+from session_store import MemorySessionStore, RedisClient, RedisSessionStore  # noqa: E402
+
+SAMPLE_TURNS = [
+    ('nama', 'Nama saya Budi Santoso'),
+    ('nama_panggilan', 'panggil budi'),
+    ('umur', '28 tahun'),
+    ('jenis_kelamin', 'laki-laki'),
+    ('keluhan_utama', 'saya demam sudah 3 hari dan kepala pusing'),
+    ('gejala', 'mual dan lemas'),
+]
+
+
+def make_session():
+    dsm = DialogStateManager()
+    for state, message in SAMPLE_TURNS:
+        dsm.state = state
+        dsm.update('keluhan_utama', message, message.lower(), extractor.extract_all(message), True)
+    return dsm
+
+
+def measure_memory(n):
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    store = MemorySessionStore(max_sessions=n, ttl=3600)
+    for session_id in ids:
+        store.save(session_id, make_session())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return store, ids, used
+
+
+def measure_throughput(store, ids, turns):
+    start = time.perf_counter()
+    for i in range(turns):
+        session_id = ids[i % len(ids)]
+        dsm = store.get(session_id)
+        dsm.update('tidak_jelas', '', '', {}, False)  # a retry turn
+        store.save(session_id, dsm)
+    return turns / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    memory_store, ids, used = measure_memory(n)
+    memory_ops = measure_throughput(memory_store, ids, 50000)
+
+    server = None
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        client = RedisClient.from_url(redis_url)
+    else:
+        server = FakeRedisServer().start()
+        client = RedisClient(port=server.port)
+    redis_store = RedisSessionStore(
+        client, dumps=lambda dsm: dsm.to_bytes(), loads=DialogStateManager.from_bytes, ttl=3600
+    )
+    payload_bytes = 0
+    for session_id in ids:
+        dsm = make_session()
+        payload_bytes += len(dsm.to_bytes())
+        redis_store.save(session_id, dsm)
+    redis_ops = measure_throughput(redis_store, ids, 5000)
+
+    # TTL/LRU behaviour: a store capped at half the sessions
+    capped = MemorySessionStore(max_sessions=n // 2, ttl=3600)
+    for session_id in ids:
+        capped.save(session_id, memory_store.get(session_id))
+
+    print(f"Sessions                 : {n}")
+    print(f"Memory store             : {used / 1024 / 1024:.1f} MiB ({used / n:.0f} B/session)")
+    print(f"Serialized payload       : {payload_bytes / 1024 / 1024:.1f} MiB ({payload_bytes / n:.0f} B/session)")
+    print(f"Memory store turns/s     : {memory_ops:,.0f}")
+    print(f"Redis store turns/s      : {redis_ops:,.0f} ({'REDIS_URL' if redis_url else 'fake server'})")
+    print(f"LRU evictions (cap {n // 2}): {capped.evictions}, kept {len(capped)}")
+
+    client.close()
+    if server is not None:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
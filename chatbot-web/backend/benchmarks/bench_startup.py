@@ -0,0 +1,73 @@
+"""Benchmark: cold-start cost of the pickles vs the model bundle.
+
+Each case runs in a fresh interpreter (median of several runs) and reports
+the time spent inside it, so interpreter startup is excluded:
+
+* pickles: unpickle the vectorizer, model, slang dict and stopwords and
+  read the three JSON dictionaries (what app.py did at import before);
+* bundle open: mmap the bundle and parse its manifest;
+* bundle ready: open plus everything serving needs, including the first
+  prediction (which builds the lazy vocabulary);
+* import app: the whole backend module, FastAPI included.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    'pickles': '''
+import json, pickle
+for name in ('tfidf_vectorizer', 'naive_bayes_model', 'slang_dict', 'stopwords'):
+    with open(f'outputs/models/{name}.pkl', 'rb') as f:
+        pickle.load(f)
+for name in ('symptoms_dict', 'severity_keywords', 'location_keywords'):
+    with open(f'data/dictionaries/{name}.json', encoding='utf-8') as f:
+        json.load(f)
+''',
+    'bundle open': '''
+from model_bundle import ModelBundle
+ModelBundle('outputs/models/pustu_bundle.bin')
+''',
+    'bundle ready': '''
+from model_bundle import ModelBundle
+bundle = ModelBundle('outputs/models/pustu_bundle.bin')
+scorer = bundle.scorer()
+bundle.slang_dict(), bundle.stopwords(), bundle.dictionaries()
+scorer.predict_proba(['demam sudah tiga hari'])
+''',
+    'import app': '''
+import app
+''',
+}
+
+
+def timed(body):
+    """Seconds spent running `body` in a fresh interpreter"""
+    script = (
+        'import time\n_start = time.perf_counter()\n' + body
+        + '\nprint(time.perf_counter() - _start)\n'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=BASE_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    bundle_path = os.path.join(BASE_DIR, 'outputs/models/pustu_bundle.bin')
+    print(f"Bundle size: {os.path.getsize(bundle_path) / 1024:.0f} KiB, runs per case: {runs}")
+    for name, body in CASES.items():
+        times = [timed(body) for _ in range(runs)]
+        print(f"{name:13s}: median {statistics.median(times) * 1000:8.1f} ms  "
+              f"(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f})")
+
+
+if __name__ == '__main__':
+    main()
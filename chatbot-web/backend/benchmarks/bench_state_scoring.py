@@ -0,0 +1,122 @@
+"""Benchmark: state-conditioned intent scoring (INTENT_STATE_SCORING).
+
+With state scoring the classifier only multiplies the feature rows of the
+intents the current state expects (plus sapaan / ucapan_terima_kasih /
+tidak_jelas) and renormalizes over them, with the state's prior from the
+flow. Reports:
+
+- compute: predict_proba time per message, all classes vs the state's
+  subset, over the states a replayed conversation answers;
+- retries: simulated patients talk to the bot until the summary, with the
+  full classifier and with state scoring (same seeds); a retry is a turn
+  that asks the same question again;
+- off-topic answers: dataset messages of intents a state does not expect,
+  and how many of them each mode accepts anyway (the cost of restricting).
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_state_scoring.py [n_conversations]
+"""
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app  # noqa: E402
+from load_test_conversations import PROCESSED_CSV, STATE_INTENTS, ConversationSource, Patient  # noqa: E402
+
+
+def use_state_scoring(enabled):
+    app.INTENT_STATE_SCORING = enabled
+    app.resources = app.resources._replace(
+        state_scorers=app.build_state_scorers(app.resources.scorer) if enabled else None)
+    app.intent_cache.clear()
+
+
+def simulate(source, n):
+    """(turns, retries, (state, message) answers) over n simulated conversations"""
+    turns = retries = 0
+    answers = []
+    for seed in range(n):
+        patient = Patient(source, random.Random(seed), 0.05)
+        dsm = app.DialogStateManager()
+        app.run_turn(dsm, '')
+        while dsm.state != 'summary' and turns < 60 * (seed + 1):
+            state = dsm.state
+            message = patient.answer(state)
+            answers.append((state, message))
+            response = app.run_turn(dsm, message)
+            turns += 1
+            # Greeting/thanks interjections repeat the question without validating (no is_valid)
+            retries += 'is_valid' in response and response['state'] == state
+    return turns, retries, answers
+
+
+def predict_proba_time(rows, subsets, rounds=5):
+    scorer = app.resources.scorer
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for row, subset in zip(rows, subsets):
+            scorer.predict_proba_rows([row], subset)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows)
+
+
+def off_topic_accepted(source, per_state=200):
+    """(accepted, total) over answers whose dataset intent the state does not expect"""
+    rng = random.Random(0)
+    accepted = total = 0
+    for state in STATE_INTENTS:
+        expected = app.FLOW.expected[app.STATE_INDEX[state]]
+        if expected is None:
+            continue
+        pool = [text for intent, texts in source.by_intent.items()
+                if intent not in expected and intent not in app.FLOW_CONTROL_INTENTS for text in texts]
+        for message in rng.sample(pool, min(per_state, len(pool))):
+            dsm = app.DialogStateManager()
+            dsm.state = state
+            response = app.run_turn(dsm, message)
+            total += 1
+            accepted += response.get('is_valid') is True and response['state'] != state
+    return accepted, total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    app.metrics.enabled = False
+    source = ConversationSource(PROCESSED_CSV)
+
+    use_state_scoring(False)
+    full_turns, full_retries, answers = simulate(source, n)
+    full_off = off_topic_accepted(source)
+    use_state_scoring(True)
+    state_turns, state_retries, _ = simulate(source, n)
+    state_off = off_topic_accepted(source)
+
+    generation = app.preprocess_cache.generation
+    res = app.resources
+    rows, subsets = [], []
+    for state, message in answers:
+        processed = app.cached_preprocess(res.extractor.analyze(app.normalize_text(message)), res, generation)
+        rows.append(res.scorer.transform(processed))
+        subsets.append(res.state_scorers[app.STATE_INDEX[state]])
+    full = predict_proba_time(rows, [None] * len(rows))
+    restricted = predict_proba_time(rows, subsets)
+    n_classes = len(res.scorer.classes)
+    scored = sum(n_classes if subset is None else len(subset.classes) for subset in subsets) / len(subsets)
+    use_state_scoring(False)
+
+    print(f"{n} conversations")
+    print(f"predict_proba, all classes   : {full * 1e6:6.2f} us/message ({n_classes} classes)")
+    print(f"predict_proba, state subset  : {restricted * 1e6:6.2f} us/message ({scored:.1f} classes on average)")
+    for name, turns, retries, (accepted, total) in (('full classifier', full_turns, full_retries, full_off),
+                                                    ('state scoring  ', state_turns, state_retries, state_off)):
+        print(f"{name}: {turns / n:5.2f} turns/conversation, {retries} retry turns ({retries / turns:.1%}), "
+              f"off-topic answers accepted {accepted}/{total}")
+
+
+if __name__ == '__main__':
+    main()
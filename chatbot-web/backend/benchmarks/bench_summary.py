@@ -0,0 +1,73 @@
+"""Microbenchmark: summary generation time per completed session.
+
+Fills DialogStateManager sessions with answers sampled from the raw dataset
+(one per dialog field) and times get_summary(), plus extract_durasi() on the
+same messages.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_summary.py [n_sessions]
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from app import DIALOG_FLOW, DialogStateManager, extractor, slang_dict, stopwords  # noqa: E402
+from preprocessing import preprocess  # noqa: E402
+
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+FIXED_ANSWERS = {
+    'nama': 'nama saya Budi Santoso',
+    'nama_panggilan': 'panggil budi',
+    'umur': 'saya 28',
+    'jenis_kelamin': 'laki-laki',
+}
+
+
+def build_sessions(n, texts):
+    rng = random.Random(42)
+    sessions = []
+    for _ in range(n):
+        dsm = DialogStateManager()
+        for state in DIALOG_FLOW[1:-1]:
+            message = FIXED_ANSWERS.get(state) or rng.choice(texts)
+            dsm.data[state] = {
+                'message': message,
+                'processed': preprocess(message, slang_dict, stopwords),
+                'intent': 'keluhan_utama',
+                'entities': {},
+            }
+        dsm.state = 'summary'
+        sessions.append(dsm)
+    return sessions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+    sessions = build_sessions(n, texts)
+
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for dsm in sessions:
+            dsm.get_summary()
+        best = min(best, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for text in texts:
+        extractor.extract_durasi(text)
+    durasi_time = time.perf_counter() - start
+
+    print(f"Sessions          : {n}")
+    print(f"get_summary       : {best / n * 1e6:.1f} us/session")
+    print(f"extract_durasi    : {durasi_time / len(texts) * 1e6:.2f} us/message")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark: memory and throughput of multi-worker serving.
+
+For 1, 2, 4 and 8 workers, starts the server both ways and drives it with
+full simulated conversations over HTTP (load_test_conversations), with the
+sessions in a shared Redis-protocol store (fake_redis in its own process):
+
+  uvicorn  `uvicorn app:app --workers N`: each worker imports and loads
+           everything itself
+  serve    `python serve.py --workers N`: loaded once, workers forked
+
+Memory is summed over the whole process tree from /proc/<pid>/smaps_rollup
+after startup and again after the load: RSS (counts shared pages in every
+process), PSS (shared pages split between the processes sharing them, the
+real footprint) and USS (private pages only).
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_workers.py [--workers 1,2,4,8] [--conversations 200] [--sessions 32]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'benchmarks'))
+
+from load_test_conversations import (  # noqa: E402
+    PROCESSED_CSV, ConversationSource, free_port, http_request, latency_summary, run_sessions,
+)
+
+FAKE_REDIS = ("import sys; sys.path.insert(0, 'benchmarks'); from fake_redis import FakeRedisServer; "
+              "FakeRedisServer(port=int(sys.argv[1])).serve_forever()")
+
+
+def process_tree(pid):
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def tree_memory(pid):
+    """(rss, pss, uss) bytes summed over pid and its descendants"""
+    totals = {'Rss': 0, 'Pss': 0, 'Private_Clean': 0, 'Private_Dirty': 0}
+    for current in process_tree(pid):
+        try:
+            with open(f'/proc/{current}/smaps_rollup') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in totals:
+                        totals[key] += int(value.split()[0]) * 1024
+        except OSError:
+            pass
+    return totals['Rss'], totals['Pss'], totals['Private_Clean'] + totals['Private_Dirty']
+
+
+def start_server(mode, workers, redis_port):
+    port = free_port()
+    env = dict(os.environ, SESSION_STORE='redis', REDIS_URL=f'redis://127.0.0.1:{redis_port}/0',
+               PREPROCESS_CACHE_SIZE='0', INTENT_CACHE_SIZE='0')
+    if mode == 'uvicorn':
+        command = [sys.executable, '-m', 'uvicorn', 'app:app', '--workers', str(workers)]
+    else:
+        command = [sys.executable, 'serve.py', '--workers', str(workers)]
+    proc = subprocess.Popen(command + ['--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+                            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        try:
+            if http_request('127.0.0.1', port, 'GET', '/health')[0] == 200:
+                # Every worker has to be up, not just the first one that answered
+                if len(process_tree(proc.pid)) > workers or workers == 1:
+                    time.sleep(2.0)
+                    return proc, port
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'{mode} with {workers} workers did not start')
+
+
+def run(args, source, mode, workers, redis_port):
+    proc, port = start_server(mode, workers, redis_port)
+    try:
+        idle = tree_memory(proc.pid)
+
+        def connect():
+            import http.client
+            import json
+
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            headers = {'Content-Type': 'application/json'}
+
+            def send(message, session_id):
+                conn.request('POST', '/chat', json.dumps({'message': message, 'session_id': session_id}), headers)
+                response = conn.getresponse()
+                data = response.read()
+                return response.status, json.loads(data) if response.status == 200 else None
+
+            return send, conn.close
+
+        results, elapsed = run_sessions(args, source, connect)
+        loaded = tree_memory(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return idle, loaded, results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--modes', default='uvicorn,serve')
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--noise', type=float, default=0.05)
+    parser.add_argument('--max-turns', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    source = ConversationSource(PROCESSED_CSV)
+    redis_port = free_port()
+    redis = subprocess.Popen([sys.executable, '-c', FAKE_REDIS, str(redis_port)], cwd=BASE_DIR)
+    time.sleep(1.0)
+    mib = 1024 * 1024
+    print(f"{os.cpu_count()} CPUs, {args.conversations} conversations over {args.sessions} connections")
+    print(f"{'mode':8} {'workers':>7}  {'RSS MiB':>8} {'PSS MiB':>8} {'USS MiB':>8}  "
+          f"{'after load PSS':>14}  {'turns/s':>8} {'p50 ms':>7} {'p99 ms':>7}  completed")
+    try:
+        for workers in (int(value) for value in args.workers.split(',')):
+            for mode in args.modes.split(','):
+                idle, loaded, results, elapsed = run(args, source, mode, workers, redis_port)
+                latency = latency_summary(results.latencies)
+                print(f"{mode:8} {workers:7d}  {idle[0] / mib:8.1f} {idle[1] / mib:8.1f} {idle[2] / mib:8.1f}  "
+                      f"{loaded[1] / mib:14.1f}  {len(results.latencies) / elapsed:8.1f} "
+                      f"{latency.get('p50', 0):7.2f} {latency.get('p99', 0):7.2f}  "
+                      f"{results.completed}/{args.conversations}", flush=True)
+    finally:
+        redis.terminate()
+        redis.wait()
+
+
+if __name__ == '__main__':
+    main()
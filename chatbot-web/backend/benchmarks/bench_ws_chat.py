@@ -0,0 +1,114 @@
+"""Benchmark: /ws/chat against POST /chat on the same conversations.
+
+Replays the same synthetic conversations (load_test_conversations.py) over
+three client transports against one uvicorn server:
+
+  post-keepalive  POST /chat, one keep-alive connection per client
+  post-connect    POST /chat, a new TCP connection per message
+  websocket       /ws/chat, one connection per conversation, delta replies
+
+Reports messages/s, per-message latency and the mean reply size on the
+wire (HTTP body or WebSocket frame payload).
+
+Usage (from chatbot-web/backend):
+    python benchmarks/bench_ws_chat.py [--conversations 200] [--sessions 16]
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import sys
+
+from websockets.sync.client import connect as ws_connect
+
+from load_test_conversations import ConversationSource, PROCESSED_CSV, latency_summary, run_sessions, start_server
+
+
+def post_transport(host, port, keepalive, sizes):
+    headers = {'Content-Type': 'application/json'}
+
+    def connect():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+
+        def send(message, session_id):
+            if not keepalive:
+                conn.close()
+            conn.request('POST', '/chat', json.dumps({'message': message, 'session_id': session_id}), headers)
+            response = conn.getresponse()
+            data = response.read()
+            sizes.append(len(data))
+            return response.status, json.loads(data) if response.status == 200 else None
+
+        return send, conn.close
+
+    return connect
+
+
+def ws_transport(host, port, sizes):
+    def connect():
+        stack = contextlib.ExitStack()
+        socket = None
+        state = {}
+
+        def send(message, session_id):
+            nonlocal socket
+            if session_id is None:
+                # New conversation: the server opens the session and greets on connect
+                stack.close()
+                socket = stack.enter_context(ws_connect(f'ws://{host}:{port}/ws/chat'))
+                state.clear()
+            else:
+                socket.send(json.dumps({'message': message}))
+            frame = socket.recv()
+            sizes.append(len(frame))
+            delta = json.loads(frame)
+            if 'error' in delta:
+                return delta['status'], None
+            entities = delta.pop('entities', None)
+            state.update(delta)
+            if entities is not None:
+                state['entities'] = dict(state.get('entities') or {}, **entities)
+            return 200, state
+
+        return send, stack.close
+
+    return connect
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--noise', type=float, default=0.05)
+    args = parser.parse_args()
+    # Fields run_sessions()/start_server() expect
+    args.seed, args.max_turns, args.keep_cache, args.session_store = 0, 60, False, 'memory'
+
+    source = ConversationSource(PROCESSED_CSV)
+    proc, port = start_server(args)
+    try:
+        rows = []
+        for name in ('post-keepalive', 'post-connect', 'websocket'):
+            sizes = []
+            if name == 'websocket':
+                connect = ws_transport('127.0.0.1', port, sizes)
+            else:
+                connect = post_transport('127.0.0.1', port, name == 'post-keepalive', sizes)
+            results, elapsed = run_sessions(args, source, connect)
+            rows.append((name, results, elapsed, sizes))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"{args.conversations} conversations, {args.sessions} concurrent, CPUs: {os.cpu_count()}")
+    for name, results, elapsed, sizes in rows:
+        latency = latency_summary(results.latencies)
+        print(f"{name:15s} {len(results.latencies) / elapsed:7.0f} msg/s  p50 {latency['p50']:6.2f} ms  "
+              f"p99 {latency['p99']:6.2f} ms  reply {sum(sizes) / len(sizes):5.0f} B  "
+              f"completed {results.completed}/{args.conversations}  errors {sum(results.errors.values())}")
+    return 0 if all(results.completed == args.conversations for _, results, _, _ in rows) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
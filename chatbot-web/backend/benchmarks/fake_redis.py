@@ -0,0 +1,154 @@
+"""Tiny in-process server speaking enough of the Redis protocol for local runs.
+
+Supports PING, AUTH, SELECT, GET, MGET, SET (EX/PX), DEL, EXISTS, DBSIZE and
+FLUSHDB with key expiry, and pipelined commands. Used by the session
+benchmarks and tests when no real Redis is available:
+
+    server = FakeRedisServer()
+    server.start()
+    client = RedisClient(port=server.port)
+"""
+import socket
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server._connections.add(self.connection)
+
+    def finish(self):
+        with self.server._lock:
+            self.server._connections.discard(self.connection)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+            try:
+                self.wfile.write(self.server.dispatch(args))
+            except OSError:
+                return
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            raise ValueError('inline commands are not supported')
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = self.rfile.readline()
+            length = int(header[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.port = self.server_address[1]
+        self._data = {}  # key -> (value, expires_at or None)
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def drop_connections(self):
+        """Close every client connection, like a server restart or an idle timeout"""
+        with self._lock:
+            connections, self._connections = list(self._connections), set()
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            connection.close()
+
+    def dispatch(self, args):
+        command = args[0].upper().decode()
+        handler = getattr(self, f'_cmd_{command.lower()}', None)
+        if handler is None:
+            return b'-ERR unknown command\r\n'
+        with self._lock:
+            return handler(args[1:])
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _cmd_ping(self, args):
+        return b'+PONG\r\n'
+
+    def _cmd_auth(self, args):
+        return b'+OK\r\n'
+
+    def _cmd_select(self, args):
+        return b'+OK\r\n'
+
+    def _cmd_get(self, args):
+        value = self._live(args[0])
+        if value is None:
+            return b'$-1\r\n'
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def _cmd_mget(self, args):
+        parts = [b'*%d\r\n' % len(args)]
+        for key in args:
+            value = self._live(key)
+            parts.append(b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value))
+        return b''.join(parts)
+
+    def _cmd_set(self, args):
+        key, value, options = args[0], args[1], args[2:]
+        expires_at = None
+        for i in range(0, len(options) - 1, 2):
+            option = options[i].upper()
+            if option == b'EX':
+                expires_at = time.monotonic() + int(options[i + 1])
+            elif option == b'PX':
+                expires_at = time.monotonic() + int(options[i + 1]) / 1000
+        self._data[key] = (value, expires_at)
+        return b'+OK\r\n'
+
+    def _cmd_del(self, args):
+        removed = sum(1 for key in args if self._live(key) is not None and self._data.pop(key))
+        return b':%d\r\n' % removed
+
+    def _cmd_exists(self, args):
+        return b':%d\r\n' % sum(1 for key in args if self._live(key) is not None)
+
+    def _cmd_dbsize(self, args):
+        return b':%d\r\n' % sum(1 for key in list(self._data) if self._live(key) is not None)
+
+    def _cmd_flushdb(self, args):
+        self._data.clear()
+        return b'+OK\r\n'
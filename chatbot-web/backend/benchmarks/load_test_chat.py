@@ -0,0 +1,132 @@
+"""Load test: /chat latency under concurrent sessions for each executor mode.
+
+Starts uvicorn once per INFERENCE_EXECUTOR mode and drives it with one
+keep-alive connection per simulated patient. Each patient opens a session
+and then sends dataset messages back to back. Memo caches are disabled
+unless --keep-cache is given, so every turn goes through the classifier.
+Reports p50/p95/p99 latency, throughput and 503 (backpressure) responses.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/load_test_chat.py [--sessions 32] [--turns 20] [--workers 2]
+        [--queue-size 64] [--modes inline,thread,process] [--keep-cache]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_CSV = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, args):
+    port = free_port()
+    env = dict(os.environ, INFERENCE_EXECUTOR=mode, INFERENCE_WORKERS=str(args.workers),
+               INFERENCE_QUEUE_SIZE=str(args.queue_size), SESSION_STORE='memory')
+    if not args.keep_cache:
+        env.update(PREPROCESS_CACHE_SIZE='0', INTENT_CACHE_SIZE='0')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'uvicorn ({mode}) did not start')
+
+
+def patient(port, messages, latencies, statuses, barrier):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    conn.request('POST', '/chat', json.dumps({'message': ''}), headers)
+    session_id = json.loads(conn.getresponse().read())['session_id']
+    barrier.wait()
+    for message in messages:
+        body = json.dumps({'message': message, 'session_id': session_id})
+        start = time.perf_counter()
+        conn.request('POST', '/chat', body, headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status)
+    conn.close()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def run_mode(mode, args, texts):
+    proc, port = start_server(mode, args)
+    try:
+        rng = random.Random(0)
+        latencies, statuses = [], []
+        barrier = threading.Barrier(args.sessions + 1)
+        threads = [
+            threading.Thread(target=patient, args=(port, rng.sample(texts, args.turns), latencies, statuses, barrier))
+            for _ in range(args.sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        conn.request('GET', '/metrics/executor')
+        executor = json.loads(conn.getresponse().read())
+        conn.close()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{mode:8s} p50 {percentile(ms, 50):7.2f} ms  p95 {percentile(ms, 95):7.2f} ms  "
+          f"p99 {percentile(ms, 99):7.2f} ms  {len(ms) / elapsed:7.0f} req/s  "
+          f"503s {statuses.count(503)}  workers {executor['workers']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--modes', default='inline,thread,process')
+    parser.add_argument('--keep-cache', action='store_true')
+    args = parser.parse_args()
+
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+    print(f"{args.sessions} concurrent sessions x {args.turns} turns, CPUs: {os.cpu_count()}")
+    for mode in args.modes.split(','):
+        run_mode(mode, args, texts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+"""Load test: full anamnesis conversations, greeting through summary.
+
+Each simulated patient answers whatever state the bot is in: synthesized
+names, nicknames, ages and genders for the identity states, and dataset
+Raw_Text of the matching intent for the clinical states (keluhan_utama ->
+keluhan_utama, durasi -> jawab_durasi, ...). Answers are drawn from the
+conversation's Case_Category where the dataset has one, so a patient keeps
+to one illness. With --noise, a greeting/thanks/"tidak tahu" turn is mixed
+in now and then. Retries and states skipped by smart prefill follow from
+the bot's replies, like a real client.
+
+Targets:
+  inprocess  app.chat() on an event loop thread, called from session threads (no HTTP)
+  http       spawn uvicorn (or use --url) and keep one connection per session
+
+The JSON report (stdout, or --output) has throughput, per-turn latency
+percentiles overall and per state, memory growth (RSS of the serving
+process) and session-completion rates. With --baseline, the run is compared
+against an earlier report and exits 1 on a regression beyond --tolerance,
+so it can gate releases.
+
+Usage (from chatbot-web/backend):
+    python benchmarks/load_test_conversations.py [--target inprocess|http] [--conversations 500]
+        [--sessions 32] [--noise 0.05] [--output report.json] [--baseline old.json]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+PROCESSED_CSV = os.path.join(BASE_DIR, 'data/processed/dataset_processed_20251202_195300.csv')
+REPORT_FORMAT_VERSION = 1
+
+# Dataset intent answering each clinical state
+STATE_INTENTS = {
+    'keluhan_utama': 'keluhan_utama',
+    'gejala': 'jawab_gejala_penyerta',
+    'durasi': 'jawab_durasi',
+    'lokasi': 'jawab_lokasi',
+    'severity': 'jawab_severity',
+    'riwayat_penyakit': 'jawab_riwayat_penyakit',
+    'riwayat_obat': 'jawab_riwayat_obat',
+    'alergi': 'jawab_alergi',
+    'faktor_risiko': 'jawab_faktor_risiko',
+}
+NOISE_INTENTS = ('sapaan', 'ucapan_terima_kasih', 'tidak_jelas')
+
+FIRST_NAMES = ('Budi', 'Siti', 'Agus', 'Dewi', 'Rina', 'Andi', 'Wati', 'Joko', 'Putri', 'Hendra', 'Nur', 'Yusuf')
+LAST_NAMES = ('Santoso', 'Rahayu', 'Wijaya', 'Lestari', 'Hidayat', 'Saputra', 'Kurniawan', 'Pratiwi')
+NAME_TEMPLATES = ('Nama saya {first} {last}', '{first} {last}', 'saya {first} {last}')
+NICKNAME_TEMPLATES = ('panggil saja {first}', '{first}', 'biasa dipanggil {first}')
+AGE_TEMPLATES = ('umur saya {age} tahun', '{age} tahun', 'usia {age}')
+GENDERS = ('laki-laki', 'perempuan', 'saya perempuan', 'laki laki')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def latency_summary(seconds):
+    if not seconds:
+        return {'count': 0}
+    ms = [value * 1000 for value in seconds]
+    return {'count': len(ms), 'mean': round(sum(ms) / len(ms), 3),
+            **{f'p{q}': round(percentile(ms, q), 3) for q in (50, 90, 95, 99)}, 'max': round(max(ms), 3)}
+
+
+def rss_bytes(pid=None):
+    """Resident set size of a process from /proc (None where unavailable)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class ConversationSource:
+    """Answers per intent, grouped by Case_Category"""
+
+    def __init__(self, path):
+        frame = pd.read_csv(path, usecols=['Raw_Text', 'Intent', 'Case_Category'])
+        frame['Raw_Text'] = frame['Raw_Text'].fillna('').astype(str)
+        frame['Case_Category'] = frame['Case_Category'].fillna('')
+        self.by_intent = {intent: group['Raw_Text'].tolist() for intent, group in frame.groupby('Intent')}
+        self.by_category = {key: group['Raw_Text'].tolist()
+                            for key, group in frame[frame['Case_Category'] != ''].groupby(['Case_Category', 'Intent'])}
+        self.categories = sorted(frame.loc[frame['Intent'] == 'keluhan_utama', 'Case_Category'].unique().tolist())
+        self.categories = [category for category in self.categories if category]
+        missing = set(STATE_INTENTS.values()) - set(self.by_intent)
+        if missing:
+            raise ValueError(f"Dataset has no rows for intents: {sorted(missing)}")
+
+
+class Patient:
+    """One synthetic patient: answers the bot's current state"""
+
+    def __init__(self, source, rng, noise):
+        self.source = source
+        self.rng = rng
+        self.noise = noise
+        self.first = rng.choice(FIRST_NAMES)
+        self.last = rng.choice(LAST_NAMES)
+        self.age = rng.randint(1, 85)
+        self.category = rng.choice(source.categories) if source.categories else None
+
+    def _dataset_answer(self, intent):
+        pool = self.source.by_category.get((self.category, intent)) or self.source.by_intent[intent]
+        return self.rng.choice(pool)
+
+    def answer(self, state):
+        if self.noise and self.rng.random() < self.noise:
+            return self._dataset_answer(self.rng.choice(NOISE_INTENTS))
+        if state == 'nama':
+            return self.rng.choice(NAME_TEMPLATES).format(first=self.first, last=self.last)
+        if state == 'nama_panggilan':
+            return self.rng.choice(NICKNAME_TEMPLATES).format(first=self.first)
+        if state == 'umur':
+            return self.rng.choice(AGE_TEMPLATES).format(age=self.age)
+        if state == 'jenis_kelamin':
+            return self.rng.choice(GENDERS)
+        return self._dataset_answer(STATE_INTENTS[state])
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.by_state = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.completed = 0
+        self.abandoned = 0
+        self.failed = 0
+        self.turns_per_completed = []
+        self.retries = 0
+
+    def turn(self, state, seconds, status):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.by_state[state].append(seconds)
+            self.statuses[status] += 1
+
+
+def converse(send, patient, results, max_turns):
+    """Run one conversation through `send(message, session_id) -> (status, body)`"""
+    status, body = send('', None)
+    if status != 200:
+        with results.lock:
+            results.statuses[status] += 1
+        return 'failed'
+    # The greeting reply already asks for the name (its state is still 'greeting')
+    session_id, state = body['session_id'], 'nama'
+    turns = 0
+    while state != 'summary':
+        if turns == max_turns:
+            return 'abandoned'
+        asked = state
+        start = time.perf_counter()
+        status, body = send(patient.answer(state), session_id)
+        results.turn(asked, time.perf_counter() - start, status)
+        turns += 1
+        if status != 200:
+            return 'failed'
+        state = body['state']
+        if state == asked:
+            with results.lock:
+                results.retries += 1
+    with results.lock:
+        results.turns_per_completed.append(turns)
+    return 'completed'
+
+
+def record(results, outcome):
+    with results.lock:
+        if outcome == 'completed':
+            results.completed += 1
+        elif outcome == 'abandoned':
+            results.abandoned += 1
+        else:
+            results.failed += 1
+
+
+def run_sessions(args, source, connect):
+    """Run --conversations over --sessions threads; connect() -> (send, close) per thread"""
+    results = Results()
+    seeds = iter(range(args.seed, args.seed + args.conversations))
+    seeds_lock = threading.Lock()
+
+    def worker():
+        send, close = connect()
+        while True:
+            with seeds_lock:
+                seed = next(seeds, None)
+            if seed is None:
+                break
+            try:
+                outcome = converse(send, Patient(source, random.Random(seed), args.noise), results, args.max_turns)
+            except Exception as exc:
+                with results.lock:
+                    results.errors[type(exc).__name__] += 1
+                close()
+                send, close = connect()
+                outcome = 'failed'
+            record(results, outcome)
+        close()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def run_inprocess(args, source):
+    """app.chat() on an event loop thread, as uvicorn would run it, without HTTP"""
+    import app
+    from fastapi import HTTPException
+
+    if not args.keep_cache:
+        app.preprocess_cache.maxsize = 0
+        app.intent_cache.maxsize = 0
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    async def chat(message, session_id):
+        try:
+            return 200, await app.chat(app.ChatRequest(message=message, session_id=session_id))
+        except HTTPException as exc:
+            return exc.status_code, None
+
+    def connect():
+        return lambda message, session_id: asyncio.run_coroutine_threadsafe(chat(message, session_id), loop).result(), \
+            lambda: None
+
+    app.inference.start()
+    try:
+        rss_before = rss_bytes()
+        results, elapsed = run_sessions(args, source, connect)
+        rss_after = rss_bytes()
+    finally:
+        app.inference.shutdown()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+    return results, elapsed, rss_before, rss_after, app.resources.bundle.version
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    port = free_port()
+    env = dict(os.environ, SESSION_STORE=args.session_store)
+    if not args.keep_cache:
+        env.update(PREPROCESS_CACHE_SIZE='0', INTENT_CACHE_SIZE='0')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if http_request('127.0.0.1', port, 'GET', '/health')[0] == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('uvicorn did not start')
+
+
+def http_request(host, port, method, path):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request(method, path)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, json.loads(data) if data else None
+
+
+def run_http(args, source):
+    """/chat over keep-alive connections, one per session thread"""
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        proc, port = start_server(args)
+        host = '127.0.0.1'
+    headers = {'Content-Type': 'application/json'}
+
+    def connect():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+
+        def send(message, session_id):
+            conn.request('POST', '/chat', json.dumps({'message': message, 'session_id': session_id}), headers)
+            response = conn.getresponse()
+            data = response.read()
+            return response.status, json.loads(data) if response.status == 200 else None
+
+        return send, conn.close
+
+    try:
+        version = http_request(host, port, 'GET', '/health')[1].get('model_version')
+        # Memory is only known for a server spawned here
+        rss_before = rss_bytes(proc.pid) if proc else None
+        results, elapsed = run_sessions(args, source, connect)
+        rss_after = rss_bytes(proc.pid) if proc else None
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    return results, elapsed, rss_before, rss_after, version
+
+
+def build_report(args, results, elapsed, rss_before, rss_after, model_version):
+    started = results.completed + results.abandoned + results.failed
+    turns = len(results.latencies)
+    growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return {
+        'format_version': REPORT_FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {
+            'target': args.target, 'conversations': args.conversations, 'sessions': args.sessions,
+            'noise': args.noise, 'max_turns': args.max_turns, 'seed': args.seed, 'keep_cache': args.keep_cache,
+            'executor': os.environ.get('INFERENCE_EXECUTOR', 'inline'), 'cpus': os.cpu_count(),
+            'model_version': model_version,
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput': {
+            'turns_per_second': round(turns / elapsed, 2) if elapsed else None,
+            'conversations_per_second': round(results.completed / elapsed, 2) if elapsed else None,
+        },
+        'latency_ms': latency_summary(results.latencies),
+        'latency_ms_by_state': {state: latency_summary(values) for state, values in sorted(results.by_state.items())},
+        'sessions': {
+            'started': started,
+            'completed': results.completed,
+            'abandoned': results.abandoned,
+            'failed': results.failed,
+            'completion_rate': round(results.completed / started, 4) if started else None,
+            'mean_turns_to_summary': (round(sum(results.turns_per_completed) / len(results.turns_per_completed), 2)
+                                      if results.turns_per_completed else None),
+            'retry_turns': results.retries,
+        },
+        'turns': {'total': turns, 'status_codes': {str(code): count for code, count in sorted(results.statuses.items())},
+                  'errors': dict(results.errors)},
+        'memory': {
+            'rss_before_bytes': rss_before,
+            'rss_after_bytes': rss_after,
+            'growth_bytes': growth,
+            'growth_per_session_bytes': round(growth / started) if growth is not None and started else None,
+        },
+    }
+
+
+# (path into the report, direction): 'higher' means larger is better
+GATES = (
+    (('throughput', 'turns_per_second'), 'higher'),
+    (('latency_ms', 'p50'), 'lower'),
+    (('latency_ms', 'p99'), 'lower'),
+    (('sessions', 'completion_rate'), 'higher'),
+    (('memory', 'growth_per_session_bytes'), 'lower'),
+)
+
+
+def compare(report, baseline, tolerance):
+    """Regressions of `report` against `baseline` beyond the relative `tolerance`"""
+    regressions = []
+    for path, direction in GATES:
+        current, previous = report, baseline
+        for key in path:
+            current = (current or {}).get(key)
+            previous = (previous or {}).get(key)
+        if current is None or previous is None or previous <= 0:
+            continue
+        change = current / previous - 1
+        if (direction == 'higher' and change < -tolerance) or (direction == 'lower' and change > tolerance):
+            regressions.append({'metric': '.'.join(path), 'baseline': previous, 'current': current,
+                                'change': round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', choices=('inprocess', 'http'), default='inprocess')
+    parser.add_argument('--url', help='existing server for --target http (default: spawn uvicorn)')
+    parser.add_argument('--dataset', default=PROCESSED_CSV)
+    parser.add_argument('--conversations', type=int, default=500)
+    parser.add_argument('--sessions', type=int, default=32, help='concurrent conversations')
+    parser.add_argument('--noise', type=float, default=0.05, help='chance of a greeting/thanks/unclear turn')
+    parser.add_argument('--max-turns', type=int, default=60, help='give up on a conversation after this many turns')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--session-store', default='memory')
+    parser.add_argument('--keep-cache', action='store_true')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    source = ConversationSource(args.dataset)
+    run = run_inprocess if args.target == 'inprocess' else run_http
+    report = build_report(args, *run(args, source))
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    latency, sessions = report['latency_ms'], report['sessions']
+    print(f"{report['turns']['total']} turns in {report['elapsed_seconds']} s "
+          f"({report['throughput']['turns_per_second']} turns/s), p50 {latency.get('p50')} ms, "
+          f"p99 {latency.get('p99')} ms, completed {sessions['completed']}/{sessions['started']}", file=sys.stderr)
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+              f"({regression['change']:+.1%})", file=sys.stderr)
+    return 1 if report.get('regressions') or sessions['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
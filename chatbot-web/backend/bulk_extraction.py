@@ -0,0 +1,245 @@
+"""Bulk entity extraction for offline analytics (logged messages, datasets).
+
+Gives the same entities as EntityExtractor.extract_all(text) for every row
+of a pandas Series (or an Arrow array / any iterable of str), returned as a
+columnar table: one column per entity, umur as nullable Int64 (Python ints
+in an object column for a chunk with an age past int64) and symptoms as a
+list column. Instead of one Python call per row, each chunk is
+lowercased and joined with NUL separators, and every pattern runs once over
+the whole chunk:
+
+- nama, umur and durasi: one finditer() per serving regex (durasi: the
+  first match with the best-ranked context per row, then the simple and
+  relative patterns);
+- lokasi, severity, symptoms and jenis_kelamin: one Aho-Corasick scan.
+
+Hits are mapped back to rows with searchsorted on the row offsets and
+reduced per row with NumPy sorts.
+
+workers > 1 splits the input into chunks processed on a multiprocessing
+pool.
+
+Usage (from chatbot-web/backend):
+    python bulk_extraction.py input.csv [--column Raw_Text] [--output entities.jsonl|.parquet] [--workers 4]
+"""
+import argparse
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from keyword_matcher import KeywordMatcher
+from message_analysis import KEYWORD_CLASSES
+from model_bundle import DEFAULT_BUNDLE_PATH
+from text_patterns import (
+    DURATION_CONTEXT_RANK, DURATION_CONTEXT_RE, DURATION_RELATIVE_RE, DURATION_SIMPLE_RE, NAMA_RE, UMUR_RE,
+)
+
+ENTITY_COLUMNS = ('nama', 'umur', 'jenis_kelamin', 'durasi', 'lokasi', 'severity', 'symptoms')
+GENDER_KINDS = ('gender_male', 'gender_female')
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def _as_series(texts):
+    """pandas Series of str from a Series, an Arrow Array/ChunkedArray or an iterable"""
+    if not isinstance(texts, pd.Series):
+        # Arrow arrays (and anything else with to_pandas) without importing pyarrow here
+        texts = texts.to_pandas() if hasattr(texts, 'to_pandas') else pd.Series(list(texts), dtype=object)
+    return texts.fillna('').astype(str)
+
+
+class BulkEntityExtractor:
+    """Column-at-a-time EntityExtractor.extract_all over the same dictionaries"""
+
+    def __init__(self, symptoms_dict, severity_dict, location_dict, keyword_classes=KEYWORD_CLASSES):
+        self.dictionaries = (symptoms_dict, severity_dict, location_dict)
+        self.keyword_classes = {kind: keyword_classes[kind] for kind in GENDER_KINDS}
+        entries = KeywordMatcher.dictionary_entries(symptoms_dict, severity_dict, location_dict)
+        for kind, keywords in self.keyword_classes.items():
+            entries.extend((keyword, kind, kind) for keyword in keywords)
+        self.matcher = KeywordMatcher(entries)
+        # Empty keywords match every row (the joined scan would report them once)
+        self._always = [(kind, label) for keyword, kind, label in self.matcher.patterns if not keyword]
+        # (kind, label) -> (kind id, label rank), and the labels of each kind by rank
+        self._kind_ids = {kind: i for i, kind in enumerate(self.matcher.label_rank)}
+        self._codes = {(kind, label): (self._kind_ids[kind], rank)
+                       for kind, ranks in self.matcher.label_rank.items() for label, rank in ranks.items()}
+        self._labels = {kind: sorted(ranks, key=ranks.__getitem__) for kind, ranks in self.matcher.label_rank.items()}
+
+    @classmethod
+    def from_bundle(cls, path=DEFAULT_BUNDLE_PATH):
+        from model_bundle import ModelBundle
+
+        return cls(*ModelBundle(path).dictionaries())
+
+    def extract(self, texts, workers=1, chunksize=20000):
+        """DataFrame of ENTITY_COLUMNS, one row per text (index kept from a Series input)"""
+        texts = _as_series(texts)
+        if workers <= 1 or len(texts) <= chunksize:
+            return self._extract_chunk(texts)
+        chunks = [texts.iloc[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+        with Pool(workers, initializer=_init_worker, initargs=(self.dictionaries, self.keyword_classes)) as pool:
+            return pd.concat(pool.map(_extract_in_worker, chunks))
+
+    def extract_arrow(self, texts, workers=1, chunksize=20000):
+        """Same table as a pyarrow.Table (requires pyarrow)"""
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(self.extract(texts, workers, chunksize), preserve_index=False)
+
+    def _extract_chunk(self, texts):
+        chunk = _JoinedChunk(texts.str.lower().tolist())
+        n = chunk.size
+        frame = pd.DataFrame(index=texts.index)
+
+        rows, matches = chunk.first_matches(NAMA_RE)
+        frame['nama'] = chunk.column(rows, [match.group(1).title() for match in matches])
+        rows, matches = chunk.first_matches(UMUR_RE)
+        ages = [int(match.group(1)) for match in matches]
+        if ages and max(ages) > INT64_MAX:
+            # UMUR_RE takes any digit run; keep the values extract_all() returns instead of overflowing
+            frame['umur'] = chunk.column(rows, ages)
+        else:
+            umur = np.zeros(n, dtype=np.int64)
+            umur[rows] = ages
+            missing = np.ones(n, dtype=bool)
+            missing[rows] = False
+            frame['umur'] = pd.arrays.IntegerArray(umur, missing)
+
+        dictionary_columns = self._dictionary_columns(chunk)
+        frame['jenis_kelamin'] = dictionary_columns['jenis_kelamin']
+        frame['durasi'] = self._durasi(chunk)
+        for name in ('lokasi', 'severity', 'symptoms'):
+            frame[name] = dictionary_columns[name]
+        return frame
+
+    def _durasi(self, chunk):
+        # Pattern 1: per row, the first match among those with the best-ranked context
+        matches = list(DURATION_CONTEXT_RE.finditer(chunk.joined))
+        rows = chunk.rows([match.start() for match in matches])
+        ranks = np.array([DURATION_CONTEXT_RANK[match.group(1)] for match in matches], dtype=np.int64)
+        order = np.lexsort((np.arange(len(matches)), ranks, rows))
+        best = order[np.unique(rows[order], return_index=True)[1]]
+        durasi = chunk.column(rows[best], [matches[i].group(0) for i in best])
+
+        # Patterns 2 and 3 only where nothing matched yet
+        for pattern in (DURATION_SIMPLE_RE, DURATION_RELATIVE_RE):
+            rows, matches = chunk.first_matches(pattern)
+            for row, match in zip(rows.tolist(), matches):
+                if durasi[row] is None:
+                    durasi[row] = match.group(0)
+        return durasi
+
+    def _dictionary_columns(self, chunk):
+        n = chunk.size
+        codes = self._codes
+        found = [(match.start, *codes[match.kind, match.label])
+                 for match in self.matcher.find_all(chunk.joined) if match.end > match.start]
+        found = np.array(found, dtype=np.int64).reshape(-1, 3)
+        rows, kind_ids, ranks = chunk.rows(found[:, 0]), found[:, 1], found[:, 2]
+        for kind, label in self._always:
+            kind_id, rank = codes[kind, label]
+            rows = np.concatenate([rows, np.arange(n)])
+            kind_ids = np.concatenate([kind_ids, np.full(n, kind_id)])
+            ranks = np.concatenate([ranks, np.full(n, rank)])
+
+        def hits(kind):
+            """Distinct (row, label rank) pairs of a kind, sorted by row then rank"""
+            selected = kind_ids == self._kind_ids.get(kind, -1)
+            pairs = np.unique(np.stack([rows[selected], ranks[selected]], axis=1), axis=0)
+            return pairs[:, 0], pairs[:, 1]
+
+        columns = {}
+        for kind in ('lokasi', 'severity'):
+            # Lowest rank per row = the label a dictionary-order scan finds first
+            kind_rows, kind_ranks = hits(kind)
+            first = np.unique(kind_rows, return_index=True)[1]
+            names = self._labels[kind]
+            columns[kind] = chunk.column(kind_rows[first], [names[rank] for rank in kind_ranks[first].tolist()])
+
+        kind_rows, kind_ranks = hits('symptoms')
+        names = self._labels['symptoms']
+        symptoms = [[] for _ in range(n)]
+        for row, rank in zip(kind_rows.tolist(), kind_ranks.tolist()):
+            symptoms[row].append(names[rank])
+        columns['symptoms'] = symptoms
+
+        male = np.zeros(n, dtype=bool)
+        male[hits('gender_male')[0]] = True
+        female = np.zeros(n, dtype=bool)
+        female[hits('gender_female')[0]] = True
+        columns['jenis_kelamin'] = np.where(male, 'Laki-laki', np.where(female, 'Perempuan', None))
+        return columns
+
+
+class _JoinedChunk:
+    """Lowercased texts joined with NUL separators, scanned once per pattern
+
+    Neither the regexes nor any keyword can match across a NUL (no anchors or
+    lookbehinds, no keyword contains one), so the first match starting in a
+    row's span is what a per-row search would return.
+    """
+
+    def __init__(self, texts):
+        self.size = len(texts)
+        self.joined = '\x00'.join(texts)
+        self.starts = np.zeros(self.size, dtype=np.int64)
+        if self.size > 1:
+            np.cumsum([len(text) + 1 for text in texts[:-1]], out=self.starts[1:])
+
+    def rows(self, positions):
+        return np.searchsorted(self.starts, np.asarray(positions, dtype=np.int64), side='right') - 1
+
+    def first_matches(self, pattern):
+        """(rows, matches): each row's first match, for the rows that have one"""
+        matches = list(pattern.finditer(self.joined))
+        rows = self.rows([match.start() for match in matches])
+        rows, first = np.unique(rows, return_index=True)
+        return rows, [matches[i] for i in first.tolist()]
+
+    def column(self, rows, values):
+        column = np.full(self.size, None, dtype=object)
+        column[rows] = values
+        return column
+
+
+# Set in each pool worker by _init_worker()
+_worker_extractor = None
+
+
+def _init_worker(dictionaries, keyword_classes):
+    global _worker_extractor
+    _worker_extractor = BulkEntityExtractor(*dictionaries, keyword_classes=keyword_classes)
+
+
+def _extract_in_worker(texts):
+    return _worker_extractor._extract_chunk(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help='CSV or JSONL file')
+    parser.add_argument('--column', default='Raw_Text')
+    parser.add_argument('--output', help='.jsonl or .parquet (default: print a preview)')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunksize', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.input.endswith('.jsonl'):
+        texts = pd.read_json(args.input, lines=True)[args.column]
+    else:
+        texts = pd.read_csv(args.input, usecols=[args.column])[args.column]
+    start = time.perf_counter()
+    entities = BulkEntityExtractor.from_bundle().extract(texts, args.workers, args.chunksize)
+    print(f"Extracted {len(entities)} rows in {time.perf_counter() - start:.2f} s")
+    if args.output and args.output.endswith('.parquet'):
+        entities.to_parquet(args.output, index=False)
+    elif args.output:
+        entities.to_json(args.output, orient='records', lines=True, force_ascii=False)
+    else:
+        print(entities.head(20).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""Write-behind conversation log (audit and retraining data).
+
+ConversationLogger.log() only appends the turn record to a bounded
+in-memory queue; a background thread wakes every flush_interval, drains it
+in batches and appends them to segment files under the log directory,
+rotated by record count and age:
+
+    turns-<UTC start>-<pid>-<seq>.jsonl                one JSON object per line, appended per batch
+    turns-<UTC start>-<pid>-<seq>.part-<part>.npz      compressed columnar part of a segment (text
+                                                       columns as UTF-8 blob + offsets like
+                                                       dataset_store.py, None stored as '',
+                                                       states/intents as codes + categories,
+                                                       entities as JSON text)
+
+An npz segment only holds rows in memory until part_records of them are
+buffered or the oldest is part_seconds old; then they are saved as the
+next self-contained part file (temp file + rename), so a crash loses at
+most that much. `written` counts records once they are in a file.
+
+When the queue is full the policy decides: 'drop' discards the new record
+right away, 'block' waits up to block_timeout seconds for room (back
+pressure on the caller) and then drops it. Dropped records are counted.
+Called on a thread running an asyncio event loop (the async /chat
+handlers), 'block' never waits there: the wait is handed to the loop's
+default executor, at most block_handoffs at a time (beyond that the record
+is dropped), so a full queue doesn't stall every request. A handed-off
+record can therefore reach the file after records logged later; log()
+numbers every record it is given ('seq', per logger, gaps are dropped
+records), so sort by seq to read them back in log() order.
+
+Read segments back (from chatbot-web/backend):
+    python conversation_log.py <segment> [...]
+"""
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from dataset_store import _decode_text, _encode_text
+
+FORMATS = ('jsonl', 'npz')
+POLICIES = ('drop', 'block')
+RECORD_FIELDS = ('ts', 'session_id', 'state', 'message', 'processed', 'intent', 'confidence', 'entities',
+                 'is_valid', 'next_state')
+# Fields of a written record: log() adds seq
+WRITTEN_FIELDS = RECORD_FIELDS + ('seq',)
+# Columnar layout: low-cardinality text as codes, free text as blob + offsets
+_CATEGORICAL = ('state', 'intent', 'next_state')
+_TEXT = ('session_id', 'message', 'processed')
+
+
+class ConversationLogger:
+    """Bounded queue + background flusher writing rotating segment files"""
+
+    def __init__(self, directory, fmt='jsonl', queue_size=10000, policy='drop', block_timeout=0.05,
+                 block_handoffs=64, batch_size=32, flush_interval=0.1, segment_records=100000, segment_seconds=3600,
+                 part_records=5000, part_seconds=5.0):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown conversation log format: {fmt}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown conversation log policy: {policy}")
+        self.directory = directory
+        self.fmt = fmt
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.block_handoffs = block_handoffs
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_records = segment_records
+        self.segment_seconds = segment_seconds
+        self.part_records = part_records
+        self.part_seconds = part_seconds
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._handoffs = 0
+        self._handoff_lock = threading.Lock()
+        # log() runs on request threads and executor threads; the writer thread owns written/batches/errors
+        self._seq = itertools.count()
+        self._count_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._segment = None
+        self._segments = 0
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='conversation-log', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Write everything still queued and close the current segment"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def log(self, record):
+        """Queue one turn record (a dict with RECORD_FIELDS, numbered in place with its seq); False if it
+        was dropped (True for a record handed off to wait for room, see the module docstring)"""
+        # Numbered before any handoff so the write order can be restored
+        record['seq'] = next(self._seq)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if self.policy == 'block':
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    return self._put_blocking(record)
+                with self._handoff_lock:
+                    handoff = self._handoffs < self.block_handoffs
+                    if handoff:
+                        self._handoffs += 1
+                if handoff:
+                    loop.run_in_executor(None, self._handoff, record)
+                    return True
+            return self._count(False)
+        return self._count(True)
+
+    def _put_blocking(self, record):
+        try:
+            self._queue.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            return self._count(False)
+        return self._count(True)
+
+    def _count(self, queued):
+        with self._count_lock:
+            if queued:
+                self.logged += 1
+            else:
+                self.dropped += 1
+        return queued
+
+    def _handoff(self, record):
+        try:
+            self._put_blocking(record)
+        finally:
+            with self._handoff_lock:
+                self._handoffs -= 1
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'waiting': self._handoffs, 'logged': self.logged,
+                'written': self.written, 'dropped': self.dropped, 'batches': self.batches, 'segments': self._segments,
+                'errors': self.errors, 'format': self.fmt, 'policy': self.policy}
+
+    def _run(self):
+        while True:
+            # Wake every flush_interval (or at close) and write everything queued in batch_size batches
+            stopping = self._stop.wait(self.flush_interval)
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                if self._guarded(self._write, batch):
+                    self.batches += 1
+                # Hand the GIL back to request threads between batches (bounds their wait to one batch)
+                time.sleep(0)
+            if stopping:
+                self._close_segment()
+                return
+            segment = self._segment
+            if segment is not None and time.time() - segment.opened >= self.segment_seconds:
+                self._close_segment()
+            elif segment is not None and segment.pending_since is not None \
+                    and time.time() - segment.pending_since >= self.part_seconds:
+                self._guarded(segment.flush)
+
+    def _guarded(self, write, *args):
+        # Keep serving (and logging) even if a write fails; write() returns the records it saved
+        try:
+            self.written += write(*args)
+            return True
+        except Exception as exc:
+            self.errors += 1
+            print(f"Conversation log write failed, records lost: {exc}")
+            return False
+
+    def _drain(self):
+        batch = []
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        written = 0
+        while batch:
+            if self._segment is None:
+                self._segments += 1
+                stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+                name = f'turns-{stamp}-{os.getpid()}-{self._segments:05d}'
+                if self.fmt == 'jsonl':
+                    self._segment = _JsonlSegment(os.path.join(self.directory, f'{name}.jsonl'))
+                else:
+                    self._segment = _ColumnarSegment(os.path.join(self.directory, name), self.part_records)
+            room = self.segment_records - self._segment.records
+            written += self._segment.append(batch[:room])
+            batch = batch[room:]
+            if self._segment.records >= self.segment_records:
+                segment, self._segment = self._segment, None
+                written += segment.close()
+        return written
+
+    def _close_segment(self):
+        if self._segment is not None:
+            segment, self._segment = self._segment, None
+            self._guarded(segment.close)
+
+
+class _JsonlSegment:
+    # Records are on disk once append() returns
+    pending_since = None
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self.opened = time.time()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, records):
+        self._file.write(''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                                 for record in records))
+        self._file.flush()
+        self.records += len(records)
+        return len(records)
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        self._file.close()
+        return 0
+
+
+class _ColumnarSegment:
+    # Rows are buffered and saved as numbered part files: <path>.part-00000.npz, ...
+    def __init__(self, path, part_records):
+        self.path = path
+        self.part_records = part_records
+        self.records = 0
+        self.parts = 0
+        self.opened = time.time()
+        # time.time() of the oldest buffered row, None when nothing is buffered
+        self.pending_since = None
+        self._rows = []
+
+    def append(self, records):
+        if records and not self._rows:
+            self.pending_since = time.time()
+        self._rows.extend(records)
+        self.records += len(records)
+        return self.flush() if len(self._rows) >= self.part_records else 0
+
+    def flush(self):
+        """Save the buffered rows as the next part; the number of records saved"""
+        rows, self._rows = self._rows, []
+        self.pending_since = None
+        if not rows:
+            return 0
+        arrays = {
+            'ts': np.array([row['ts'] for row in rows], dtype=np.float64),
+            'confidence': np.array([np.nan if row['confidence'] is None else row['confidence'] for row in rows],
+                                   dtype=np.float64),
+            # -1 = no validation (greeting turn)
+            'is_valid': np.array([-1 if row['is_valid'] is None else row['is_valid'] for row in rows], dtype=np.int8),
+            'seq': np.array([row['seq'] for row in rows], dtype=np.int64),
+        }
+        for name in _CATEGORICAL:
+            # Category 0 is None
+            codes = {None: 0}
+            arrays[f'{name}.codes'] = np.array([codes.setdefault(row[name], len(codes)) for row in rows],
+                                               dtype=np.int16)
+            arrays[f'{name}.categories.offsets'], arrays[f'{name}.categories.data'] = \
+                _encode_text([category or '' for category in list(codes)[1:]])
+        for name in _TEXT:
+            arrays[f'{name}.offsets'], arrays[f'{name}.data'] = _encode_text([row[name] or '' for row in rows])
+        entities = [json.dumps(row['entities'], ensure_ascii=False, separators=(',', ':')) for row in rows]
+        arrays['entities.offsets'], arrays['entities.data'] = _encode_text(entities)
+
+        path = f'{self.path}.part-{self.parts:05d}.npz'
+        self.parts += 1
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        return len(rows)
+
+    def close(self):
+        return self.flush()
+
+
+def read_segment(path):
+    """Records of one segment file or npz part as a list of dicts"""
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with np.load(path) as data:
+        columns = {name: _decode_text(data[f'{name}.offsets'], data[f'{name}.data']) for name in _TEXT}
+        for name in _CATEGORICAL:
+            categories = [None] + _decode_text(data[f'{name}.categories.offsets'], data[f'{name}.categories.data'])
+            columns[name] = [categories[code] for code in data[f'{name}.codes'].tolist()]
+        columns['entities'] = [json.loads(text) for text in
+                               _decode_text(data['entities.offsets'], data['entities.data'])]
+        columns['ts'] = data['ts'].tolist()
+        columns['confidence'] = [None if np.isnan(value) else value for value in data['confidence'].tolist()]
+        columns['is_valid'] = [None if value < 0 else bool(value) for value in data['is_valid'].tolist()]
+        columns['seq'] = data['seq'].tolist()
+    return [dict(zip(WRITTEN_FIELDS, values)) for values in zip(*(columns[name] for name in WRITTEN_FIELDS))]
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        for record in read_segment(path):
+            print(json.dumps(record, ensure_ascii=False))
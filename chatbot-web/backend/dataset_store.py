@@ -0,0 +1,176 @@
+"""Content-addressed store for processed datasets.
+
+An entry's key is the sha256 of the raw input's hash plus the
+preprocessing configuration, so re-running training on the same CSV with
+the same dictionaries reuses the stored result instead of writing another
+copy. Layout under the store root:
+
+    manifest.json        key -> rows, columns, parts, config, raw input
+    <key>/part-00000.npz one file per chunk, columnar
+
+Text columns are stored as one UTF-8 blob plus character offsets, and
+low-cardinality columns (intents) as int16 codes plus their categories.
+Entries are written to a temp directory and renamed into place.
+
+List entries (from chatbot-web/backend):
+    python dataset_store.py [store_dir]
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(BASE_DIR, 'data/processed')
+STORE_FORMAT_VERSION = 1
+_HASH_BLOCK = 1 << 20
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_text(values):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return offsets, np.frombuffer(''.join(values).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_text(offsets, data):
+    text = data.tobytes().decode('utf-8')
+    return [text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+class _EntryWriter:
+    def __init__(self, store, key, meta, categorical):
+        self.store = store
+        self.key = key
+        self.meta = meta
+        self.categorical = set(categorical)
+        self.categories = {name: {} for name in categorical}
+        self.tmp_dir = os.path.join(store.root, f'.{key}.tmp{os.getpid()}')
+        self.parts = 0
+        self.rows = 0
+        self.columns = None
+        os.makedirs(self.tmp_dir)
+
+    def write_part(self, columns):
+        """Append one chunk; `columns` maps column name -> list of str"""
+        if self.columns is None:
+            self.columns = list(columns)
+        arrays = {}
+        for name, values in columns.items():
+            if name in self.categorical:
+                codes = self.categories[name]
+                arrays[f'{name}.codes'] = np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.int16)
+            else:
+                arrays[f'{name}.offsets'], arrays[f'{name}.data'] = _encode_text(values)
+        np.savez_compressed(os.path.join(self.tmp_dir, f'part-{self.parts:05d}.npz'), **arrays)
+        self.parts += 1
+        self.rows += len(next(iter(columns.values())))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            return False
+        entry = dict(self.meta, rows=self.rows, parts=self.parts, columns=self.columns or [],
+                     categories={name: list(codes) for name, codes in self.categories.items()},
+                     created=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+        final_dir = os.path.join(self.store.root, self.key)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(self.tmp_dir, final_dir)
+        entry['bytes'] = sum(os.path.getsize(os.path.join(final_dir, name)) for name in os.listdir(final_dir))
+        self.store._update_manifest(entries={self.key: entry})
+        return False
+
+
+class ProcessedDatasetStore:
+    """Processed datasets keyed by raw input hash + preprocessing config"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        os.makedirs(root, exist_ok=True)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'format_version': STORE_FORMAT_VERSION, 'entries': {}, 'raw_files': {}}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['format_version'] != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset store version {manifest['format_version']}")
+        return manifest
+
+    def _update_manifest(self, entries=None, raw_files=None):
+        manifest = self._load_manifest()
+        manifest['entries'].update(entries or {})
+        manifest['raw_files'].update(raw_files or {})
+        tmp_path = f'{self.manifest_path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def raw_sha256(self, path):
+        """sha256 of a raw input, reusing the recorded hash while size and mtime are unchanged"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        recorded = self._load_manifest()['raw_files'].get(path)
+        if recorded and recorded['size'] == stat.st_size and recorded['mtime_ns'] == stat.st_mtime_ns:
+            return recorded['sha256']
+        sha256 = _sha256_file(path)
+        self._update_manifest(raw_files={path: {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                                'sha256': sha256}})
+        return sha256
+
+    def key_for(self, raw_path, config):
+        """Entry key for a raw input processed with `config` (a JSON-serializable dict)"""
+        payload = json.dumps({'raw_sha256': self.raw_sha256(raw_path), 'config': config}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def entry(self, key):
+        entry = self._load_manifest()['entries'].get(key)
+        if entry is None or not os.path.isdir(os.path.join(self.root, key)):
+            return None
+        return entry
+
+    def __contains__(self, key):
+        return self.entry(key) is not None
+
+    def writer(self, key, meta, categorical=()):
+        """Context manager collecting parts for a new entry; committed on clean exit"""
+        return _EntryWriter(self, key, meta, categorical)
+
+    def iter_parts(self, key, columns=None):
+        """Yield each part as a dict of column name -> list of str"""
+        entry = self.entry(key)
+        if entry is None:
+            raise KeyError(key)
+        columns = columns or entry['columns']
+        for i in range(entry['parts']):
+            with np.load(os.path.join(self.root, key, f'part-{i:05d}.npz')) as data:
+                part = {}
+                for name in columns:
+                    if name in entry['categories']:
+                        categories = entry['categories'][name]
+                        part[name] = [categories[code] for code in data[f'{name}.codes']]
+                    else:
+                        part[name] = _decode_text(data[f'{name}.offsets'], data[f'{name}.data'])
+                yield part
+
+
+if __name__ == '__main__':
+    store = ProcessedDatasetStore(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_STORE_DIR)
+    for key, entry in sorted(store._load_manifest()['entries'].items(), key=lambda item: item[1]['created']):
+        print(f"{key[:16]}  {entry['created']}  {entry['rows']:>9} rows  {entry['bytes'] / 1024:8.0f} KiB  "
+              f"{os.path.basename(entry.get('raw_path', '?'))}")
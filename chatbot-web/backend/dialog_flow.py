@@ -0,0 +1,130 @@
+"""Declarative dialog flow compiled into integer-indexed tables.
+
+The flow (data/dialog_flow.json) lists the states in order with their
+question, retry variants, expected intents and an optional `accept_if`
+validator, plus the prefill rules that fill later states from entities
+found in an earlier answer. CompiledFlow turns it into tuples indexed by
+state number so a turn never searches the flow:
+
+- fingerprint               8-byte hash of the definition (stored with
+                            serialized sessions, which index these tables)
+- next_state[i]             the state after i (summary maps to itself)
+- expected[i]               frozenset of accepted intents, None = anything
+- priors[i]                 intent -> prior probability used when scoring is
+                            restricted to the state's intents (optional "prior")
+- validators[i]             (accepts(analysis, result), intent) or None
+- prefill                   rules with the state window they apply in
+- next_unfilled(i, filled)  first state >= i whose bit is not set in the
+                            `filled` bitmask (lowest set bit of
+                            ~filled & from_mask[i]), at the latest summary
+
+Validators get the message's MessageAnalysis (message_analysis.py) and the
+prediction result: {"keywords": [...]} accepts when any keyword is a
+substring of the normalized message (flagged by the analysis scan, see
+keyword_classes), {"pattern": NAME} when the text_patterns regex NAME
+matches it, and {"result": FIELD} when the result has a truthy FIELD.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from types import MappingProxyType
+
+import text_patterns
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FLOW_PATH = os.path.join(BASE_DIR, 'data/dialog_flow.json')
+FLOW_FORMAT_VERSION = 1
+
+# Fill `state` from entities[entity] while the current state index is in [lo, hi]; the stored
+# message is prefix + value + suffix (the rule's "message" template split around {value})
+PrefillRule = namedtuple('PrefillRule', ['state', 'bit', 'entity', 'prefix', 'suffix', 'intent', 'lo', 'hi'])
+
+
+def _validator(spec, state):
+    if 'keywords' in spec:
+        # Flagged by the message analysis scan (keyword_classes)
+        kind = f'accept:{state}'
+        return lambda analysis, result: kind in analysis.flags
+    if 'pattern' in spec:
+        pattern = getattr(text_patterns, spec['pattern'], None)
+        if not isinstance(pattern, re.Pattern):
+            raise ValueError(f"State {state}: unknown pattern {spec['pattern']!r}")
+        return lambda analysis, result: pattern.search(analysis.text) is not None
+    if 'result' in spec:
+        field = spec['result']
+        return lambda analysis, result: bool(result[field])
+    raise ValueError(f"State {state}: accept_if needs keywords, pattern or result")
+
+
+class CompiledFlow:
+    """Immutable tables for one flow definition (shared by every session)"""
+
+    def __init__(self, definition):
+        if definition.get('format_version') != FLOW_FORMAT_VERSION:
+            raise ValueError(f"Unsupported dialog flow version {definition.get('format_version')}")
+        specs = definition['states']
+        self.fingerprint = hashlib.sha256(json.dumps(definition, sort_keys=True, ensure_ascii=False)
+                                          .encode('utf-8')).digest()[:8]
+        self.states = tuple(spec['name'] for spec in specs)
+        if len(set(self.states)) != len(self.states):
+            raise ValueError("Duplicate state names in dialog flow")
+        if self.states[-1] != 'summary':
+            raise ValueError("The last dialog state must be 'summary'")
+        self.index = MappingProxyType({state: i for i, state in enumerate(self.states)})
+        self.summary = len(self.states) - 1
+        self.max_retries = definition.get('max_retries', 2)
+
+        self.next_state = tuple(min(i + 1, self.summary) for i in range(len(self.states)))
+        self.questions = tuple(spec.get('question', '') for spec in specs)
+        self.retry_messages = tuple(tuple(spec.get('retry', ())) for spec in specs)
+        # An absent or empty "expect" accepts any intent
+        self.expected = tuple(frozenset(spec['expect']) if spec.get('expect') else None for spec in specs)
+        self.priors = tuple(MappingProxyType(dict(spec.get('prior', {}))) for spec in specs)
+        self.validators = tuple(
+            (_validator(spec['accept_if'], spec['name']), spec['accept_if']['intent']) if 'accept_if' in spec else None
+            for spec in specs
+        )
+
+        # Keyword sets of the accept_if rules, scanned with the rest of the message analysis
+        self.keyword_classes = MappingProxyType({f"accept:{spec['name']}": tuple(spec['accept_if']['keywords'])
+                                                 for spec in specs if 'keywords' in spec.get('accept_if', {})})
+
+        # Name-keyed views (states without retries / "expect" are left out, as before)
+        self.questions_by_state = MappingProxyType(dict(zip(self.states, self.questions)))
+        self.retry_by_state = MappingProxyType({spec['name']: tuple(spec['retry']) for spec in specs if 'retry' in spec})
+        self.expect_by_state = MappingProxyType({spec['name']: tuple(spec['expect']) for spec in specs
+                                                 if 'expect' in spec})
+
+        rules = []
+        for rule in definition.get('prefill', ()):
+            for key in ('state', 'from', 'until'):
+                if key in rule and rule[key] not in self.index:
+                    raise ValueError(f"Prefill rule refers to unknown state {rule[key]!r}")
+            prefix, placeholder, suffix = rule['message'].partition('{value}')
+            if not placeholder:
+                raise ValueError(f"Prefill message for {rule['state']} has no {{value}}")
+            state_idx = self.index[rule['state']]
+            rules.append(PrefillRule(state_idx, 1 << state_idx, rule['entity'], prefix, suffix, rule['intent'],
+                                     self.index[rule['from']] if 'from' in rule else 0,
+                                     self.index[rule['until']] if 'until' in rule else self.summary))
+        self.prefill = tuple(rules)
+
+        # Bits for states i..summary
+        full = (1 << len(self.states)) - 1
+        self.from_mask = tuple(full & ~((1 << i) - 1) for i in range(len(self.states)))
+        self._summary_bit = 1 << self.summary
+
+    def bit(self, state):
+        return 1 << self.index[state]
+
+    def next_unfilled(self, state_idx, filled):
+        """First state index >= state_idx not set in the `filled` bitmask (summary counts as never filled)"""
+        open_states = (~filled | self._summary_bit) & self.from_mask[state_idx]
+        return (open_states & -open_states).bit_length() - 1
+
+
+def load_flow(path=DEFAULT_FLOW_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return CompiledFlow(json.load(f))
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+MODES = ('inline', 'thread', 'process')
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+def _load_module(name):
+    # Importing the app module loads the models once in each worker process
+    importlib.import_module(name)
+
+
+def _ready():
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """Runs CPU-bound inference off the event loop with a bounded queue.
+
+    mode='inline' calls the function directly (no pool), 'thread' uses a
+    ThreadPoolExecutor and 'process' a spawn-based ProcessPoolExecutor whose
+    workers import `module` once at startup. At most `workers + queue_size`
+    calls are in flight; further calls fail fast with ExecutorOverloaded.
+    """
+
+    def __init__(self, mode='inline', workers=None, queue_size=64, module=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.module = module
+        self.max_pending = self.workers + queue_size
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._pool = None
+
+    def _create_pool(self):
+        if self.mode == 'thread':
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='inference')
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_load_module if self.module else None,
+            initargs=(self.module,) if self.module else (),
+        )
+        # Start every worker now so model loading doesn't land on the first requests
+        for future in [pool.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def start(self):
+        if self._pool is None and self.mode != 'inline':
+            self._pool = self._create_pool()
+        return self
+
+    def restart(self):
+        """Replace process workers (they reload the models); calls already running finish on the old pool"""
+        if self.mode != 'process' or self._pool is None:
+            return
+        old_pool, self._pool = self._pool, self._create_pool()
+        old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn, *args):
+        """Run fn(*args) according to the mode (fn must be picklable in process mode)"""
+        if self.mode == 'inline':
+            result = fn(*args)
+            self.completed += 1
+            return result
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"{self.pending} inference calls already pending")
+
+        self.start()
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'workers': 0 if self.mode == 'inline' else self.workers,
+            'max_pending': self.max_pending,
+            'pending': self.pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
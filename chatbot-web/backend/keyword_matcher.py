@@ -0,0 +1,114 @@
+from collections import namedtuple
+
+# A single keyword hit: text[start:end] == keyword (positions refer to the scanned text)
+KeywordMatch = namedtuple('KeywordMatch', ['start', 'end', 'kind', 'label', 'keyword'])
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every dictionary keyword in one pass"""
+
+    def __init__(self, entries):
+        # entries: iterable of (keyword, kind, label); order defines priority
+        self.patterns = []
+        self.label_rank = {}
+        self._always = []  # empty keywords match every text (same as '' in text)
+
+        goto = [{}]
+        outputs = [[]]
+        for keyword, kind, label in entries:
+            pattern_id = len(self.patterns)
+            self.patterns.append((keyword, kind, label))
+            ranks = self.label_rank.setdefault(kind, {})
+            if label not in ranks:
+                ranks[label] = len(ranks)
+            if not keyword:
+                self._always.append(pattern_id)
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                node = nxt
+            outputs[node].append(pattern_id)
+
+        # Breadth-first pass: failure links, then a full transition table so that
+        # scanning is a single dict lookup per character
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            delta[node] = dict(delta[fail[node]])
+            delta[node].update(goto[node])
+            outputs[node] = outputs[node] + outputs[fail[node]]
+            for ch, child in goto[node].items():
+                fail[child] = delta[fail[node]].get(ch, 0)
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+        self._lengths = [len(keyword) for keyword, _, _ in self.patterns]
+
+    @classmethod
+    def from_dictionaries(cls, symptoms_dict, severity_dict, location_dict):
+        """Build one automaton over the symptom, severity and location dictionaries"""
+        return cls(cls.dictionary_entries(symptoms_dict, severity_dict, location_dict))
+
+    @staticmethod
+    def dictionary_entries(symptoms_dict, severity_dict, location_dict):
+        """(keyword, kind, label) entries for the three dictionaries, in priority order"""
+        entries = []
+        for symptom, info in symptoms_dict.items():
+            entries.append((symptom, 'symptoms', symptom))
+            for synonym in info.get('synonyms', []):
+                entries.append((synonym, 'symptoms', symptom))
+        for location, keywords in location_dict.items():
+            for keyword in keywords:
+                entries.append((keyword, 'lokasi', location))
+        for severity, info in severity_dict.items():
+            for keyword in info['keywords']:
+                entries.append((keyword, 'severity', severity))
+        return entries
+
+    def find_all(self, text):
+        """Return every (possibly overlapping) keyword occurrence in text"""
+        delta = self._delta
+        outputs = self._outputs
+        lengths = self._lengths
+        patterns = self.patterns
+
+        matches = []
+        for pattern_id in self._always:
+            keyword, kind, label = patterns[pattern_id]
+            matches.append(KeywordMatch(0, 0, kind, label, keyword))
+
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for pattern_id in outputs[state]:
+                    keyword, kind, label = patterns[pattern_id]
+                    matches.append(KeywordMatch(end - lengths[pattern_id], end, kind, label, keyword))
+        return matches
+
+    def first_label(self, matches, kind):
+        """Label that a dictionary-order scan would return first (or None)"""
+        ranks = self.label_rank.get(kind, {})
+        best = None
+        for match in matches:
+            if match.kind == kind and (best is None or ranks[match.label] < ranks[best]):
+                best = match.label
+        return best
+
+    def labels(self, matches, kind):
+        """All distinct labels of a kind, in dictionary order"""
+        ranks = self.label_rank.get(kind, {})
+        found = {match.label for match in matches if match.kind == kind}
+        return sorted(found, key=ranks.__getitem__)
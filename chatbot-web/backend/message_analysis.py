@@ -0,0 +1,49 @@
+"""One analysis pass per incoming message, shared by intent, entity and dialog code.
+
+analyze() normalizes the message (strip + lowercase) and tokenizes it
+once, and finds every keyword with a single Aho-Corasick scan over an
+automaton that holds both the entity dictionaries (symptoms, lokasi,
+severity) and the keyword classes below. A class is flagged when any of
+its keywords occurs as a substring, i.e. the same test as
+`any(kw in text.lower() for kw in keywords)`.
+"""
+from collections import namedtuple
+
+from keyword_matcher import KeywordMatcher
+from preprocessing import tokenize
+
+# text: stripped, lowercased message; tokens: its words (preprocessing.tokenize);
+# matches: every keyword hit (KeywordMatch); flags: frozenset of the kinds that were hit
+MessageAnalysis = namedtuple('MessageAnalysis', ['text', 'tokens', 'matches', 'flags'])
+
+# Keyword classes flagged for every message
+KEYWORD_CLASSES = {
+    'greeting': ('halo', 'hai', 'assalamualaikum', 'selamat', 'permisi'),
+    'salam': ('assalamualaikum',),
+    'uncertainty': ('tidak tahu', 'tidak tau', 'kurang tahu', 'tidak jelas', 'tidak yakin', 'kurang jelas'),
+    'gender_male': ('laki-laki', 'laki', 'pria', 'cowok', 'cowo'),
+    'gender_female': ('perempuan', 'wanita', 'cewek', 'cewe'),
+    # Keyword boost: a detected location only counts with one of these words
+    'location_context': ('di', 'bagian', 'sebelah', 'area'),
+    'allergy': ('alergi',),
+}
+
+
+def normalize_text(text):
+    """Cache key and analysis text: every consumer lowercases the message and ignores surrounding whitespace"""
+    return text.strip().lower()
+
+
+class MessageAnalyzer:
+    """Builds the combined automaton once (per dictionary load) and analyzes messages with it"""
+
+    def __init__(self, symptoms_dict, severity_dict, location_dict, keyword_classes=KEYWORD_CLASSES):
+        entries = KeywordMatcher.dictionary_entries(symptoms_dict, severity_dict, location_dict)
+        for kind, keywords in keyword_classes.items():
+            entries.extend((keyword, kind, kind) for keyword in keywords)
+        self.matcher = KeywordMatcher(entries)
+
+    def analyze(self, text):
+        text = normalize_text(text)
+        matches = self.matcher.find_all(text)
+        return MessageAnalysis(text, tokenize(text), matches, frozenset(match.kind for match in matches))
@@ -0,0 +1,168 @@
+"""Minimal Prometheus-style counters and histograms (text exposition format).
+
+When the registry is disabled, time() hands back a shared no-op context
+manager and inc() returns immediately, so instrumented code pays one
+attribute check per call site.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Seconds; /chat stages range from a few microseconds to tens of milliseconds
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+_NOOP = nullcontext()
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class _Series:
+    """Bucket counts and sum for one label combination of a histogram"""
+    __slots__ = ('buckets', 'counts', 'total', 'lock')
+
+    def __init__(self, buckets, lock):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.total = 0.0
+        self.lock = lock
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += value
+
+
+class _Timer:
+    __slots__ = ('_series', '_start')
+
+    def __init__(self, series):
+        self._series = series
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._series.observe(time.perf_counter() - self._start)
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Series(self.buckets, self._lock))
+        return series
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def time(self, *labels):
+        return _Timer(self.labels(*labels))
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, (list(series.counts), series.total)) for labels, series in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = (('le', _format_float(bound)),)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_float(total)}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the /chat metrics; every recording call is a no-op when disabled"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            'pustu_stage_duration_seconds', 'Time spent in each /chat processing stage', ('stage',)
+        )
+        self.intents = Counter('pustu_intents_total', 'Dialog turns by intent', ('intent',))
+        self.keyword_overrides = Counter(
+            'pustu_keyword_overrides_total',
+            'Intents decided by the keyword boost instead of the classifier, per message (memo cache hits '
+            'included); from_intent is "unscored" when the keyword rules decided before the classifier ran',
+            ('from_intent', 'to_intent'),
+        )
+        self.retries = Counter('pustu_retries_total', 'Questions asked again, by dialog state', ('state',))
+        self.intent_stages = Counter(
+            'pustu_intent_stage_total',
+            'Intent predictions by the stage that decided them: keyword rules, state rules or the classifier '
+            '(per message, memo cache hits included)',
+            ('stage',),
+        )
+        self._stages = {}
+
+    def time(self, stage):
+        if not self.enabled:
+            return _NOOP
+        series = self._stages.get(stage)
+        if series is None:
+            series = self._stages[stage] = self.stage_seconds.labels(stage)
+        return _Timer(series)
+
+    def inc(self, counter, *labels):
+        if self.enabled:
+            counter.inc(*labels)
+
+    def expose(self, extra=()):
+        """Text exposition; `extra` holds unlabelled (name, type, documentation, value) samples"""
+        lines = []
+        for metric in (self.stage_seconds, self.intents, self.keyword_overrides, self.retries, self.intent_stages):
+            lines.extend(metric.expose())
+        for name, kind, documentation, value in extra:
+            lines.extend((f'# HELP {name} {documentation}', f'# TYPE {name} {kind}', f'{name} {value}'))
+        return '\n'.join(lines) + '\n'
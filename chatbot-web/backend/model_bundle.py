@@ -0,0 +1,226 @@
+"""Versioned single-file bundle of every artifact the backend serves from.
+
+Layout (little endian):
+
+    8s   magic b'PUSTUBDL'
+    u32  format version
+    u32  manifest length
+    ...  manifest JSON (sections, scorer config, source hashes)
+    ...  sections, each starting on a 64-byte boundary
+
+Numeric sections (idf, feature log-probabilities stored feature-major,
+class log-priors) are raw arrays read straight from the memory map, so
+opening the bundle costs one mmap and a small JSON header; pages are only
+touched when scoring needs them. The vocabulary is a newline-joined UTF-8
+table; dictionaries are small JSON sections decoded on first access.
+
+Build (from chatbot-web/backend):
+    python model_bundle.py
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from nb_scorer import CompactNBScorer
+
+BUNDLE_MAGIC = b'PUSTUBDL'
+BUNDLE_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGN = 64
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUNDLE_PATH = os.path.join(BASE_DIR, 'outputs/models/pustu_bundle.bin')
+# Section name -> source file (relative to BASE_DIR) the bundle is built from
+SOURCES = {
+    'vectorizer': 'outputs/models/tfidf_vectorizer.pkl',
+    'model': 'outputs/models/naive_bayes_model.pkl',
+    'slang_dict': 'outputs/models/slang_dict.pkl',
+    'stopwords': 'outputs/models/stopwords.pkl',
+    'symptoms_dict': 'data/dictionaries/symptoms_dict.json',
+    'severity_dict': 'data/dictionaries/severity_keywords.json',
+    'location_dict': 'data/dictionaries/location_keywords.json',
+}
+
+
+def source_hashes(base_dir=BASE_DIR):
+    """sha256 per source file, or None when any source is missing (bundle-only deploys)"""
+    hashes = {}
+    for name, relative in SOURCES.items():
+        path = os.path.join(base_dir, relative)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            hashes[name] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def _pad(offset):
+    return -offset % _ALIGN
+
+
+def write_bundle(path, arrays, texts, meta):
+    """Write arrays (name -> ndarray) and texts (name -> str) with an aligned layout"""
+    sections = {}
+    payloads = []
+    offset = 0
+    for name, array in arrays.items():
+        data = np.ascontiguousarray(array).tobytes()
+        sections[name] = {'kind': 'array', 'offset': offset, 'length': len(data),
+                          'dtype': array.dtype.str, 'shape': list(array.shape)}
+        payloads.append(data)
+        offset += len(data) + _pad(len(data))
+    for name, text in texts.items():
+        data = text.encode('utf-8')
+        sections[name] = {'kind': 'text', 'offset': offset, 'length': len(data)}
+        payloads.append(data)
+        offset += len(data) + _pad(len(data))
+
+    manifest = json.dumps(dict(meta, sections=sections)).encode('utf-8')
+    header_length = _PREAMBLE.size + len(manifest)
+    data_start = header_length + _pad(header_length)
+
+    # Write next to the target and rename, so readers never see a partial file
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(manifest)))
+        f.write(manifest)
+        f.write(b'\0' * (data_start - header_length))
+        for data in payloads:
+            f.write(data)
+            f.write(b'\0' * _pad(len(data)))
+    os.replace(tmp_path, path)
+
+
+class ModelBundle:
+    """Read-only view of a bundle file; sections are decoded lazily"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, manifest_length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        if version != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle version {version}")
+        header_length = _PREAMBLE.size + manifest_length
+        self.manifest = json.loads(self._mmap[_PREAMBLE.size:header_length])
+        self._data_start = header_length + _pad(header_length)
+        self._cache = {}
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    def array(self, name):
+        """Read-only ndarray backed by the memory map (no copy)"""
+        section = self.manifest['sections'][name]
+        return np.frombuffer(
+            self._mmap, dtype=np.dtype(section['dtype']),
+            count=int(np.prod(section['shape'])), offset=self._data_start + section['offset'],
+        ).reshape(section['shape'])
+
+    def text(self, name):
+        section = self.manifest['sections'][name]
+        start = self._data_start + section['offset']
+        return self._mmap[start:start + section['length']].decode('utf-8')
+
+    def json(self, name):
+        if name not in self._cache:
+            self._cache[name] = json.loads(self.text(name))
+        return self._cache[name]
+
+    def scorer(self):
+        config = self.manifest['scorer']
+        return CompactNBScorer(
+            self.text('vocabulary').split('\n'),
+            self.array('idf'),
+            # Stored feature-major; the transpose view is what the scorer keeps internally
+            self.array('feature_log_prob_t').T,
+            self.array('class_log_prior'),
+            self.json('classes'),
+            token_pattern=config['token_pattern'], ngram_range=config['ngram_range'],
+            lowercase=config['lowercase'], source_sha256=self.version,
+        )
+
+    def slang_dict(self):
+        return self.json('slang_dict')
+
+    def stopwords(self):
+        return set(self.json('stopwords'))
+
+    def dictionaries(self):
+        """(symptoms, severity, location) dictionaries in their original key order"""
+        return self.json('symptoms_dict'), self.json('severity_dict'), self.json('location_dict')
+
+
+def build_bundle(path=DEFAULT_BUNDLE_PATH, base_dir=BASE_DIR):
+    """Build the bundle from the training pickles and dictionary JSON files"""
+    import pickle
+
+    def source(name):
+        return os.path.join(base_dir, SOURCES[name])
+
+    with open(source('vectorizer'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open(source('model'), 'rb') as f:
+        model = pickle.load(f)
+    with open(source('slang_dict'), 'rb') as f:
+        slang_dict = pickle.load(f)
+    with open(source('stopwords'), 'rb') as f:
+        stopwords = pickle.load(f)
+    dictionaries = {}
+    for name in ('symptoms_dict', 'severity_dict', 'location_dict'):
+        with open(source(name), 'r', encoding='utf-8') as f:
+            dictionaries[name] = f.read()
+
+    scorer = CompactNBScorer.from_sklearn(vectorizer, model)
+    hashes = source_hashes(base_dir)
+    version = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:16]
+    write_bundle(
+        path,
+        arrays={
+            'idf': scorer.idf,
+            'feature_log_prob_t': scorer.feature_log_prob.T,
+            'class_log_prior': scorer.class_log_prior,
+        },
+        texts=dict(
+            vocabulary='\n'.join(scorer.terms),
+            classes=json.dumps(scorer.classes.tolist()),
+            slang_dict=json.dumps(slang_dict, ensure_ascii=False),
+            stopwords=json.dumps(sorted(stopwords), ensure_ascii=False),
+            **dictionaries,
+        ),
+        meta={
+            'version': version,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'sources': hashes,
+            'scorer': {
+                'token_pattern': scorer.token_pattern,
+                'ngram_range': list(scorer.ngram_range),
+                'lowercase': scorer.lowercase,
+            },
+        },
+    )
+    return ModelBundle(path)
+
+
+def load_bundle(path=DEFAULT_BUNDLE_PATH, base_dir=BASE_DIR):
+    """Open the bundle, rebuilding it first if it is missing or its sources changed"""
+    hashes = source_hashes(base_dir)
+    if os.path.exists(path):
+        bundle = ModelBundle(path)
+        if hashes is None or bundle.manifest['sources'] == hashes:
+            return bundle
+        print("Model bundle is stale, rebuilding from sources...")
+    return build_bundle(path, base_dir)
+
+
+if __name__ == '__main__':
+    bundle = build_bundle()
+    print(f"Model bundle {bundle.version} written to {bundle.path}")
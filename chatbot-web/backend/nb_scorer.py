@@ -0,0 +1,312 @@
+"""NumPy-only TF-IDF + MultinomialNB scorer for serving.
+
+The scorer holds the vocabulary, idf vector, feature log-probability matrix
+and class log-priors exported from the trained sklearn objects. Scoring
+follows the exact operation order of TfidfVectorizer.transform +
+MultinomialNB.predict_proba so results are bit-for-bit identical, without
+importing scikit-learn at serving time. The backend loads it from the model
+bundle (model_bundle.py); save()/load() keep a standalone .npz format.
+
+transform() looks unigrams up in a token -> column dict and bigrams in a
+two-level dict (first token -> second token -> column), so no n-gram string
+is built per message, and writes the tf-idf weights into a per-thread
+buffer normalized in place; joint log-likelihoods gather the feature rows
+of a message into another per-thread buffer, scale them and reduce them in
+one pass (row by row in column order, the same additions as the CSR
+product). transform() returns its own copy of the values unless called
+with copy=False (the serving hot path): then they are a view of the
+buffer, only valid until the next transform() in the same thread, so the
+row must be scored first (predict_proba() does).
+
+subset() restricts scoring to some classes (e.g. the intents a dialog state
+expects): only their feature rows are multiplied and the probabilities are
+renormalized over the subset, optionally with different class priors.
+"""
+import json
+import math
+import re
+import threading
+
+import numpy as np
+
+COMPACT_FORMAT_VERSION = 1
+
+
+class CompactNBScorer:
+    """TF-IDF (word n-grams, l2 norm) + MultinomialNB scoring with NumPy alone"""
+
+    def __init__(self, vocabulary, idf, feature_log_prob, class_log_prior, classes,
+                 token_pattern=r'(?u)\b\w\w+\b', ngram_range=(1, 2), lowercase=True, source_sha256=None):
+        # Terms by column; the term -> column dict is built on first use
+        self.terms = vocabulary
+        self._vocabulary = None
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.feature_log_prob = np.asarray(feature_log_prob, dtype=np.float64)
+        # Row per feature, so one feature's class scores are contiguous
+        self._feature_log_prob_t = np.ascontiguousarray(self.feature_log_prob.T)
+        self.class_log_prior = np.asarray(class_log_prior, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.token_pattern = token_pattern
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+        self.source_sha256 = source_sha256
+        self._token_re = re.compile(token_pattern)
+        # transform() tables, built on first use: (unigrams, bigrams or None, idf as a list)
+        self._tables = None
+        # Per-thread scratch buffers for transform() and joint_log_likelihood()
+        self._scratch = threading.local()
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = {term: i for i, term in enumerate(self.terms)}
+        return self._vocabulary
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model, source_sha256=None):
+        """Build a scorer from a fitted TfidfVectorizer and MultinomialNB"""
+        params = vectorizer.get_params()
+        unsupported = {
+            'analyzer': 'word', 'binary': False, 'norm': 'l2', 'use_idf': True,
+            'sublinear_tf': False, 'stop_words': None, 'strip_accents': None,
+            'preprocessor': None, 'tokenizer': None, 'input': 'content',
+        }
+        for key, expected in unsupported.items():
+            if params[key] != expected:
+                raise ValueError(f"Unsupported vectorizer setting {key}={params[key]!r}")
+
+        vocabulary = [None] * len(vectorizer.vocabulary_)
+        for term, i in vectorizer.vocabulary_.items():
+            vocabulary[i] = term
+        return cls(
+            vocabulary, vectorizer.idf_, model.feature_log_prob_, model.class_log_prior_, model.classes_,
+            token_pattern=params['token_pattern'], ngram_range=params['ngram_range'],
+            lowercase=params['lowercase'], source_sha256=source_sha256,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a compact model written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            if config['format_version'] != COMPACT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported compact model version {config['format_version']}")
+            return cls(
+                data['vocabulary'].tolist(), data['idf'], data['feature_log_prob'],
+                data['class_log_prior'], data['classes'].tolist(),
+                token_pattern=config['token_pattern'], ngram_range=config['ngram_range'],
+                lowercase=config['lowercase'], source_sha256=config.get('source_sha256'),
+            )
+
+    def save(self, path):
+        """Write the compact model (.npz, no pickled objects)"""
+        config = {
+            'format_version': COMPACT_FORMAT_VERSION,
+            'token_pattern': self.token_pattern,
+            'ngram_range': list(self.ngram_range),
+            'lowercase': self.lowercase,
+            'source_sha256': self.source_sha256,
+        }
+        np.savez_compressed(
+            path,
+            vocabulary=np.array(list(self.terms), dtype=str),
+            idf=self.idf,
+            feature_log_prob=self.feature_log_prob,
+            class_log_prior=self.class_log_prior,
+            classes=np.array(self.classes.tolist(), dtype=str),
+            config=np.array(json.dumps(config)),
+        )
+
+    def analyze(self, text):
+        """Word n-grams exactly as TfidfVectorizer's analyzer produces them"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+            for i in range(len(original_tokens) - n + 1):
+                tokens.append(' '.join(original_tokens[i:i + n]))
+        return tokens
+
+    def _build_tables(self):
+        if self.ngram_range not in ((1, 1), (1, 2)):
+            return None
+        unigrams = {}
+        bigrams = {} if self.ngram_range == (1, 2) else None
+        for i, term in enumerate(self.terms):
+            # Tokens never contain spaces (\w\w+), so a bigram term has exactly one
+            first, _, second = term.partition(' ')
+            if second:
+                bigrams.setdefault(first, {})[second] = i
+            else:
+                unigrams[term] = i
+        return unigrams, bigrams, self.idf.tolist()
+
+    def _counts(self, text):
+        """Column id -> n-gram count of one text"""
+        if self._tables is None:
+            self._tables = self._build_tables() or False
+        if not self._tables:
+            # Other n-gram ranges: analyze() + the term dict
+            counts = {}
+            vocabulary = self.vocabulary
+            for feature in self.analyze(text):
+                idx = vocabulary.get(feature)
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+            return counts
+
+        unigrams, bigrams, _ = self._tables
+        tokens = self._token_re.findall(text.lower() if self.lowercase else text)
+        counts = {}
+        get_unigram = unigrams.get
+        for token in tokens:
+            idx = get_unigram(token)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        if bigrams is not None:
+            get_first = bigrams.get
+            for first, second in zip(tokens, tokens[1:]):
+                following = get_first(first)
+                if following is not None:
+                    idx = following.get(second)
+                    if idx is not None:
+                        counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def transform(self, text, copy=True):
+        """Sparse tf-idf row as (sorted column ids, l2-normalized values).
+
+        With copy=False the values are a view of this thread's buffer,
+        overwritten by the next transform() in the thread.
+        """
+        counts = self._counts(text)
+        columns = sorted(counts)
+        idf = self._tables[2] if self._tables else self.idf
+        values = self._values(len(columns))
+
+        # Same accumulation order as sklearn's inplace csr l2 normalization
+        norm = 0.0
+        for k, j in enumerate(columns):
+            v = counts[j] * idf[j]
+            values[k] = v
+            norm += v * v
+        if norm != 0.0:
+            values /= math.sqrt(norm)
+        return columns, values.copy() if copy else values
+
+    def _values(self, n):
+        """n tf-idf values from this thread's reusable buffer"""
+        scratch = self._scratch
+        values = getattr(scratch, 'values', None)
+        if values is None or values.shape[0] < n:
+            scratch.values = values = np.empty(1 << max(n - 1, 63).bit_length())
+        return values[:n]
+
+    def subset(self, classes, priors=None):
+        """ClassSubset scoring only `classes`; priors (class -> probability) replace their class priors"""
+        return ClassSubset(self, classes, priors)
+
+    def joint_log_likelihood(self, columns, values, subset=None, out=None):
+        """feature_log_prob_ @ x + class_log_prior_ for one sparse row (subset classes only if given)"""
+        table = self if subset is None else subset
+        n_classes = table.class_log_prior.shape[0]
+        jll = np.empty(n_classes) if out is None else out
+        n = len(columns)
+        if n == 0:
+            jll[:] = table.class_log_prior
+            return jll
+        block, scale = self._buffers(n, n_classes)
+        # v * row for each feature, summed row by row in column order (axis-0 reduce adds rows sequentially)
+        np.take(table._feature_log_prob_t, columns, axis=0, out=block)
+        scale[:, 0] = values
+        np.multiply(block, scale, out=block)
+        np.add.reduce(block, axis=0, out=jll)
+        jll += table.class_log_prior
+        return jll
+
+    def _buffers(self, n, n_classes):
+        """(n, n_classes) row block and (n, 1) scale column from this thread's reusable buffers"""
+        scratch = self._scratch
+        flat = getattr(scratch, 'flat', None)
+        if flat is None or flat.shape[0] < n * n_classes or scratch.scale.shape[0] < n:
+            # Grow to the next power of two rows (messages rarely have more than a few dozen features)
+            capacity = 1 << max(n - 1, 63).bit_length()
+            scratch.flat = flat = np.empty(capacity * len(self.classes))
+            scratch.scale = np.empty((capacity, 1))
+        return flat[:n * n_classes].reshape(n, n_classes), scratch.scale[:n]
+
+    def predict_proba(self, texts, subset=None):
+        """Class probabilities for each (already preprocessed) text, columns as in (subset or self).classes"""
+        table = self if subset is None else subset
+        jll = np.empty((len(texts), table.class_log_prior.shape[0]))
+        for i, text in enumerate(texts):
+            # Scored before the next transform() reuses the values buffer
+            columns, values = self.transform(text, copy=False)
+            self.joint_log_likelihood(columns, values, subset, out=jll[i])
+        return self.predict_proba_jll(jll)
+
+    def predict_proba_rows(self, rows, subset=None):
+        """Class probabilities for sparse (columns, values) rows, columns as in (subset or self).classes"""
+        table = self if subset is None else subset
+        jll = np.empty((len(rows), table.class_log_prior.shape[0]))
+        for i, (columns, values) in enumerate(rows):
+            self.joint_log_likelihood(columns, values, subset, out=jll[i])
+        return self.predict_proba_jll(jll)
+
+    @staticmethod
+    def predict_proba_jll(jll):
+        """Class probabilities from joint log-likelihood rows (computed in place)"""
+        jll -= _logsumexp_rows(jll)
+        return np.exp(jll, out=jll)
+
+
+class ClassSubset:
+    """Feature rows and log-priors of some of a scorer's classes (kept in the model's class order)"""
+
+    def __init__(self, scorer, classes, priors=None):
+        index = {name: i for i, name in enumerate(scorer.classes.tolist())}
+        unknown = set(classes).union(priors or ()) - index.keys()
+        if unknown:
+            raise ValueError(f"Unknown classes {sorted(unknown)}")
+        missing = set(priors or ()) - set(classes)
+        if missing:
+            raise ValueError(f"Priors for classes outside the subset: {sorted(missing)}")
+        self.ids = np.array(sorted(index[name] for name in set(classes)), dtype=np.intp)
+        self.classes = scorer.classes[self.ids]
+        self.class_log_prior = scorer.class_log_prior[self.ids]
+        if priors:
+            # Other classes keep the model's prior; the softmax renormalizes over the subset
+            positions = {name: i for i, name in enumerate(self.classes.tolist())}
+            for name, prior in priors.items():
+                if not prior > 0:
+                    raise ValueError(f"Prior for {name} must be positive, got {prior!r}")
+                self.class_log_prior[positions[name]] = np.log(prior)
+        # Contiguous (n_features, n_subset) block: a row costs n_subset multiply-adds instead of n_classes
+        self._feature_log_prob_t = np.ascontiguousarray(scorer._feature_log_prob_t[:, self.ids])
+
+
+def _logsumexp_rows(a):
+    """Row-wise logsumexp, same algorithm as scipy.special.logsumexp (axis=1)"""
+    a_max = np.maximum.reduce(a, axis=1, keepdims=True)
+    is_max = np.equal(a, a_max)
+    m = np.add.reduce(is_max, axis=1, keepdims=True, dtype=a.dtype)
+    # exp(-inf) = 0 for the maxima, computed in place
+    shifted = np.subtract(a, a_max)
+    np.copyto(shifted, -np.inf, where=is_max)
+    np.exp(shifted, out=shifted)
+    s = np.add.reduce(shifted, axis=1, keepdims=True)
+    # scipy keeps s where s == 0; 0 / m is the same 0 (m >= 1)
+    s /= m
+    np.log1p(s, out=s)
+    s += np.log(m)
+    s += a_max
+    return s
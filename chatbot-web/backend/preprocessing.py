@@ -0,0 +1,137 @@
+"""Text preprocessing shared by the API and the training pipeline
+
+preprocess() lowercases, replaces punctuation by spaces, splits into
+words, maps slang and drops stopwords. TextNormalizer does the last two
+steps in a single pass over the words with one table lookup per word:
+
+- single-word slang and stopwords are merged into one dict, word ->
+  output, or '' when the word (or what its slang maps to) is a stopword;
+- multi-word slang keys and stopword phrases (entries containing spaces,
+  tokenized like the text) go into a token trie; at each word the longest
+  phrase starting there wins and is replaced as one unit.
+
+As before, a slang replacement is dropped only when the whole replacement
+is a stopword. Without multi-word entries the output is exactly the old
+map-then-filter result.
+"""
+import json
+import os
+
+from text_patterns import NON_WORD_RE
+
+# Trie node key holding a phrase's output (never a token: tokens are non-empty strings)
+_END = ''
+# Output of a dropped word or phrase (an empty slang value also deletes its word)
+_DROP = ''
+
+
+def tokenize(text_lower):
+    """Words of an already lowercased text, as preprocess() splits them"""
+    return NON_WORD_RE.sub(' ', text_lower).split()
+
+
+class TextNormalizer:
+    """Slang normalization + stopword removal in one pass, with multi-word entries"""
+
+    def __init__(self, slang_dict, stopwords):
+        self.slang_dict = slang_dict
+        self.stopwords = stopwords
+        # word -> output ('' = dropped); words not in the table are kept as they are
+        table = {word: _DROP for word in stopwords if ' ' not in word}
+        phrases = {}  # first token -> trie of the remaining tokens
+        for word in stopwords:
+            if ' ' in word:
+                self._add_phrase(phrases, word, _DROP)
+        for key, value in slang_dict.items():
+            output = _DROP if value in stopwords else value
+            if ' ' in key:
+                self._add_phrase(phrases, key, output)
+            else:
+                table[key] = output
+        self._table = table
+        self._phrases = phrases
+
+    @staticmethod
+    def _add_phrase(phrases, phrase, output):
+        tokens = tokenize(phrase.lower())
+        if not tokens:
+            return
+        node = phrases.setdefault(tokens[0], {})
+        for token in tokens[1:]:
+            node = node.setdefault(token, {})
+        node[_END] = output
+
+    def normalize_tokens(self, words):
+        """Normalized text of tokenize() output"""
+        if not self._phrases or self._phrases.keys().isdisjoint(words):
+            # No phrase can start here: table.get(word, word) for every word, empty outputs dropped, all in C
+            return ' '.join(filter(None, map(self._table.get, words, words)))
+        return ' '.join(self._normalize_phrases(words))
+
+    def _normalize_phrases(self, words):
+        table = self._table
+        phrases = self._phrases
+        out = []
+        i, n = 0, len(words)
+        while i < n:
+            word = words[i]
+            node = phrases.get(word)
+            if node is not None:
+                # Longest phrase starting at i
+                end, output = None, None
+                j = i + 1
+                while True:
+                    if _END in node:
+                        end, output = j, node[_END]
+                    if j == n:
+                        break
+                    node = node.get(words[j])
+                    if node is None:
+                        break
+                    j += 1
+                if end is not None:
+                    if output:
+                        out.append(output)
+                    i = end
+                    continue
+            output = table.get(word, word)
+            if output:
+                out.append(output)
+            i += 1
+        return out
+
+    def __call__(self, text):
+        return self.normalize_tokens(tokenize(text.lower()))
+
+    def stream(self, texts):
+        """Normalized text for each of `texts`, lazily (for corpora that don't fit in memory as lists)"""
+        normalize_tokens = self.normalize_tokens
+        split = NON_WORD_RE.sub
+        for text in texts:
+            yield normalize_tokens(split(' ', text.lower()).split())
+
+
+# Normalizer for the last (slang_dict, stopwords) pair passed to preprocess(); the dictionaries are
+# loaded once and never modified, so identity is enough to reuse it
+_last_normalizer = None
+
+
+def get_normalizer(slang_dict, stopwords):
+    global _last_normalizer
+    normalizer = _last_normalizer
+    if normalizer is None or normalizer.slang_dict is not slang_dict or normalizer.stopwords is not stopwords:
+        normalizer = _last_normalizer = TextNormalizer(slang_dict, stopwords)
+    return normalizer
+
+
+def preprocess(text, slang_dict, stopwords):
+    return get_normalizer(slang_dict, stopwords)(text)
+
+
+def load_source_dictionaries(dictionaries_dir):
+    """Slang dictionary and stopword set from the editable source files"""
+    with open(os.path.join(dictionaries_dir, 'slang_normalization.json'), 'r', encoding='utf-8') as f:
+        slang_dict = json.load(f)
+    with open(os.path.join(dictionaries_dir, 'stopwords_id.txt'), 'r', encoding='utf-8') as f:
+        stopwords = set(line.strip() for line in f)
+    return slang_dict, stopwords
@@ -0,0 +1,136 @@
+"""Pre-fork multi-worker server: load the app once, share its memory.
+
+`uvicorn app:app --workers N` starts N fresh interpreters that each import
+app.py: N bundle opens and source hashes, and N copies of the scorer
+tables, dictionaries and keyword automaton. serve.py imports app once in
+the parent, moves everything loaded so far out of the garbage collector's
+reach (gc.freeze(), so collections in the workers don't write to those
+pages) and forks the workers, which all accept on one listening socket:
+
+- model arrays are read-only views of the bundle's memory map, the same
+  page-cache pages in every worker;
+- Python-side tables (vocabulary, n-gram tables, dictionaries, automaton,
+  flow) are inherited copy-on-write.
+
+Any request can reach any worker, so with more than one worker sessions
+must live in the shared store (SESSION_STORE=redis). Per worker: memo
+caches, /metrics counters, the inference executor, the conversation log
+(segment names carry the pid) and hot reloads (POST /admin/reload reaches
+one worker; set MODEL_WATCH_INTERVAL so every worker picks up a new
+bundle). A worker that exits is replaced; SIGTERM/SIGINT stop them all.
+
+Usage (from chatbot-web/backend):
+    SESSION_STORE=redis REDIS_URL=redis://host:6379/0 python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+from session_store import MemorySessionStore
+
+
+def create_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def run_worker(app_module, sock, log_level):
+    config = uvicorn.Config(app_module.app, log_level=log_level, lifespan='on')
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers, host, port, log_level='info'):
+    # Everything the workers share is loaded here, before the fork
+    import app as app_module
+
+    if workers > 1 and isinstance(app_module.sessions, MemorySessionStore):
+        raise SystemExit("serve.py: more than one worker needs a shared session store (SESSION_STORE=redis)")
+
+    sock = create_socket(host, port)
+    if workers <= 1:
+        run_worker(app_module, sock, log_level)
+        return
+
+    # Loaded objects are never freed; keep the workers' collections from touching (and copying) their pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}  # pid -> start time
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # uvicorn installs its own handlers once serving; until then the defaults apply
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 1
+            try:
+                run_worker(app_module, sock, log_level)
+                status = 0
+            except SystemExit as exc:
+                status = exc.code if isinstance(exc.code, int) else 1
+            except BaseException:
+                # os._exit() skips the interpreter's own reporting: print why the worker died (one write,
+                # so tracebacks of workers crashing together don't interleave)
+                sys.stderr.write(f"Worker {os.getpid()} crashed:\n{traceback.format_exc()}")
+            finally:
+                # os._exit() doesn't flush either (stdout is left alone: it may still hold the parent's
+                # output from before the fork)
+                sys.stderr.flush()
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on {host}:{port} with {workers} workers (pids {', '.join(map(str, children))})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, starting a new one")
+        # Don't spin when workers die right away (e.g. the session store is unreachable)
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)
+        spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVE_WORKERS', '1')))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8000')))
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port, args.log_level)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
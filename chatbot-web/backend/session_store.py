@@ -0,0 +1,260 @@
+"""Session stores for DialogStateManager objects.
+
+MemorySessionStore keeps live objects in process memory with LRU + TTL
+eviction. RedisSessionStore keeps serialized state in any server speaking the
+Redis protocol (RESP2), so several uvicorn workers can share conversations.
+Its calls wait on the network (`blocking`), so async callers run them on a
+worker thread; get_many()/save_many() take one round trip for a batch.
+"""
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+
+class SessionStore:
+    """Interface shared by all session backends"""
+
+    # True when calls wait on the network: async callers must not run them on the event loop
+    blocking = False
+
+    def get(self, session_id):
+        """Return the session's DialogStateManager, or None if unknown/expired"""
+        raise NotImplementedError
+
+    def save(self, session_id, dsm):
+        """Store (or refresh) a session after a turn"""
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        """Forget a session"""
+        raise NotImplementedError
+
+    def get_many(self, session_ids):
+        """{session_id: DialogStateManager or None} for several sessions"""
+        return {session_id: self.get(session_id) for session_id in session_ids}
+
+    def save_many(self, sessions):
+        """Store several sessions ({session_id: dsm})"""
+        for session_id, dsm in sessions.items():
+            self.save(session_id, dsm)
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store: least recently used sessions go first, idle ones expire"""
+
+    def __init__(self, max_sessions=10000, ttl=3600, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions = OrderedDict()  # session_id -> (dsm, expires_at), oldest first
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            dsm, expires_at = entry
+            now = self._clock()
+            if expires_at <= now:
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            # Sliding expiry: every access extends the session
+            self._sessions[session_id] = (dsm, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            return dsm
+
+    def save(self, session_id, dsm):
+        with self._lock:
+            now = self._clock()
+            self._sessions[session_id] = (dsm, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        # Entries are ordered by last access and share one TTL, so both expired
+        # and least recently used sessions sit at the front
+        while self._sessions:
+            _, expires_at = next(iter(self._sessions.values()))
+            if expires_at <= now:
+                self.expirations += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evictions += 1
+            else:
+                break
+            self._sessions.popitem(last=False)
+
+
+class RedisError(Exception):
+    """Error reply from the Redis server"""
+
+
+class RedisClient:
+    """Minimal thread-safe RESP2 client (no external dependency)"""
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """Parse redis://[:password@]host[:port][/db]"""
+        parsed = urlparse(url)
+        if parsed.scheme != 'redis':
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme!r}")
+        db = parsed.path.lstrip('/')
+        return cls(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            **kwargs,
+        )
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply"""
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Send several commands in one write and return their replies in order (one round trip).
+        An error reply is raised once every reply has been read"""
+        with self._lock:
+            try:
+                replies = self._roundtrip(commands)
+            except (OSError, ConnectionError):
+                # Stale connection (server restart, idle timeout): retry once
+                self.close()
+                replies = self._roundtrip(commands)
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+    def _roundtrip(self, commands):
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(b''.join(_encode_command(args) for args in commands))
+        replies = []
+        for _ in commands:
+            try:
+                replies.append(self._read_reply())
+            except RedisError as exc:
+                # The error line is consumed: keep reading so the connection stays in sync
+                replies.append(exc)
+        return replies
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._sock.sendall(_encode_command(('AUTH', self.password)))
+            self._read_reply()
+        if self.db:
+            self._sock.sendall(_encode_command(('SELECT', self.db)))
+            self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by Redis server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode()
+        if prefix == b'-':
+            raise RedisError(payload.decode())
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply prefix {prefix!r}")
+
+
+def _encode_command(args):
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+class RedisSessionStore(SessionStore):
+    """Serialized sessions in a Redis-compatible server, expired by the server"""
+
+    blocking = True
+
+    def __init__(self, client, dumps, loads, ttl=3600, prefix='pustu:session:'):
+        self.client = client
+        self.dumps = dumps
+        self.loads = loads
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        data = self.client.execute('GET', self.prefix + session_id)
+        if data is None:
+            return None
+        return self.loads(data)
+
+    def save(self, session_id, dsm):
+        self.client.execute('SET', self.prefix + session_id, self.dumps(dsm), 'EX', self.ttl)
+
+    def get_many(self, session_ids):
+        session_ids = list(session_ids)
+        if not session_ids:
+            return {}
+        values = self.client.execute('MGET', *(self.prefix + session_id for session_id in session_ids))
+        return {session_id: None if data is None else self.loads(data)
+                for session_id, data in zip(session_ids, values)}
+
+    def save_many(self, sessions):
+        if sessions:
+            self.client.pipeline([('SET', self.prefix + session_id, self.dumps(dsm), 'EX', self.ttl)
+                                  for session_id, dsm in sessions.items()])
+
+    def delete(self, session_id):
+        self.client.execute('DEL', self.prefix + session_id)
+
+    def __contains__(self, session_id):
+        return self.client.execute('EXISTS', self.prefix + session_id) == 1
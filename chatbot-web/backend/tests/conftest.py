@@ -0,0 +1,7 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The backend modules and the benchmark helpers (fake Redis server, bundle variants) are imported by name
+sys.path.insert(0, os.path.join(BASE_DIR, 'benchmarks'))
+sys.path.insert(0, BASE_DIR)
@@ -0,0 +1,57 @@
+"""Counters under concurrent log() calls and seq order of records handed off on a full queue."""
+import asyncio
+import os
+import threading
+
+import pytest
+
+from conversation_log import FORMATS, RECORD_FIELDS, ConversationLogger, read_segment
+
+
+def make_record(i):
+    return dict.fromkeys(RECORD_FIELDS, None) | {'ts': float(i), 'message': f'pesan {i}', 'entities': {}}
+
+
+def read_all(directory):
+    return [record for name in sorted(os.listdir(directory)) for record in read_segment(os.path.join(directory, name))]
+
+
+def test_counters_add_up_across_threads(tmp_path):
+    # Not started: a small queue fills up, so threads both queue and drop records
+    logger = ConversationLogger(str(tmp_path), queue_size=500)
+    threads, per_thread = 8, 2000
+
+    def log_many():
+        for i in range(per_thread):
+            logger.log(make_record(i))
+
+    workers = [threading.Thread(target=log_many) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stats = logger.stats()
+    assert (stats['logged'], stats['dropped']) == (500, threads * per_thread - 500)
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_handed_off_records_sort_back_by_seq(tmp_path, fmt):
+    logger = ConversationLogger(str(tmp_path), fmt=fmt, queue_size=2, policy='block', block_timeout=5,
+                                flush_interval=0.01)
+
+    async def log_many():
+        # The queue fills before the writer runs: later records wait in the loop's executor
+        for i in range(20):
+            logger.log(make_record(i))
+        while logger.stats()['waiting']:
+            await asyncio.sleep(0.01)
+
+    logger.start()
+    try:
+        asyncio.run(log_many())
+    finally:
+        logger.close()
+    records = read_all(str(tmp_path))
+    assert logger.stats()['dropped'] == 0
+    assert [record['message'] for record in sorted(records, key=lambda record: record['seq'])] == \
+        [f'pesan {i}' for i in range(20)]
@@ -0,0 +1,141 @@
+"""Hot reload under concurrent predictions, for every inference executor mode.
+
+Two versions of the bundle alternate; the second one rewrites a few common
+words in its slang dictionary, so its preprocess() output differs. After
+each swap, every memoized preprocess() and intent result must match the
+resources now loaded.
+"""
+import asyncio
+import os
+import random
+import shutil
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from bench_hot_reload import RAW_CSV, SLANG_OVERRIDES, write_variant
+from inference_executor import MODES, InferenceExecutor
+from model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle
+
+SWAPS = 3
+# Message preprocessed differently by the two variants
+PROBE_MESSAGE = 'saya sakit kepala dan demam sudah 3 hari'
+
+
+class StalledExtractor:
+    """Entity extractor whose analyze() waits for release(), to hold a prediction mid-batch"""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def analyze(self, text):
+        self.entered.set()
+        self.released.wait()
+        return self.extractor.analyze(text)
+
+    def release(self):
+        self.released.set()
+
+    def __getattr__(self, name):
+        return getattr(self.extractor, name)
+
+
+@pytest.fixture(scope='module')
+def reloadable(tmp_path_factory):
+    """(app module, bundle path, the two variants), serving from a temporary bundle"""
+    directory = tmp_path_factory.mktemp('bundles')
+    version = ModelBundle(DEFAULT_BUNDLE_PATH).version
+    variants = [str(directory / 'a.bin'), str(directory / 'b.bin')]
+    write_variant(DEFAULT_BUNDLE_PATH, variants[0], f'{version}-a')
+    write_variant(DEFAULT_BUNDLE_PATH, variants[1], f'{version}-b', SLANG_OVERRIDES)
+    bundle_path = str(directory / 'bundle.bin')
+    shutil.copyfile(variants[1], bundle_path)
+
+    previous_env = os.environ.get('MODEL_BUNDLE')
+    # Process workers import app with this environment
+    os.environ['MODEL_BUNDLE'] = bundle_path
+    import app
+
+    previous_path = app.MODEL_BUNDLE_PATH
+    app.MODEL_BUNDLE_PATH = bundle_path
+    app.load_resources()
+    try:
+        yield app, bundle_path, variants
+    finally:
+        if previous_env is None:
+            os.environ.pop('MODEL_BUNDLE', None)
+        else:
+            os.environ['MODEL_BUNDLE'] = previous_env
+        app.MODEL_BUNDLE_PATH = previous_path
+        app.load_resources()
+
+
+def stale_entries(app):
+    """Cache keys whose memoized preprocess() or intent result differs from the loaded resources"""
+    res = app.resources
+
+    def expected(key):
+        return res.normalizer.normalize_tokens(res.extractor.analyze(key).tokens)
+
+    stale = []
+    for cache, processed in ((app.preprocess_cache, lambda value: value),
+                             (app.intent_cache, lambda value: value['processed'])):
+        with cache._lock:
+            entries = list(cache._data.items())
+        stale.extend(key for key, value in entries if processed(value) != expected(key))
+    return stale
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_concurrent_predictions_during_reload(reloadable, mode):
+    app, bundle_path, variants = reloadable
+    texts = pd.read_csv(RAW_CSV)['Raw_Text'].astype(str).tolist()
+    executor = InferenceExecutor(mode, workers=2, queue_size=256, module='app').start()
+    previous, app.inference = app.inference, executor
+    stop = threading.Event()
+    errors = []
+
+    def traffic(seed):
+        rng = random.Random(seed)
+
+        async def predict():
+            while not stop.is_set():
+                await app.predict_intents_async(rng.sample(texts, 16))
+
+        try:
+            asyncio.run(predict())
+        except Exception as exc:
+            errors.append(repr(exc))
+
+    threads = [threading.Thread(target=traffic, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(SWAPS):
+            shutil.copyfile(variants[i % 2], bundle_path + '.next')
+            os.replace(bundle_path + '.next', bundle_path)
+            # One prediction snapshots the current resources and stops before preprocess() ...
+            stalled = StalledExtractor(app.resources.extractor)
+            app.resources = app.resources._replace(extractor=stalled)
+            probe = threading.Thread(target=app.predict_intents, args=([PROBE_MESSAGE],))
+            probe.start()
+            stalled.entered.wait()
+            # ... and finishes on them after the swap
+            app.reload_resources()
+            stalled.release()
+            probe.join()
+            # Let batches that started on the replaced resources (or old process workers) finish
+            time.sleep(0.2)
+            assert stale_entries(app) == []
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        executor.shutdown()
+        app.inference = previous
+    assert errors == []
+    assert app.resources.bundle.version.endswith('-a' if SWAPS % 2 else '-b')
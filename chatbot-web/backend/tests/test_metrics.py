@@ -0,0 +1,35 @@
+"""Intent stage and keyword override counters are counted per message in the serving process."""
+import asyncio
+
+import pytest
+
+from inference_executor import MODES, InferenceExecutor
+
+# Duration (keyword rules), body location (keyword rules) and a message the classifier scores
+MESSAGES = ['sudah 3 hari demam', 'nyeri di perut kanan', 'saya pusing']
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_counters_include_cache_hits_and_worker_results(mode):
+    import app
+
+    executor = InferenceExecutor(mode, workers=1, module='app').start()
+    previous, app.inference = app.inference, executor
+    app.clear_caches()
+    expected = {
+        (app.metrics.intent_stages, ('rules',)): 4,
+        (app.metrics.intent_stages, ('model',)): 2,
+        (app.metrics.keyword_overrides, (app.UNSCORED_INTENT, 'jawab_durasi')): 2,
+        (app.metrics.keyword_overrides, (app.UNSCORED_INTENT, 'jawab_lokasi')): 2,
+    }
+    before = {key: key[0].value(*key[1]) for key in expected}
+    try:
+        for _ in range(2):
+            # The second round is answered from the intent cache
+            asyncio.run(app.predict_intents_async(MESSAGES))
+    finally:
+        executor.shutdown()
+        app.inference = previous
+
+    added = {key: key[0].value(*key[1]) - before[key] for key in expected}
+    assert added == expected
@@ -0,0 +1,24 @@
+"""transform() rows kept across calls score the same as predict_proba() on their texts."""
+import numpy as np
+import pytest
+
+from model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle
+
+TEXTS = ['sudah 3 hari demam', 'nyeri perut kanan bawah', 'pusing mual']
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return ModelBundle(DEFAULT_BUNDLE_PATH).scorer()
+
+
+def test_kept_rows_score_like_predict_proba(scorer):
+    rows = [scorer.transform(text) for text in TEXTS]
+    assert np.array_equal(scorer.predict_proba_rows(rows), scorer.predict_proba(TEXTS))
+
+
+def test_default_values_outlive_the_next_transform(scorer):
+    _, values = scorer.transform(TEXTS[0])
+    kept = values.copy()
+    scorer.transform(TEXTS[1], copy=False)
+    assert np.array_equal(values, kept)
@@ -0,0 +1,182 @@
+"""Session stores: the in-memory store and the Redis store against the local fake server."""
+import asyncio
+import time
+
+import pytest
+
+from fake_redis import FakeRedisServer
+from session_store import MemorySessionStore, RedisClient, RedisError, RedisSessionStore
+
+
+@pytest.fixture
+def server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = RedisClient(port=server.port, timeout=2.0)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope='module')
+def DialogStateManager():
+    from app import DialogStateManager
+
+    return DialogStateManager
+
+
+def redis_store(client, DialogStateManager, ttl=3600):
+    return RedisSessionStore(client, dumps=lambda dsm: dsm.to_bytes(), loads=DialogStateManager.from_bytes, ttl=ttl)
+
+
+def started_session(DialogStateManager):
+    dsm = DialogStateManager()
+    dsm.update('sapaan', '', '', {}, True)
+    dsm.update('jawab_nama', 'Nama saya Budi Santoso', 'nama budi santoso', {'nama': 'Budi Santoso'}, True)
+    return dsm
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_store_sliding_ttl():
+    clock = FakeClock()
+    store = MemorySessionStore(ttl=10, clock=clock)
+    store.save('a', 'dsm-a')
+    clock.now = 8
+    assert store.get('a') == 'dsm-a'
+    # The access extended the session
+    clock.now = 16
+    assert store.get('a') == 'dsm-a'
+    clock.now = 27
+    assert store.get('a') is None
+    assert store.expirations == 1
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2, ttl=10, clock=FakeClock())
+    store.save('a', 'dsm-a')
+    store.save('b', 'dsm-b')
+    store.get('a')
+    store.save('c', 'dsm-c')
+    assert 'b' not in store
+    assert store.get('a') == 'dsm-a' and store.get('c') == 'dsm-c'
+    assert store.evictions == 1
+
+
+def test_redis_round_trip(client, DialogStateManager):
+    store = redis_store(client, DialogStateManager)
+    dsm = started_session(DialogStateManager)
+    store.save('s1', dsm)
+    loaded = store.get('s1')
+    assert loaded is not dsm
+    assert loaded.state == dsm.state
+    assert loaded.data == dsm.data
+    assert loaded.to_bytes() == dsm.to_bytes()
+    assert store.get('unknown') is None
+
+
+def test_redis_corrupt_value_reads_as_expired(client, DialogStateManager):
+    store = redis_store(client, DialogStateManager)
+    payload = started_session(DialogStateManager).to_bytes()
+    client.execute('SET', store.prefix + 'cut', payload[:len(payload) // 2])
+    assert store.get('cut') is None
+
+
+def test_redis_ttl_expiry(client, DialogStateManager):
+    store = redis_store(client, DialogStateManager, ttl=1)
+    store.save('s1', started_session(DialogStateManager))
+    assert 's1' in store
+    time.sleep(1.1)
+    assert store.get('s1') is None
+    assert 's1' not in store
+
+
+def test_redis_exists_and_delete(client, DialogStateManager):
+    store = redis_store(client, DialogStateManager)
+    store.save('s1', started_session(DialogStateManager))
+    key = store.prefix + 's1'
+    assert client.execute('EXISTS', key) == 1
+    assert 's1' in store
+    store.delete('s1')
+    assert client.execute('EXISTS', key) == 0
+    assert 's1' not in store
+    # Deleting again is a no-op
+    store.delete('s1')
+    assert client.execute('DEL', key) == 0
+
+
+def test_redis_batch_calls(client, DialogStateManager):
+    store = redis_store(client, DialogStateManager)
+    first, second = started_session(DialogStateManager), DialogStateManager()
+    store.save_many({'s1': first, 's2': second})
+    loaded = store.get_many(['s1', 'missing', 's2'])
+    assert list(loaded) == ['s1', 'missing', 's2']
+    assert loaded['s1'].data == first.data
+    assert loaded['missing'] is None
+    assert loaded['s2'].state == second.state
+    assert store.get_many([]) == {}
+    store.save_many({})
+
+
+def test_pipeline_error_reply_keeps_connection_in_sync(client):
+    with pytest.raises(RedisError):
+        client.pipeline([('SET', 'k', 'v'), ('NOSUCHCOMMAND',), ('GET', 'k')])
+    assert client.execute('GET', 'k') == b'v'
+    assert client.pipeline([('GET', 'k'), ('EXISTS', 'k')]) == [b'v', 1]
+
+
+def test_reconnect_after_drop(server, client, DialogStateManager):
+    store = redis_store(client, DialogStateManager)
+    dsm = started_session(DialogStateManager)
+    store.save('s1', dsm)
+    server.drop_connections()
+    # The next call fails on the dropped connection, reconnects and retries once
+    assert store.get('s1').data == dsm.data
+    server.drop_connections()
+    store.save_many({'s2': dsm})
+    assert 's2' in store
+
+
+class SlowStore(MemorySessionStore):
+    """Blocking store whose get() takes `delay` seconds"""
+
+    blocking = True
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def get(self, session_id):
+        time.sleep(self.delay)
+        return super().get(session_id)
+
+
+def test_blocking_store_calls_leave_the_event_loop_free(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, 'sessions', SlowStore(0.3))
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await app.store_io(app.sessions.get, 'missing')
+        task.cancel()
+
+    asyncio.run(main())
+    # The loop kept running while get() slept
+    assert len(ticks) > 10
@@ -0,0 +1,65 @@
+"""Precompiled regular expressions used by preprocessing, extraction and summaries.
+
+Everything is compiled once at import. Cleanup steps that always run back to
+back are merged into a single pattern when one left-to-right pass gives the
+same result as the original sequence of re.sub calls:
+
+* a leading pronoun/"di" (removed) followed by honorifics (replaced by a
+  space): the prefix alternative is anchored at the start of the stripped
+  text and consumes its trailing whitespace, while honorifics need leading
+  whitespace, so the two alternatives never compete;
+* a leading pronoun (removed) and inner pronouns (replaced by a space);
+* "sakit kepala" -> "nyeri kepala" followed by "sakit" -> "nyeri" (the
+  second rule alone gives the same text once it is capitalized).
+
+The duration strips and the honorific/filler steps are order dependent and
+stay separate passes.
+"""
+import re
+
+DURATION_UNITS = r'(?:hari|minggu|bulan|tahun|jam|menit)'
+HONORIFICS = r'(?:dokter|dok|bu|pak|mas|mbak|kak)'
+
+# preprocess()
+NON_WORD_RE = re.compile(r'[^\w\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# EntityExtractor
+NAMA_RE = re.compile(r'nama\s+(?:saya\s+)?(\w+(?:\s+\w+)?)')
+UMUR_RE = re.compile(r'(\d+)\s*(?:tahun|th|thn)')
+# Checked in this order; the first context that matches anywhere wins
+DURATION_CONTEXTS = ('sudah', 'sejak', 'selama', 'sekitar', 'kurang lebih', 'kira-kira',
+                     'hampir', 'lebih dari')
+DURATION_CONTEXT_RANK = {context: i for i, context in enumerate(DURATION_CONTEXTS)}
+DURATION_CONTEXT_RE = re.compile(
+    '(' + '|'.join(re.escape(context) for context in DURATION_CONTEXTS) + r')\s+(\d+)\s*' + DURATION_UNITS
+)
+DURATION_SIMPLE_RE = re.compile(r'(\d+)\s*(?:hari|minggu|bulan)')
+DURATION_RELATIVE_RE = re.compile(r'sejak\s+(?:kemarin|lusa|seminggu|sebulan|tadi|pagi|siang|sore|malam)')
+
+# /chat handler
+DURATION_ANY_RE = re.compile(r'\d+\s*' + DURATION_UNITS)
+
+# Name rendering and summaries (input is already stripped)
+NICKNAME_PREFIX_RE = re.compile(r'^(panggil\s+)?', re.IGNORECASE)
+NAME_PREFIX_RE = re.compile(r'^(saya|nama\s+saya|nama)\s+', re.IGNORECASE)
+PRONOUN_PREFIX_RE = re.compile(r'^(saya|aku)\s+', re.IGNORECASE)
+# Group 1 is set only for the alternatives that are replaced by a space
+PRONOUN_HONORIFIC_RE = re.compile(r'^(?:saya|aku)\s+|(\s+)' + HONORIFICS + r'\s*', re.IGNORECASE)
+LOCATION_HONORIFIC_RE = re.compile(r'^di\s+|(\s+)' + HONORIFICS + r'\s*', re.IGNORECASE)
+PRONOUNS_RE = re.compile(r'^(?:saya|aku)\s+|(\s+)(?:saya|aku)\s+', re.IGNORECASE)
+HONORIFIC_RE = re.compile(r'\s+' + HONORIFICS + r'\s*', re.IGNORECASE)
+CONTEXT_DURATION_RE = re.compile(
+    r'\s*(sudah|sejak|selama|sekitar|kurang lebih)\s+\d+\s*' + DURATION_UNITS, re.IGNORECASE
+)
+TRAILING_DURATION_RE = re.compile(r'\s+\d+\s*' + DURATION_UNITS + r'\s*$', re.IGNORECASE)
+FILLER_RE = re.compile(r'\b(juga|sekali|banget)\b', re.IGNORECASE)
+SAKIT_RE = re.compile(r'\bsakit\b', re.IGNORECASE)
+
+# Negative answers ('tidak ada', 'tidak tahu' are covered by 'tidak')
+NEGATION_PREFIXES = ('tidak', 'ga', 'gak', 'enggak', 'nggak')
+
+
+def space_if_group(match):
+    """Replacement for the merged patterns above: '' for prefixes, ' ' otherwise"""
+    return ' ' if match.group(1) else ''
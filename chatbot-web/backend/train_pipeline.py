@@ -0,0 +1,243 @@
+"""Streaming training pipeline: raw CSV -> TF-IDF + MultinomialNB artifacts.
+
+Replaces the in-memory notebook flow. Memory use is bounded by the chunk
+size and the n-gram vocabulary, not by the number of rows:
+
+1. Stream the CSV in chunks and preprocess each chunk on a multiprocessing
+   pool into the processed-dataset store (dataset_store.py). The entry is
+   keyed by the raw file hash and the preprocessing config, so unchanged
+   inputs skip this step entirely. Rows are held out for evaluation with a
+   seeded random draw per row.
+2. Count document and term frequencies of every n-gram over the training
+   rows, then select the vocabulary and idf exactly as
+   TfidfVectorizer(max_features, ngram_range, min_df) would when fitted on
+   the same rows, so the artifacts stay compatible with the serving
+   scorer and the bundle.
+3. Stream the stored dataset again and train MultinomialNB with partial_fit.
+4. Evaluate on the held-out rows and write tfidf_vectorizer.pkl,
+   naive_bayes_model.pkl, slang_dict.pkl and stopwords.pkl, then rebuild
+   the model bundle when writing to the backend's own outputs/models.
+
+Usage (from chatbot-web/backend):
+    python train_pipeline.py [--input data/raw/dataset.csv] [--chunksize 50000] [--workers 4]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import random
+import time
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.naive_bayes import MultinomialNB
+
+from dataset_store import DEFAULT_STORE_DIR, ProcessedDatasetStore
+from preprocessing import TextNormalizer, load_source_dictionaries
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(BASE_DIR, 'data/raw/dataset_anamnesis_20251202_162631.csv')
+DEFAULT_OUTPUT_DIR = os.path.join(BASE_DIR, 'outputs/models')
+DICTIONARIES_DIR = os.path.join(BASE_DIR, 'data/dictionaries')
+# jawab_gejala overlaps with keluhan_utama and jawab_gejala_penyerta
+DEFAULT_EXCLUDED_INTENTS = ('jawab_gejala',)
+# Bump when preprocess() output changes so stored datasets are rebuilt
+PREPROCESS_VERSION = 1
+
+# Set in each pool worker by _init_worker()
+_normalizer = None
+
+
+def _init_worker(dictionaries_dir):
+    global _normalizer
+    _normalizer = TextNormalizer(*load_source_dictionaries(dictionaries_dir))
+
+
+def _preprocess_chunk(texts):
+    return list(_normalizer.stream(texts))
+
+
+def read_chunks(path, chunksize, exclude_intents):
+    """(raw texts, intents) per CSV chunk, with excluded intents dropped"""
+    for chunk in pd.read_csv(path, usecols=['Raw_Text', 'Intent'], chunksize=chunksize):
+        chunk = chunk[~chunk['Intent'].isin(exclude_intents)]
+        yield chunk['Raw_Text'].fillna('').astype(str).tolist(), chunk['Intent'].astype(str).tolist()
+
+
+def preprocessing_config(args):
+    """Everything that determines the processed rows (part of the store key)"""
+    slang_dict, stopwords = load_source_dictionaries(DICTIONARIES_DIR)
+    dictionaries = json.dumps([slang_dict, sorted(stopwords)], sort_keys=True, ensure_ascii=False)
+    return {
+        'preprocess_version': PREPROCESS_VERSION,
+        'dictionaries_sha256': hashlib.sha256(dictionaries.encode('utf-8')).hexdigest(),
+        'exclude_intents': sorted(set(args.exclude_intent)),
+    }
+
+
+def preprocess_dataset(args, store):
+    """Pass 0: preprocess in parallel into the store, unless an identical entry exists"""
+    config = preprocessing_config(args)
+    key = store.key_for(args.input, config)
+    if key in store:
+        print(f"Processed dataset {key[:16]} unchanged, reusing it")
+        return key
+
+    chunks = read_chunks(args.input, args.chunksize, set(args.exclude_intent))
+    meta = {'raw_path': os.path.abspath(args.input), 'config': config}
+    with Pool(args.workers, initializer=_init_worker, initargs=(DICTIONARIES_DIR,)) as pool, \
+            store.writer(key, meta, categorical=('Intent',)) as writer:
+        # A window of two chunks per worker keeps memory bounded (Pool.imap would read the whole CSV ahead)
+        while True:
+            window = list(islice(chunks, 2 * args.workers))
+            if not window:
+                break
+            results = pool.map(_preprocess_chunk, [texts for texts, _ in window])
+            for processed, (texts, intents) in zip(results, window):
+                writer.write_part({'Raw_Text': texts, 'Intent': intents, 'Processed_Text': processed})
+    print(f"Processed dataset {key[:16]} stored ({writer.rows} rows)")
+    return key
+
+
+def iter_split(store, key, split, args):
+    """(texts, intents) per stored part for one split; the seeded draw is replayed on every pass"""
+    rng = random.Random(args.seed)
+    for part in store.iter_parts(key, columns=('Intent', 'Processed_Text')):
+        texts, intents = [], []
+        for text, intent in zip(part['Processed_Text'], part['Intent']):
+            row_split = 'test' if rng.random() < args.test_size else 'train'
+            if row_split == split:
+                intents.append(intent)
+                texts.append(text)
+        if texts:
+            yield texts, intents
+
+
+def fit_vectorizer(store, key, args):
+    """Pass 1: TfidfVectorizer vocabulary + idf from streamed document/term frequencies"""
+    vectorizer = TfidfVectorizer(max_features=args.max_features, ngram_range=tuple(args.ngram_range),
+                                 min_df=args.min_df)
+    analyze = vectorizer.build_analyzer()
+
+    doc_freq = Counter()
+    term_freq = Counter()
+    n_docs = 0
+    classes = set()
+    for texts, intents in iter_split(store, key, 'train', args):
+        classes.update(intents)
+        for text in texts:
+            features = Counter(analyze(text))
+            term_freq.update(features)
+            doc_freq.update(features.keys())
+        n_docs += len(texts)
+
+    # Same selection as CountVectorizer: alphabetical order, df bounds, then top max_features by tf
+    terms = sorted(doc_freq)
+    dfs = np.array([doc_freq[term] for term in terms], dtype=np.int64)
+    mask = dfs >= args.min_df
+    if args.max_features is not None and mask.sum() > args.max_features:
+        tfs = np.array([term_freq[term] for term in terms], dtype=np.int64)
+        mask_inds = (-tfs[mask]).argsort()[:args.max_features]
+        new_mask = np.zeros(len(dfs), dtype=bool)
+        new_mask[np.where(mask)[0][mask_inds]] = True
+        mask = new_mask
+    kept = np.where(mask)[0]
+    if len(kept) == 0:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df.")
+
+    # Same arithmetic as TfidfTransformer.fit with smooth_idf=True
+    df = dfs[kept].astype(np.float64) + 1.0
+    idf = np.full_like(df, fill_value=n_docs + 1, dtype=np.float64)
+    idf /= df
+    np.log(idf, out=idf)
+    idf += 1.0
+
+    vectorizer.vocabulary_ = {terms[i]: np.int64(new) for new, i in enumerate(kept)}
+    # Public setter: builds the vectorizer's TfidfTransformer and checks idf against the vocabulary
+    vectorizer.idf_ = idf
+    return vectorizer, sorted(classes), n_docs
+
+
+def train_model(store, key, vectorizer, classes, args):
+    """Pass 2: MultinomialNB.partial_fit over the training chunks"""
+    model = MultinomialNB(alpha=args.alpha)
+    for texts, intents in iter_split(store, key, 'train', args):
+        model.partial_fit(vectorizer.transform(texts), intents, classes=classes)
+    return model
+
+
+def evaluate(store, key, vectorizer, model, args):
+    y_true, y_pred = [], []
+    for texts, intents in iter_split(store, key, 'test', args):
+        y_true.extend(intents)
+        y_pred.extend(model.predict(vectorizer.transform(texts)))
+    return y_true, y_pred
+
+
+def save_artifacts(output_dir, vectorizer, model):
+    slang_dict, stopwords = load_source_dictionaries(DICTIONARIES_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    for name, obj in (('tfidf_vectorizer', vectorizer), ('naive_bayes_model', model),
+                      ('slang_dict', slang_dict), ('stopwords', stopwords)):
+        with open(os.path.join(output_dir, f'{name}.pkl'), 'wb') as f:
+            pickle.dump(obj, f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', default=DEFAULT_INPUT)
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-features', type=int, default=5000)
+    parser.add_argument('--ngram-range', type=int, nargs=2, default=(1, 2))
+    parser.add_argument('--min-df', type=int, default=2)
+    parser.add_argument('--alpha', type=float, default=0.1)
+    parser.add_argument('--exclude-intent', action='append',
+                        help=f"intent to leave out, repeatable (default: {', '.join(DEFAULT_EXCLUDED_INTENTS)})")
+    parser.add_argument('--no-bundle', action='store_true', help="don't rebuild the model bundle")
+    args = parser.parse_args(argv)
+    # Given intents replace the default instead of being appended to it
+    if args.exclude_intent is None:
+        args.exclude_intent = list(DEFAULT_EXCLUDED_INTENTS)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    store = ProcessedDatasetStore(args.store_dir)
+    key = preprocess_dataset(args, store)
+
+    vectorizer, classes, n_docs = fit_vectorizer(store, key, args)
+    print(f"Vocab: {len(vectorizer.vocabulary_)} ({n_docs} documents, {len(classes)} intents)")
+
+    model = train_model(store, key, vectorizer, classes, args)
+    print('Model trained')
+
+    y_true, y_pred = evaluate(store, key, vectorizer, model, args)
+    if y_true:
+        print(f'Accuracy: {accuracy_score(y_true, y_pred):.2%} ({len(y_true)} held-out rows)')
+        print(classification_report(y_true, y_pred, zero_division=0))
+
+    save_artifacts(args.output_dir, vectorizer, model)
+    print(f"Artifacts written to {args.output_dir}")
+    if not args.no_bundle and os.path.abspath(args.output_dir) == DEFAULT_OUTPUT_DIR:
+        from model_bundle import build_bundle
+
+        bundle = build_bundle()
+        print(f"Model bundle {bundle.version} written to {bundle.path}")
+    print(f"Done in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()